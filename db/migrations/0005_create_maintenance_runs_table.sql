@@ -0,0 +1,7 @@
+CREATE TABLE IF NOT EXISTS maintenance_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task TEXT NOT NULL CHECK (task IN ('analyze','optimize','incremental_vacuum','wal_checkpoint')),
+    started_at INTEGER NOT NULL,
+    duration_ms REAL NOT NULL CHECK (duration_ms >= 0),
+    detail TEXT
+);
@@ -0,0 +1,11 @@
+CREATE INDEX IF NOT EXISTS idx_exercises_filters
+    ON exercises(primary_muscle, equipment, pattern, difficulty, is_active);
+CREATE INDEX IF NOT EXISTS idx_session_exercises_exercise_id
+    ON session_exercises(exercise_id);
+CREATE INDEX IF NOT EXISTS idx_clients_last_name ON clients(last_name);
+CREATE INDEX IF NOT EXISTS idx_sessions_client_id ON sessions(client_id);
+CREATE INDEX IF NOT EXISTS idx_invoices_issued_on ON invoices(issued_on);
+CREATE INDEX IF NOT EXISTS idx_invoices_client_id ON invoices(client_id);
+CREATE INDEX IF NOT EXISTS idx_nutrition_profiles_client_id
+    ON nutrition_profiles(client_id);
+CREATE INDEX IF NOT EXISTS idx_calendar_client_id ON calendar(client_id);
@@ -0,0 +1,16 @@
+ALTER TABLE clients ADD COLUMN search_first TEXT;
+ALTER TABLE clients ADD COLUMN search_last TEXT;
+ALTER TABLE clients ADD COLUMN search_email TEXT;
+ALTER TABLE clients ADD COLUMN phone_digits TEXT;
+
+UPDATE clients SET
+    search_first = normalize(first_name),
+    search_last = normalize(last_name),
+    search_email = normalize(email),
+    phone_digits = digits(phone);
+
+DROP INDEX IF EXISTS idx_clients_last_name;
+CREATE INDEX idx_clients_search_name ON clients(search_last, search_first, id);
+CREATE INDEX idx_clients_search_first ON clients(search_first);
+CREATE INDEX idx_clients_search_email ON clients(search_email);
+CREATE INDEX idx_clients_phone_digits ON clients(phone_digits);
@@ -0,0 +1,18 @@
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO table_versions (name) VALUES ('clients');
+
+CREATE TRIGGER IF NOT EXISTS trg_clients_version_insert AFTER INSERT ON clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE name = 'clients';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_clients_version_update AFTER UPDATE ON clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE name = 'clients';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_clients_version_delete AFTER DELETE ON clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE name = 'clients';
+END;
@@ -0,0 +1,3 @@
+DROP INDEX IF EXISTS idx_invoices_client_id;
+CREATE INDEX idx_invoices_client_status
+    ON invoices(client_id, status, amount_cents, issued_on);
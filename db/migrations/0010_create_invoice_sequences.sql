@@ -0,0 +1,19 @@
+CREATE TABLE IF NOT EXISTS invoice_sequences (
+    year INTEGER PRIMARY KEY,
+    last_seq INTEGER NOT NULL CHECK (last_seq >= 0)
+);
+
+INSERT INTO invoice_sequences (year, last_seq)
+SELECT CAST(substr(number, 1, 4) AS INTEGER), MAX(CAST(substr(number, 6) AS INTEGER))
+FROM invoices
+WHERE number GLOB '[0-9][0-9][0-9][0-9]-[0-9]*'
+GROUP BY 1;
+
+-- Invoices inserted with an explicit number keep the sequence ahead of them.
+CREATE TRIGGER IF NOT EXISTS trg_invoices_sequence AFTER INSERT ON invoices
+WHEN NEW.number GLOB '[0-9][0-9][0-9][0-9]-[0-9]*'
+BEGIN
+    INSERT INTO invoice_sequences (year, last_seq)
+    VALUES (CAST(substr(NEW.number, 1, 4) AS INTEGER), CAST(substr(NEW.number, 6) AS INTEGER))
+    ON CONFLICT(year) DO UPDATE SET last_seq = max(last_seq, excluded.last_seq);
+END;
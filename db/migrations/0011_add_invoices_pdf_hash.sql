@@ -0,0 +1 @@
+ALTER TABLE invoices ADD COLUMN pdf_hash TEXT;
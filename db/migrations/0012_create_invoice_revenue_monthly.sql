@@ -0,0 +1,69 @@
+-- Invoice counts and amounts per month, client and status, kept in sync by
+-- triggers so revenue totals never have to read the invoices table.
+-- Invoices without a client are summed under client_id ''.
+CREATE TABLE IF NOT EXISTS invoice_revenue_monthly (
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    client_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    amount_cents INTEGER NOT NULL,
+    PRIMARY KEY (year, month, client_id, status)
+) WITHOUT ROWID;
+
+INSERT INTO invoice_revenue_monthly (year, month, client_id, status, count, amount_cents)
+SELECT CAST(substr(issued_on, 1, 4) AS INTEGER), CAST(substr(issued_on, 6, 2) AS INTEGER),
+       COALESCE(client_id, ''), status, COUNT(*), SUM(amount_cents)
+FROM invoices
+GROUP BY 1, 2, 3, 4;
+
+CREATE TRIGGER IF NOT EXISTS trg_invoices_revenue_insert AFTER INSERT ON invoices
+BEGIN
+    INSERT INTO invoice_revenue_monthly (year, month, client_id, status, count, amount_cents)
+    VALUES (
+        CAST(substr(NEW.issued_on, 1, 4) AS INTEGER), CAST(substr(NEW.issued_on, 6, 2) AS INTEGER),
+        COALESCE(NEW.client_id, ''), NEW.status, 1, NEW.amount_cents
+    )
+    ON CONFLICT (year, month, client_id, status) DO UPDATE SET
+        count = count + 1, amount_cents = amount_cents + excluded.amount_cents;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_invoices_revenue_delete AFTER DELETE ON invoices
+BEGIN
+    UPDATE invoice_revenue_monthly
+    SET count = count - 1, amount_cents = amount_cents - OLD.amount_cents
+    WHERE year = CAST(substr(OLD.issued_on, 1, 4) AS INTEGER)
+      AND month = CAST(substr(OLD.issued_on, 6, 2) AS INTEGER)
+      AND client_id = COALESCE(OLD.client_id, '') AND status = OLD.status;
+    DELETE FROM invoice_revenue_monthly
+    WHERE year = CAST(substr(OLD.issued_on, 1, 4) AS INTEGER)
+      AND month = CAST(substr(OLD.issued_on, 6, 2) AS INTEGER)
+      AND client_id = COALESCE(OLD.client_id, '') AND status = OLD.status
+      AND count = 0;
+END;
+
+-- Only the columns the summary depends on; PDF bookkeeping updates are free.
+CREATE TRIGGER IF NOT EXISTS trg_invoices_revenue_update
+AFTER UPDATE OF client_id, status, amount_cents, issued_on ON invoices
+BEGIN
+    UPDATE invoice_revenue_monthly
+    SET count = count - 1, amount_cents = amount_cents - OLD.amount_cents
+    WHERE year = CAST(substr(OLD.issued_on, 1, 4) AS INTEGER)
+      AND month = CAST(substr(OLD.issued_on, 6, 2) AS INTEGER)
+      AND client_id = COALESCE(OLD.client_id, '') AND status = OLD.status;
+    INSERT INTO invoice_revenue_monthly (year, month, client_id, status, count, amount_cents)
+    VALUES (
+        CAST(substr(NEW.issued_on, 1, 4) AS INTEGER), CAST(substr(NEW.issued_on, 6, 2) AS INTEGER),
+        COALESCE(NEW.client_id, ''), NEW.status, 1, NEW.amount_cents
+    )
+    ON CONFLICT (year, month, client_id, status) DO UPDATE SET
+        count = count + 1, amount_cents = amount_cents + excluded.amount_cents;
+    DELETE FROM invoice_revenue_monthly
+    WHERE year = CAST(substr(OLD.issued_on, 1, 4) AS INTEGER)
+      AND month = CAST(substr(OLD.issued_on, 6, 2) AS INTEGER)
+      AND client_id = COALESCE(OLD.client_id, '') AND status = OLD.status
+      AND count = 0;
+END;
+
+CREATE INDEX IF NOT EXISTS idx_revenue_monthly_client
+    ON invoice_revenue_monthly(client_id, year, month);
@@ -0,0 +1,6 @@
+CREATE INDEX IF NOT EXISTS idx_invoices_status_issued
+    ON invoices(status, issued_on, id);
+CREATE INDEX IF NOT EXISTS idx_invoices_client_issued
+    ON invoices(client_id, issued_on, id);
+DROP INDEX IF EXISTS idx_invoices_issued_on;
+CREATE INDEX idx_invoices_issued_on ON invoices(issued_on, id);
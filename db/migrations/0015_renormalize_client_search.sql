@@ -0,0 +1,5 @@
+-- normalize() now keeps non-Latin letters; recompute the search keys.
+UPDATE clients SET
+    search_first = normalize(first_name),
+    search_last = normalize(last_name),
+    search_email = normalize(email);
@@ -0,0 +1,18 @@
+"""Change detection between two versions of a model dataclass."""
+from __future__ import annotations
+
+from dataclasses import fields
+from typing import Any, Iterable, List
+
+
+def changed_fields(before: Any, after: Any, ignore: Iterable[str] = ()) -> List[str]:
+    """Return the names of the dataclass fields that differ, in field order."""
+    skipped = set(ignore)
+    return [
+        f.name
+        for f in fields(before)
+        if f.name not in skipped and getattr(before, f.name) != getattr(after, f.name)
+    ]
+
+
+__all__ = ["changed_fields"]
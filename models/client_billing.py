@@ -0,0 +1,22 @@
+"""Data model for per-client invoice totals."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+
+@dataclass
+class ClientBillingSummary:
+    """Dataclass representing a client and the totals of its invoices."""
+
+    client_id: str
+    first_name: str
+    last_name: str
+    invoice_count: int
+    total_billed_cents: int
+    unpaid_cents: int
+    last_invoice_on: Optional[date] = None
+
+
+__all__ = ["ClientBillingSummary"]
@@ -20,6 +20,7 @@ class Invoice:
     paid_on: Optional[date] = None
     pdf_path: Optional[str] = None
     template: str = "classic"
+    pdf_hash: Optional[str] = None
 
 
 __all__ = ["Invoice"]
@@ -0,0 +1,66 @@
+"""Data models for background jobs."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = {JOB_DONE, JOB_FAILED, JOB_CANCELLED}
+
+
+@dataclass
+class Job:
+    """Dataclass representing a persisted background job.
+
+    ``cursor`` is the JSON value of the last checkpoint, from which an
+    interrupted job resumes.
+    """
+
+    id: str
+    kind: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    status: str = JOB_PENDING
+    cursor: Any = None
+    done: int = 0
+    total: Optional[int] = None
+    error: Optional[str] = None
+    created_at: int = 0
+    updated_at: int = 0
+
+
+@dataclass(frozen=True)
+class JobProgress:
+    """Snapshot of a job published to the UI."""
+
+    job_id: str
+    kind: str
+    status: str
+    done: int = 0
+    total: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def fraction(self) -> Optional[float]:
+        if not self.total:
+            return None
+        return min(1.0, self.done / self.total)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+
+__all__ = [
+    "FINISHED_STATUSES",
+    "JOB_CANCELLED",
+    "JOB_DONE",
+    "JOB_FAILED",
+    "JOB_PENDING",
+    "JOB_RUNNING",
+    "Job",
+    "JobProgress",
+]
@@ -0,0 +1,22 @@
+"""Data model for monthly revenue totals."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass
+class MonthlyRevenue:
+    """Dataclass representing the invoices issued during one month."""
+
+    year: int
+    month: int
+    invoice_count: int
+    billed_cents: int
+    paid_cents: int
+
+    @property
+    def unpaid_cents(self) -> int:
+        return self.billed_cents - self.paid_cents
+
+
+__all__ = ["MonthlyRevenue"]
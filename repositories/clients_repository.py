@@ -1,12 +1,26 @@
 """Repository handling database operations for clients."""
 from __future__ import annotations
 
+import json
 import sqlite3
 import time
-from datetime import date
-from typing import List, Optional
+from datetime import date, datetime
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 from models.client import Client
+from models.client_billing import ClientBillingSummary
+from repositories.pagination import Page, decode_cursor, fetch_page
+from repositories.sql_functions import digits_only, normalize_text
 
 
 class ClientsRepository:
@@ -58,18 +72,65 @@ class ClientsRepository:
                 """
                 INSERT INTO clients (
                     id, first_name, last_name, sex, birthdate, height_cm,
-                    weight_kg, objective, injuries, email, phone, created_at
-                ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
+                    weight_kg, objective, injuries, email, phone, created_at,
+                    search_first, search_last, search_email, phone_digits
+                ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
                 """,
-                data,
+                data + self._search_values(client),
             )
 
+    def add_many(self, clients: Iterable[Client]) -> int:
+        """Insert ``clients`` in a single transaction and return the count.
+
+        ``clients`` is consumed lazily, so a generator keeps memory flat.
+        """
+
+        now = int(time.time())
+        rows = (
+            (
+                c.id,
+                c.first_name,
+                c.last_name,
+                c.sex,
+                c.birthdate.isoformat(),
+                c.height_cm,
+                c.weight_kg,
+                c.objective,
+                c.injuries,
+                c.email,
+                c.phone,
+                now,
+                *self._search_values(c),
+            )
+            for c in clients
+        )
+        with self.conn:
+            cursor = self.conn.executemany(
+                """
+                INSERT INTO clients (
+                    id, first_name, last_name, sex, birthdate, height_cm,
+                    weight_kg, objective, injuries, email, phone, created_at,
+                    search_first, search_last, search_email, phone_digits
+                ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+                """,
+                rows,
+            )
+        return max(cursor.rowcount, 0)
+
     def get(self, client_id: str) -> Optional[Client]:
         row = self.conn.execute(
             "SELECT * FROM clients WHERE id = ?", (client_id,)
         ).fetchone()
         return self._row_to_client(row)
 
+    def get_many(self, client_ids: Iterable[str]) -> Dict[str, Client]:
+        """Return the clients of ``client_ids`` keyed by id, in one query."""
+        rows = self.conn.execute(
+            "SELECT * FROM clients WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(client_ids)),),
+        )
+        return {r[0]: self._row_to_client(r) for r in rows}
+
     def get_by_identity(
         self, first_name: str, last_name: str, birthdate: date
     ) -> Optional[Client]:
@@ -82,11 +143,31 @@ class ClientsRepository:
         ).fetchone()
         return self._row_to_client(row)
 
+    def identity_keys(self) -> Set[Tuple[str, str, str]]:
+        """Return ``(first_name, last_name, birthdate)`` of every client.
+
+        Read from the UNIQUE index only; birthdates are ISO strings.
+        """
+
+        rows = self.conn.execute(
+            "SELECT first_name, last_name, birthdate FROM clients"
+        ).fetchall()
+        return {(r[0], r[1], r[2]) for r in rows}
+
     def list_all(self) -> List[Client]:
         rows = self.conn.execute("SELECT * FROM clients").fetchall()
         return [self._row_to_client(r) for r in rows if r]
 
-    def update(self, client: Client) -> None:
+    def update(self, client: Client, fields: Optional[Iterable[str]] = None) -> None:
+        """Write ``client`` back; only the attributes in ``fields`` if given.
+
+        An empty ``fields`` is a no-op.  Search columns follow the name,
+        email and phone attributes they derive from.
+        """
+
+        if fields is not None:
+            self._update_fields(client, fields)
+            return
         data = (
             client.first_name,
             client.last_name,
@@ -98,6 +179,7 @@ class ClientsRepository:
             client.injuries,
             client.email,
             client.phone,
+            *self._search_values(client),
             client.id,
         )
         with self.conn:
@@ -105,15 +187,293 @@ class ClientsRepository:
                 """
                 UPDATE clients SET
                     first_name=?, last_name=?, sex=?, birthdate=?, height_cm=?,
-                    weight_kg=?, objective=?, injuries=?, email=?, phone=?
+                    weight_kg=?, objective=?, injuries=?, email=?, phone=?,
+                    search_first=?, search_last=?, search_email=?, phone_digits=?
                 WHERE id=?
                 """,
                 data,
             )
 
+    def _update_fields(self, client: Client, fields: Iterable[str]) -> None:
+        columns: List[str] = []
+        for name in fields:
+            if name not in _COLUMN_VALUES:
+                raise ValueError(f"Unknown client field: {name}")
+            columns.extend(c for c in _DERIVED_COLUMNS.get(name, (name,)) if c not in columns)
+        if not columns:
+            return
+        assignments = ", ".join(f"{c}=?" for c in columns)
+        params = [_COLUMN_VALUES[c](client) for c in columns]
+        with self.conn:
+            self.conn.execute(
+                f"UPDATE clients SET {assignments} WHERE id=?", [*params, client.id]
+            )
+
     def delete(self, client_id: str) -> None:
         with self.conn:
             self.conn.execute("DELETE FROM clients WHERE id = ?", (client_id,))
 
+    # --- retention -----------------------------------------------
+    def inactive_ids(self, cutoff: date) -> List[str]:
+        """Return ids of clients with no activity since ``cutoff``.
+
+        A client is inactive when it was created before ``cutoff`` and has
+        no session, calendar event or invoice on or after it, and no unpaid
+        invoice at all.
+        """
+        rows = self.conn.execute(
+            f"SELECT c.id FROM clients c WHERE {_INACTIVE_SINCE} ORDER BY c.id",
+            _cutoff_params(cutoff),
+        )
+        return [r[0] for r in rows]
+
+    def purge_inactive(self, ids: Sequence[str], cutoff: date) -> Tuple[int, int]:
+        """Delete the clients of ``ids`` still inactive since ``cutoff``.
+
+        Their invoices are detached in the same transaction.  Returns the
+        number of deleted clients and of detached invoices.
+        """
+        params = {"ids": json.dumps(list(ids)), **_cutoff_params(cutoff)}
+        eligible = (
+            "SELECT c.id FROM clients c "
+            "WHERE c.id IN (SELECT value FROM json_each(:ids)) "
+            f"AND {_INACTIVE_SINCE}"
+        )
+        with self.conn:
+            detached = self.conn.execute(
+                f"UPDATE invoices SET client_id = NULL WHERE client_id IN ({eligible})",
+                params,
+            ).rowcount
+            deleted = self.conn.execute(
+                f"DELETE FROM clients WHERE id IN ({eligible})", params
+            ).rowcount
+        return deleted, detached
+
+    # --- analytics -----------------------------------------------
+    def roster_rows(self) -> List[Tuple[str, float, float]]:
+        """Return ``(birthdate, height_cm, weight_kg)`` of every client by id.
+
+        Only the three columns used by roster analytics are read and no
+        :class:`Client` is built.
+        """
+        return self.conn.execute(
+            "SELECT birthdate, height_cm, weight_kg FROM clients ORDER BY id"
+        ).fetchall()
+
+    def breakdown_counts(self) -> List[Tuple[str, str, int]]:
+        """Return client counts per ``(sex, objective)``.
+
+        A missing objective is reported as ``""``.
+        """
+        return self.conn.execute(
+            """
+            SELECT sex, IFNULL(TRIM(objective), ''), COUNT(*)
+            FROM clients GROUP BY 1, 2
+            """
+        ).fetchall()
+
+    def version(self) -> int:
+        """Return a counter bumped by every write to the clients table."""
+        row = self.conn.execute(
+            "SELECT version FROM table_versions WHERE name = 'clients'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    # --- search --------------------------------------------------
+    def search(
+        self, query: str = "", limit: int = 50, cursor: Optional[str] = None
+    ) -> Page[Client]:
+        """Return clients whose name, email or phone starts with ``query``.
+
+        Matching is accent and case insensitive and uses the persisted
+        ``search_*`` columns, so every term is an index range scan.  Results
+        are ordered by last then first name and paginated by keyset:
+        pass the returned ``next_cursor`` to get the following page.
+        """
+
+        where, params = self._search_filter(query)
+        if cursor:
+            where += " AND (search_last, search_first, id) > (?, ?, ?)"
+            params.extend(decode_cursor(cursor, 3))
+        return fetch_page(
+            self.conn,
+            f"""
+            SELECT * FROM clients WHERE {where}
+            ORDER BY search_last, search_first, id
+            LIMIT ?
+            """,
+            params,
+            limit,
+            self._row_to_client,
+            ("search_last", "search_first", "id"),
+        )
+
+    def count(self, query: str = "") -> int:
+        """Return the number of clients matched by :meth:`search`."""
+        where, params = self._search_filter(query)
+        row = self.conn.execute(
+            f"SELECT COUNT(*) FROM clients WHERE {where}", params
+        ).fetchone()
+        return row[0]
+
+    # --- billing -------------------------------------------------
+    def list_with_billing_summary(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        *,
+        sort: str = "unpaid",
+        outstanding_only: bool = False,
+    ) -> Page[ClientBillingSummary]:
+        """Return clients with the totals of their invoices, one page at a time.
+
+        Totals come from a single grouped ``LEFT JOIN`` read from the
+        covering ``idx_invoices_client_status`` index.  ``sort`` is
+        ``"unpaid"`` (largest outstanding amount first) or ``"name"``;
+        ``outstanding_only`` keeps clients with an unpaid amount.  Pass the
+        returned ``next_cursor`` to get the following page.
+        """
+
+        if sort not in ("unpaid", "name"):
+            raise ValueError("Invalid sort")
+        where: List[str] = []
+        having: List[str] = []
+        params: List[Any] = []
+        if sort == "name":
+            # Grouping on the index columns lets the scan stop at LIMIT.
+            order = group = "c.search_last, c.search_first, c.id"
+            key: Tuple[str, ...] = ("search_last", "search_first", "id")
+            if cursor:
+                where.append("(c.search_last, c.search_first, c.id) > (?, ?, ?)")
+                params.extend(decode_cursor(cursor, 3))
+        else:
+            order, group = "unpaid_cents DESC, c.id", "c.id"
+            key = ("unpaid_cents", "id")
+            if cursor:
+                unpaid, client_id = decode_cursor(cursor, 2)
+                having.append(
+                    "(unpaid_cents < ? OR (unpaid_cents = ? AND c.id > ?))"
+                )
+                params.extend([unpaid, unpaid, client_id])
+        if outstanding_only:
+            having.append("unpaid_cents > 0")
+        return fetch_page(
+            self.conn,
+            f"""
+            SELECT c.id, c.first_name, c.last_name, c.search_last, c.search_first,
+                   COUNT(i.client_id),
+                   IFNULL(SUM(i.amount_cents), 0),
+                   IFNULL(SUM(CASE WHEN i.status = 'Non payée'
+                                   THEN i.amount_cents END), 0) AS unpaid_cents,
+                   MAX(i.issued_on)
+            FROM clients c LEFT JOIN invoices i ON i.client_id = c.id
+            WHERE {" AND ".join(where) or "1=1"}
+            GROUP BY {group}
+            {"HAVING " + " AND ".join(having) if having else ""}
+            ORDER BY {order}
+            LIMIT ?
+            """,
+            params,
+            limit,
+            _row_to_billing_summary,
+            key,
+        )
+
+    @staticmethod
+    def _search_values(client: Client) -> Tuple[str, str, str, str]:
+        return (
+            normalize_text(client.first_name),
+            normalize_text(client.last_name),
+            normalize_text(client.email),
+            digits_only(client.phone),
+        )
+
+    @staticmethod
+    def _search_filter(query: str) -> Tuple[str, List[Any]]:
+        """Build the WHERE clause matching every term of ``query``."""
+        stripped = query.strip()
+        if not stripped:
+            return "1=1", []
+        phone = digits_only(stripped)
+        if phone and not any(ch.isalpha() or ch == "@" for ch in stripped):
+            return "phone_digits >= ? AND phone_digits < ?", list(_prefix_range(phone))
+        clauses: List[str] = []
+        params: List[Any] = []
+        for term in normalize_text(stripped).split():
+            low, high = _prefix_range(term)
+            clauses.append(
+                "((search_last >= ? AND search_last < ?)"
+                " OR (search_first >= ? AND search_first < ?)"
+                " OR (search_email >= ? AND search_email < ?))"
+            )
+            params.extend([low, high] * 3)
+        # A query made only of stripped characters matches nothing, not everyone.
+        return " AND ".join(clauses) or "0", params
+
+
+_COLUMN_VALUES: Dict[str, Callable[[Client], Any]] = {
+    "first_name": lambda c: c.first_name,
+    "last_name": lambda c: c.last_name,
+    "sex": lambda c: c.sex,
+    "birthdate": lambda c: c.birthdate.isoformat(),
+    "height_cm": lambda c: c.height_cm,
+    "weight_kg": lambda c: c.weight_kg,
+    "objective": lambda c: c.objective,
+    "injuries": lambda c: c.injuries,
+    "email": lambda c: c.email,
+    "phone": lambda c: c.phone,
+    "search_first": lambda c: normalize_text(c.first_name),
+    "search_last": lambda c: normalize_text(c.last_name),
+    "search_email": lambda c: normalize_text(c.email),
+    "phone_digits": lambda c: digits_only(c.phone),
+}
+
+_DERIVED_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "first_name": ("first_name", "search_first"),
+    "last_name": ("last_name", "search_last"),
+    "email": ("email", "search_email"),
+    "phone": ("phone", "phone_digits"),
+}
+
+
+_INACTIVE_SINCE = """
+    c.created_at < :cutoff_ts
+    AND NOT EXISTS (
+        SELECT 1 FROM sessions s
+        WHERE s.client_id = c.id AND s.session_date >= :cutoff
+    )
+    AND NOT EXISTS (
+        SELECT 1 FROM calendar e
+        WHERE e.client_id = c.id AND e.event_date >= :cutoff
+    )
+    AND NOT EXISTS (
+        SELECT 1 FROM invoices i
+        WHERE i.client_id = c.id
+          AND (i.issued_on >= :cutoff OR i.status = 'Non payée')
+    )
+"""
+
+
+def _cutoff_params(cutoff: date) -> Dict[str, Any]:
+    midnight = datetime(cutoff.year, cutoff.month, cutoff.day)
+    return {"cutoff": cutoff.isoformat(), "cutoff_ts": int(midnight.timestamp())}
+
+
+def _row_to_billing_summary(row: sqlite3.Row) -> ClientBillingSummary:
+    return ClientBillingSummary(
+        client_id=row[0],
+        first_name=row[1],
+        last_name=row[2],
+        invoice_count=row[5],
+        total_billed_cents=row[6],
+        unpaid_cents=row[7],
+        last_invoice_on=date.fromisoformat(row[8]) if row[8] else None,
+    )
+
+
+def _prefix_range(prefix: str) -> Tuple[str, str]:
+    """Return bounds such that ``low <= value < high`` means "starts with"."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
 
 __all__ = ["ClientsRepository"]
@@ -4,8 +4,7 @@ from __future__ import annotations
 import json
 import sqlite3
 import time
-import unicodedata
-from typing import Any, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 from models.exercise import Exercise
 from config.enums import (
@@ -16,6 +15,7 @@ from config.enums import (
     PATTERN_LABELS,
     PATTERN_CODES,
 )
+from repositories.sql_functions import normalize_text, register_sql_functions
 
 
 class ExercisesRepository:
@@ -23,7 +23,7 @@ class ExercisesRepository:
 
     def __init__(self, conn: sqlite3.Connection) -> None:
         self.conn = conn
-        self.conn.create_function("normalize", 1, self._normalize)
+        register_sql_functions(self.conn)
 
     # --- helpers -------------------------------------------------
     def _row_to_exercise(self, row: sqlite3.Row | None) -> Optional[Exercise]:
@@ -124,7 +124,17 @@ class ExercisesRepository:
         rows = self.conn.execute(query, params).fetchall()
         return [self._row_to_exercise(row) for row in rows if row]
 
-    def update(self, exercise: Exercise) -> None:
+    def update(
+        self, exercise: Exercise, fields: Optional[Iterable[str]] = None
+    ) -> None:
+        """Write ``exercise`` back; only the attributes in ``fields`` if given.
+
+        ``updated_at`` is bumped whenever something is written; an empty
+        ``fields`` is a no-op.
+        """
+        if fields is not None:
+            self._update_fields(exercise, fields)
+            return
         now = int(time.time())
         data = (
             exercise.name,
@@ -160,6 +170,23 @@ class ExercisesRepository:
                 data,
             )
 
+    def _update_fields(self, exercise: Exercise, fields: Iterable[str]) -> None:
+        columns: List[str] = []
+        for name in fields:
+            if name not in _COLUMN_VALUES:
+                raise ValueError(f"Unknown exercise field: {name}")
+            if name not in columns:
+                columns.append(name)
+        if not columns:
+            return
+        assignments = ", ".join(f"{c}=?" for c in columns)
+        params = [_COLUMN_VALUES[c](exercise) for c in columns]
+        with self.conn:
+            self.conn.execute(
+                f"UPDATE exercises SET {assignments}, updated_at=? WHERE id=?",
+                [*params, int(time.time()), exercise.id],
+            )
+
     def soft_delete(self, exercise_id: str) -> None:
         now = int(time.time())
         with self.conn:
@@ -189,7 +216,7 @@ class ExercisesRepository:
         sql = "SELECT * FROM exercises WHERE 1=1"
         params: List[Any] = []
         if query:
-            q = f"%{self._normalize(query)}%"
+            q = f"%{normalize_text(query)}%"
             sql += " AND (normalize(name) LIKE ? OR normalize(cues) LIKE ?)"
             params.extend([q, q])
         if primary_muscles:
@@ -212,17 +239,29 @@ class ExercisesRepository:
         rows = self.conn.execute(sql, params).fetchall()
         return [self._row_to_exercise(r) for r in rows if r]
 
-    # helper normalization
-    @staticmethod
-    def _normalize(text: str | None) -> str:
-        if not text:
-            return ""
-        return (
-            unicodedata.normalize("NFKD", text)
-            .encode("ascii", "ignore")
-            .decode("ascii")
-            .lower()
-        )
+
+def _secondary_muscles_json(exercise: Exercise) -> Optional[str]:
+    if not exercise.secondary_muscles:
+        return None
+    return json.dumps([PRIMARY_MUSCLE_LABELS.get(m) for m in exercise.secondary_muscles])
+
+
+_COLUMN_VALUES: Dict[str, Callable[[Exercise], Any]] = {
+    "name": lambda e: e.name,
+    "slug": lambda e: e.slug,
+    "primary_muscle": lambda e: PRIMARY_MUSCLE_LABELS.get(e.primary_muscle),
+    "secondary_muscles": _secondary_muscles_json,
+    "equipment": lambda e: EQUIPMENT_LABELS.get(e.equipment) if e.equipment else None,
+    "pattern": lambda e: PATTERN_LABELS.get(e.pattern) if e.pattern else None,
+    "difficulty": lambda e: e.difficulty,
+    "tempo": lambda e: e.tempo,
+    "rep_range": lambda e: e.rep_range,
+    "rpe_default": lambda e: e.rpe_default,
+    "rest_s_default": lambda e: e.rest_s_default,
+    "cues": lambda e: e.cues,
+    "image_path": lambda e: e.image_path,
+    "is_active": lambda e: e.is_active,
+}
 
 
 __all__ = ["ExercisesRepository"]
@@ -1,11 +1,15 @@
 """Repository handling database operations for invoices."""
 from __future__ import annotations
 
+import json
 import sqlite3
 from datetime import date
-from typing import List, Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from models.invoice import Invoice
+from models.revenue import MonthlyRevenue
+from repositories.pagination import Page, decode_cursor, fetch_page
 
 
 class InvoicesRepository:
@@ -18,8 +22,8 @@ class InvoicesRepository:
     def _row_to_invoice(self, row: sqlite3.Row | None) -> Optional[Invoice]:
         if row is None:
             return None
-        issued = date.fromisoformat(row[6])
-        paid = date.fromisoformat(row[7]) if row[7] else None
+        issued = _parse_date(row[6])
+        paid = _parse_date(row[7]) if row[7] else None
         return Invoice(
             id=row[0],
             client_id=row[1],
@@ -31,33 +35,56 @@ class InvoicesRepository:
             paid_on=paid,
             pdf_path=row[8],
             template=row[9],
+            pdf_hash=row[10],
         )
 
     # ------------------------------------------------------------------
     def add(self, invoice: Invoice) -> None:
         """Insert a new invoice into the database."""
-        data = (
-            invoice.id,
-            invoice.client_id,
-            invoice.number,
-            invoice.label,
-            invoice.amount_cents,
-            invoice.status,
-            invoice.issued_on.isoformat(),
-            invoice.paid_on.isoformat() if invoice.paid_on else None,
-            invoice.pdf_path,
-            invoice.template,
-        )
         with self.conn:
-            self.conn.execute(
-                """
-                INSERT INTO invoices (
-                    id, client_id, number, label, amount_cents, status,
-                    issued_on, paid_on, pdf_path, template
-                ) VALUES (?,?,?,?,?,?,?,?,?,?)
-                """,
-                data,
-            )
+            self.conn.execute(_INSERT_SQL, _insert_values(invoice))
+
+    def add_numbered(self, invoice: Invoice) -> Invoice:
+        """Allocate the next number of the invoice year and insert it.
+
+        The ``invoice_sequences`` counter is incremented in the insert
+        transaction, so concurrent writers never get the same number and a
+        failed insert does not consume one.
+        """
+        with self.conn:
+            seq = self._reserve(invoice.issued_on.year, 1)
+            invoice.number = format_number(invoice.issued_on.year, seq)
+            self.conn.execute(_INSERT_SQL, _insert_values(invoice))
+        return invoice
+
+    def add_many(self, invoices: Iterable[Invoice]) -> List[Invoice]:
+        """Number and insert ``invoices`` in a single transaction.
+
+        One block of numbers is reserved per year, in input order.
+        """
+        invoices = list(invoices)
+        per_year: Dict[int, List[Invoice]] = {}
+        for invoice in invoices:
+            per_year.setdefault(invoice.issued_on.year, []).append(invoice)
+        with self.conn:
+            for year, batch in per_year.items():
+                last = self._reserve(year, len(batch))
+                for seq, invoice in enumerate(batch, start=last - len(batch) + 1):
+                    invoice.number = format_number(year, seq)
+            self.conn.executemany(_INSERT_SQL, map(_insert_values, invoices))
+        return invoices
+
+    def _reserve(self, year: int, count: int) -> int:
+        """Advance the sequence of ``year`` by ``count`` and return its new value."""
+        row = self.conn.execute(
+            """
+            INSERT INTO invoice_sequences (year, last_seq) VALUES (?, ?)
+            ON CONFLICT(year) DO UPDATE SET last_seq = last_seq + excluded.last_seq
+            RETURNING last_seq
+            """,
+            (year, count),
+        ).fetchone()
+        return row[0]
 
     def get(self, invoice_id: str) -> Optional[Invoice]:
         row = self.conn.execute(
@@ -65,11 +92,124 @@ class InvoicesRepository:
         ).fetchone()
         return self._row_to_invoice(row)
 
+    def get_many(self, invoice_ids: Iterable[str]) -> Dict[str, Invoice]:
+        """Return the invoices of ``invoice_ids`` keyed by id, in one query."""
+        rows = self.conn.execute(
+            "SELECT * FROM invoices WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(invoice_ids)),),
+        )
+        return {r[0]: self._row_to_invoice(r) for r in rows}
+
+    def iter_matching(
+        self,
+        *,
+        client_id: Optional[str] = None,
+        status: Optional[str] = None,
+        issued_between: Optional[Tuple[date, date]] = None,
+    ) -> Iterator[Invoice]:
+        """Yield the matching invoices by issue date and number.
+
+        Rows are decoded one at a time as the cursor is consumed, so the
+        result set is never held in memory.  ``issued_between`` bounds are
+        inclusive.
+        """
+        where, params = _filters(client_id, status, issued_between)
+        rows = self.conn.execute(
+            f"SELECT * FROM invoices{where} ORDER BY issued_on, number", params
+        )
+        for row in rows:
+            yield self._row_to_invoice(row)
+
+    def iter_export_rows(
+        self,
+        *,
+        status: Optional[str] = None,
+        issued_between: Optional[Tuple[date, date]] = None,
+        chunk_size: int = 1000,
+    ) -> Iterator[tuple]:
+        """Yield raw accounting rows by issue date, ``chunk_size`` at a time.
+
+        Each row is ``(number, issued_on, paid_on, label, amount_cents,
+        status, client_id, first_name, last_name)`` with ISO date strings;
+        nothing is decoded into :class:`Invoice` objects.
+        """
+        where, params = _filters(None, status, issued_between, alias="i.")
+        cursor = self.conn.execute(
+            f"""
+            SELECT i.number, i.issued_on, i.paid_on, i.label, i.amount_cents,
+                   i.status, i.client_id, c.first_name, c.last_name
+            FROM invoices AS i
+            LEFT JOIN clients AS c ON c.id = i.client_id{where}
+            ORDER BY i.issued_on, i.number
+            """,
+            params,
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield from rows
+
+    def query(
+        self,
+        *,
+        status: Optional[str] = None,
+        client_id: Optional[str] = None,
+        issued_between: Optional[Tuple[date, date]] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Page[Invoice]:
+        """Return one page of matching invoices, most recently issued first.
+
+        A ``status`` or ``client_id`` filter is a range scan of the
+        ``(status, issued_on, id)`` or ``(client_id, issued_on, id)`` index
+        that stops after ``limit`` rows; only those rows are decoded.
+        ``issued_between`` bounds are inclusive and ``limit`` must be at
+        least 1, else ``ValueError`` is raised.  Pages are keyset
+        paginated: pass the returned ``next_cursor`` to get the following
+        page.
+        """
+        where, params = _filters(client_id, status, issued_between)
+        if cursor:
+            where += " AND " if where else " WHERE "
+            where += "(issued_on, id) < (?, ?)"
+            params.extend(decode_cursor(cursor, 2))
+        return fetch_page(
+            self.conn,
+            f"SELECT * FROM invoices{where} ORDER BY issued_on DESC, id DESC LIMIT ?",
+            params,
+            limit,
+            self._row_to_invoice,
+            ("issued_on", "id"),
+        )
+
+    def count(
+        self,
+        *,
+        status: Optional[str] = None,
+        client_id: Optional[str] = None,
+        issued_between: Optional[Tuple[date, date]] = None,
+    ) -> int:
+        """Return the number of invoices matched by :meth:`query`.
+
+        The count is read from an index; no invoice is decoded.
+        """
+        where, params = _filters(client_id, status, issued_between)
+        row = self.conn.execute(f"SELECT COUNT(*) FROM invoices{where}", params).fetchone()
+        return row[0]
+
     def list_all(self) -> List[Invoice]:
         rows = self.conn.execute("SELECT * FROM invoices").fetchall()
         return [self._row_to_invoice(r) for r in rows if r]
 
-    def update(self, invoice: Invoice) -> None:
+    def update(self, invoice: Invoice, fields: Optional[Iterable[str]] = None) -> None:
+        """Write ``invoice`` back; only the attributes in ``fields`` if given.
+
+        An empty ``fields`` is a no-op.
+        """
+        if fields is not None:
+            self._update_fields(invoice, fields)
+            return
         data = (
             invoice.client_id,
             invoice.number,
@@ -80,6 +220,7 @@ class InvoicesRepository:
             invoice.paid_on.isoformat() if invoice.paid_on else None,
             invoice.pdf_path,
             invoice.template,
+            invoice.pdf_hash,
             invoice.id,
         )
         with self.conn:
@@ -87,22 +228,199 @@ class InvoicesRepository:
                 """
                 UPDATE invoices SET
                     client_id=?, number=?, label=?, amount_cents=?, status=?,
-                    issued_on=?, paid_on=?, pdf_path=?, template=?
+                    issued_on=?, paid_on=?, pdf_path=?, template=?, pdf_hash=?
                 WHERE id=?
                 """,
                 data,
             )
 
+    def _update_fields(self, invoice: Invoice, fields: Iterable[str]) -> None:
+        columns: List[str] = []
+        for name in fields:
+            if name not in _COLUMN_VALUES:
+                raise ValueError(f"Unknown invoice field: {name}")
+            if name not in columns:
+                columns.append(name)
+        if not columns:
+            return
+        assignments = ", ".join(f"{c}=?" for c in columns)
+        params = [_COLUMN_VALUES[c](invoice) for c in columns]
+        with self.conn:
+            self.conn.execute(
+                f"UPDATE invoices SET {assignments} WHERE id=?", [*params, invoice.id]
+            )
+
+    def set_pdf_paths(self, outputs: Dict[str, Tuple[str, Optional[str]]]) -> None:
+        """Store ``pdf_path`` and ``pdf_hash`` of several invoices at once.
+
+        ``outputs`` maps invoice ids to ``(path, hash)``; one transaction.
+        """
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE invoices SET pdf_path = ?, pdf_hash = ? WHERE id = ?",
+                [(path, digest, i) for i, (path, digest) in outputs.items()],
+            )
+
     def delete(self, invoice_id: str) -> None:
         with self.conn:
             self.conn.execute("DELETE FROM invoices WHERE id = ?", (invoice_id,))
 
+    def revenue_by_month(
+        self,
+        *,
+        client_id: Optional[str] = None,
+        start: Optional[Tuple[int, int]] = None,
+        end: Optional[Tuple[int, int]] = None,
+    ) -> List[MonthlyRevenue]:
+        """Return billed and paid totals per month from the summary table.
+
+        ``start`` and ``end`` are inclusive ``(year, month)`` bounds.  The
+        cost depends on the number of months, not of invoices.
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        if client_id is not None:
+            clauses.append("client_id = ?")
+            params.append(client_id)
+        if start is not None:
+            clauses.append("(year, month) >= (?, ?)")
+            params.extend(start)
+        if end is not None:
+            clauses.append("(year, month) <= (?, ?)")
+            params.extend(end)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        rows = self.conn.execute(
+            f"""
+            SELECT year, month, SUM(count), SUM(amount_cents),
+                   SUM(CASE WHEN status = 'Payée' THEN amount_cents ELSE 0 END)
+            FROM invoice_revenue_monthly{where}
+            GROUP BY year, month
+            ORDER BY year, month
+            """,
+            params,
+        )
+        return [MonthlyRevenue(*r) for r in rows]
+
+    def rebuild_revenue_summary(self) -> int:
+        """Recompute ``invoice_revenue_monthly`` from the invoices.
+
+        The triggers keep it in sync; this is a repair tool.  Returns the
+        number of summary rows.
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM invoice_revenue_monthly")
+            self.conn.execute(
+                f"INSERT INTO invoice_revenue_monthly "
+                f"(year, month, client_id, status, count, amount_cents) {_REVENUE_SQL}"
+            )
+        return self.conn.execute("SELECT COUNT(*) FROM invoice_revenue_monthly").fetchone()[0]
+
+    def revenue_drift(self) -> int:
+        """Return the number of summary rows missing, stale or extraneous."""
+        row = self.conn.execute(
+            f"""
+            SELECT COUNT(*) FROM (
+                SELECT year, month, client_id, status
+                FROM ({_REVENUE_SQL} EXCEPT {_SUMMARY_SQL})
+                UNION
+                SELECT year, month, client_id, status
+                FROM ({_SUMMARY_SQL} EXCEPT {_REVENUE_SQL})
+            )
+            """
+        ).fetchone()
+        return row[0]
+
     def get_last_number(self, year: int) -> Optional[str]:
+        """Return the last number allocated for ``year``."""
         row = self.conn.execute(
-            "SELECT number FROM invoices WHERE number LIKE ? ORDER BY number DESC LIMIT 1",
-            (f"{year}-%",),
+            "SELECT last_seq FROM invoice_sequences WHERE year = ?", (year,)
         ).fetchone()
-        return row[0] if row else None
+        return format_number(year, row[0]) if row and row[0] else None
+
+
+def _filters(
+    client_id: Optional[str],
+    status: Optional[str],
+    issued_between: Optional[Tuple[date, date]],
+    alias: str = "",
+) -> Tuple[str, List[Any]]:
+    """Return the ``WHERE`` clause and parameters of the listing filters.
+
+    ``alias`` prefixes the column names, e.g. ``"i."`` in a join.
+    """
+    clauses: List[str] = []
+    params: List[Any] = []
+    if client_id is not None:
+        clauses.append(f"{alias}client_id = ?")
+        params.append(client_id)
+    if status is not None:
+        clauses.append(f"{alias}status = ?")
+        params.append(status)
+    if issued_between is not None:
+        clauses.append(f"{alias}issued_on BETWEEN ? AND ?")
+        params.extend(d.isoformat() for d in issued_between)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+# Many invoices share an issue date; parse each distinct string once.
+_parse_date = lru_cache(maxsize=4096)(date.fromisoformat)
+
+
+def format_number(year: int, seq: int) -> str:
+    """Return the invoice number of sequence ``seq`` in ``year``."""
+    return f"{year}-{seq:03d}"
+
+
+_REVENUE_SQL = """
+    SELECT CAST(substr(issued_on, 1, 4) AS INTEGER) AS year,
+           CAST(substr(issued_on, 6, 2) AS INTEGER) AS month,
+           COALESCE(client_id, '') AS client_id, status,
+           COUNT(*) AS count, SUM(amount_cents) AS amount_cents
+    FROM invoices
+    GROUP BY 1, 2, 3, 4
+"""
+
+_SUMMARY_SQL = """
+    SELECT year, month, client_id, status, count, amount_cents
+    FROM invoice_revenue_monthly
+"""
+
+_INSERT_SQL = """
+    INSERT INTO invoices (
+        id, client_id, number, label, amount_cents, status,
+        issued_on, paid_on, pdf_path, template, pdf_hash
+    ) VALUES (?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+
+def _insert_values(invoice: Invoice) -> tuple:
+    return (
+        invoice.id,
+        invoice.client_id,
+        invoice.number,
+        invoice.label,
+        invoice.amount_cents,
+        invoice.status,
+        invoice.issued_on.isoformat(),
+        invoice.paid_on.isoformat() if invoice.paid_on else None,
+        invoice.pdf_path,
+        invoice.template,
+        invoice.pdf_hash,
+    )
+
+
+_COLUMN_VALUES: Dict[str, Callable[[Invoice], Any]] = {
+    "client_id": lambda i: i.client_id,
+    "number": lambda i: i.number,
+    "label": lambda i: i.label,
+    "amount_cents": lambda i: i.amount_cents,
+    "status": lambda i: i.status,
+    "issued_on": lambda i: i.issued_on.isoformat(),
+    "paid_on": lambda i: i.paid_on.isoformat() if i.paid_on else None,
+    "pdf_path": lambda i: i.pdf_path,
+    "template": lambda i: i.template,
+    "pdf_hash": lambda i: i.pdf_hash,
+}
 
 
-__all__ = ["InvoicesRepository"]
+__all__ = ["InvoicesRepository", "format_number"]
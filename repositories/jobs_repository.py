@@ -0,0 +1,125 @@
+"""Repository handling database operations for background jobs."""
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Any, List, Optional
+
+from models.job import JOB_PENDING, JOB_RUNNING, Job
+
+
+class JobsRepository:
+    """Encapsulates persistence of jobs and their checkpoints."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    # ------------------------------------------------------------------
+    def _row_to_job(self, row: sqlite3.Row | None) -> Optional[Job]:
+        if row is None:
+            return None
+        return Job(
+            id=row[0],
+            kind=row[1],
+            params=json.loads(row[2]),
+            status=row[3],
+            cursor=json.loads(row[4]) if row[4] is not None else None,
+            done=row[5],
+            total=row[6],
+            error=row[7],
+            created_at=row[8],
+            updated_at=row[9],
+        )
+
+    # ------------------------------------------------------------------
+    def add(self, job: Job) -> None:
+        """Insert a new job."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO jobs (id, kind, params, status) VALUES (?,?,?,?)",
+                (job.id, job.kind, json.dumps(job.params), job.status),
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self.conn.execute(
+            f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return self._row_to_job(row)
+
+    def list_by_status(self, *statuses: str) -> List[Job]:
+        """Return the jobs in any of ``statuses``, oldest first."""
+        placeholders = ",".join("?" * len(statuses))
+        rows = self.conn.execute(
+            f"""
+            SELECT {_COLUMNS} FROM jobs
+            WHERE status IN ({placeholders})
+            ORDER BY created_at, rowid
+            """,
+            statuses,
+        )
+        return [self._row_to_job(r) for r in rows]
+
+    def start(self, job_id: str) -> bool:
+        """Mark a pending job as running; ``False`` if it is not pending."""
+        with self.conn:
+            cur = self.conn.execute(
+                """
+                UPDATE jobs SET status = 'running', updated_at = strftime('%s','now')
+                WHERE id = ? AND status = 'pending'
+                """,
+                (job_id,),
+            )
+        return cur.rowcount == 1
+
+    def checkpoint(
+        self, job_id: str, cursor: Any, done: int, total: Optional[int]
+    ) -> None:
+        """Store the resume position and progress of a running job."""
+        with self.conn:
+            self.conn.execute(
+                """
+                UPDATE jobs SET cursor = ?, done = ?, total = ?,
+                    updated_at = strftime('%s','now')
+                WHERE id = ?
+                """,
+                (json.dumps(cursor), done, total, job_id),
+            )
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        """Set the final ``status`` of a job."""
+        with self.conn:
+            self.conn.execute(
+                """
+                UPDATE jobs SET status = ?, error = ?, updated_at = strftime('%s','now')
+                WHERE id = ?
+                """,
+                (status, error, job_id),
+            )
+
+    def cancel_pending(self, job_id: str) -> bool:
+        """Cancel a job that has not started; ``False`` otherwise."""
+        with self.conn:
+            cur = self.conn.execute(
+                """
+                UPDATE jobs SET status = 'cancelled', updated_at = strftime('%s','now')
+                WHERE id = ? AND status = 'pending'
+                """,
+                (job_id,),
+            )
+        return cur.rowcount == 1
+
+    def requeue_interrupted(self) -> int:
+        """Return jobs left ``running`` by a crash to ``pending``."""
+        with self.conn:
+            cur = self.conn.execute(
+                "UPDATE jobs SET status = ? WHERE status = ?", (JOB_PENDING, JOB_RUNNING)
+            )
+        return cur.rowcount
+
+
+_COLUMNS = (
+    "id, kind, params, status, cursor, done, total, error, created_at, updated_at"
+)
+
+
+__all__ = ["JobsRepository"]
@@ -0,0 +1,66 @@
+"""Keyset pagination helpers shared by repositories."""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Any, Callable, Generic, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class Page(Generic[T]):
+    """One page of results and the cursor of the next one."""
+
+    items: List[T] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(values: Sequence[object]) -> str:
+    """Return an opaque cursor for the sort key ``values`` of the last row."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str, size: int) -> List[object]:
+    """Decode a cursor produced by :func:`encode_cursor`."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def fetch_page(
+    conn: sqlite3.Connection,
+    sql: str,
+    params: Sequence[Any],
+    limit: int,
+    decode: Callable[[Any], T],
+    key: Sequence[str],
+) -> Page[T]:
+    """Run ``sql``, which ends with ``LIMIT ?``, and return one page of it.
+
+    One row more than ``limit`` is fetched to know whether a next page
+    exists; its cursor encodes the columns named in ``key`` of the last
+    row of the page.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    result = conn.execute(sql, [*params, limit + 1])
+    rows = result.fetchall()
+    items = [decode(r) for r in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        names = [d[0] for d in result.description]
+        last = rows[limit - 1]
+        next_cursor = encode_cursor([last[names.index(column)] for column in key])
+    return Page(items, next_cursor)
+
+
+__all__ = ["Page", "decode_cursor", "encode_cursor", "fetch_page"]
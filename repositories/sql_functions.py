@@ -0,0 +1,36 @@
+"""Python helpers exposed to SQLite as SQL functions."""
+from __future__ import annotations
+
+import re
+import sqlite3
+import unicodedata
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_text(text: str | None) -> str:
+    """Return ``text`` lower-cased with accents stripped.
+
+    Only combining marks are removed, so letters of non-Latin scripts are
+    kept ("Иван" stays "иван").
+    """
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def digits_only(text: str | None) -> str:
+    """Return the digits of ``text`` (e.g. a phone number)."""
+    if not text:
+        return ""
+    return _NON_DIGITS.sub("", text)
+
+
+def register_sql_functions(conn: sqlite3.Connection) -> None:
+    """Register ``normalize()`` and ``digits()`` on ``conn``."""
+    conn.create_function("normalize", 1, normalize_text, deterministic=True)
+    conn.create_function("digits", 1, digits_only, deterministic=True)
+
+
+__all__ = ["digits_only", "normalize_text", "register_sql_functions"]
@@ -0,0 +1,228 @@
+"""Streaming accounting exports of invoices: plain CSV and FEC journal.
+
+Rows are read from the database in chunks and formatted by generators,
+so memory does not depend on the number of invoices exported.  Output is
+written to a path, gzip-compressed when it ends in ``.gz``, or to any
+text stream.
+
+The FEC (*fichier des écritures comptables*) has one sales journal entry
+per invoice: the client account is debited and the revenue account
+credited with the invoice amount.  Invoices are not subject to VAT
+(art. 293B du CGI), so there is no VAT line.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import os
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+from repositories.invoices_repository import InvoicesRepository
+
+CSV_COLUMNS = ["Numéro", "Date", "Client", "Libellé", "Montant", "Statut", "Payée le"]
+FEC_COLUMNS = [
+    "JournalCode",
+    "JournalLib",
+    "EcritureNum",
+    "EcritureDate",
+    "CompteNum",
+    "CompteLib",
+    "CompAuxNum",
+    "CompAuxLib",
+    "PieceRef",
+    "PieceDate",
+    "EcritureLib",
+    "Debit",
+    "Credit",
+    "EcritureLet",
+    "DateLet",
+    "ValidDate",
+    "Montantdevise",
+    "Idevise",
+]
+SALES_JOURNAL = ("VE", "Ventes")
+CLIENT_ACCOUNT = ("411000", "Clients")
+REVENUE_ACCOUNT = ("706000", "Prestations de services")
+FORMATS = {"csv", "fec"}
+
+Target = Union[str, Path, TextIO]
+
+
+@dataclass
+class ExportReport:
+    """Summary of an accounting export."""
+
+    invoices: int
+    lines: int
+    path: Optional[str] = None
+
+
+class AccountingExporter:
+    """Write invoices as CSV or FEC without loading them in memory.
+
+    Parameters
+    ----------
+    repo:
+        Invoices repository to stream rows from.
+    chunk_size:
+        Number of rows fetched from the cursor at a time.
+    """
+
+    def __init__(self, repo: InvoicesRepository, chunk_size: int = 1000) -> None:
+        self.repo = repo
+        self.chunk_size = chunk_size
+
+    def export(
+        self,
+        fmt: str,
+        target: Target,
+        *,
+        issued_between: Optional[Tuple[date, date]] = None,
+        status: Optional[str] = None,
+        compress: Optional[bool] = None,
+    ) -> ExportReport:
+        """Export the matching invoices to ``target`` in format ``fmt``.
+
+        ``fmt`` is ``"csv"`` or ``"fec"``.  A path target is written
+        atomically and gzip-compressed if ``compress`` is set or, by
+        default, if its name ends in ``.gz``.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        rows = self.repo.iter_export_rows(
+            status=status, issued_between=issued_between, chunk_size=self.chunk_size
+        )
+        counter = _Counter(rows)
+        if fmt == "csv":
+            header, lines = CSV_COLUMNS, csv_lines(counter)
+            dialect = {"delimiter": ";"}
+        else:
+            # FEC fields are never quoted; fec_lines strips separators.
+            header, lines = FEC_COLUMNS, fec_lines(counter)
+            dialect = {"delimiter": "|", "quoting": csv.QUOTE_NONE, "quotechar": None}
+
+        def write(stream: TextIO) -> int:
+            writer = csv.writer(stream, lineterminator="\r\n", **dialect)
+            writer.writerow(header)
+            written = 0
+            for line in lines:
+                writer.writerow(line)
+                written += 1
+            return written
+
+        if not isinstance(target, (str, Path)):
+            written = write(target)
+            return ExportReport(counter.count, written)
+        path = Path(target)
+        if compress is None:
+            compress = path.suffix == ".gz"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            if compress:
+                stream = gzip.open(tmp_path, "wt", encoding="utf-8", newline="")
+            else:
+                stream = tmp_path.open("w", encoding="utf-8", newline="")
+            with stream:
+                written = write(stream)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return ExportReport(counter.count, written, str(path.resolve()))
+
+
+class _Counter:
+    """Iterate rows while counting them."""
+
+    def __init__(self, rows: Iterable[tuple]) -> None:
+        self._rows = rows
+        self.count = 0
+
+    def __iter__(self) -> Iterator[tuple]:
+        for row in self._rows:
+            self.count += 1
+            yield row
+
+
+def csv_lines(rows: Iterable[tuple]) -> Iterator[List[str]]:
+    """Format export rows as :data:`CSV_COLUMNS` lines."""
+    for number, issued_on, paid_on, label, cents, status, _, first, last in rows:
+        yield [
+            number,
+            issued_on,
+            _client_name(first, last),
+            label or "",
+            _amount(cents),
+            status,
+            paid_on or "",
+        ]
+
+
+def fec_lines(rows: Iterable[tuple]) -> Iterator[List[str]]:
+    """Format export rows as :data:`FEC_COLUMNS` lines, two per invoice."""
+    journal_code, journal_lib = SALES_JOURNAL
+    zero = _amount(0)
+    for number, issued_on, _, label, cents, _, client_id, first, last in rows:
+        day = issued_on.replace("-", "")
+        piece = _fec_text(number)
+        text = _fec_text(label or f"Facture {number}")
+        amount = _amount(cents)
+        common = [journal_code, journal_lib, piece, day]
+        yield [
+            *common,
+            *CLIENT_ACCOUNT,
+            client_id or "",
+            _fec_text(_client_name(first, last)),
+            piece,
+            day,
+            text,
+            amount,
+            zero,
+            "",
+            "",
+            day,
+            "",
+            "",
+        ]
+        yield [
+            *common,
+            *REVENUE_ACCOUNT,
+            "",
+            "",
+            piece,
+            day,
+            text,
+            zero,
+            amount,
+            "",
+            "",
+            day,
+            "",
+            "",
+        ]
+
+
+def _amount(cents: int) -> str:
+    return f"{cents // 100},{cents % 100:02d}"
+
+
+def _client_name(first: Optional[str], last: Optional[str]) -> str:
+    return f"{first} {last}" if first else ""
+
+
+def _fec_text(value: str) -> str:
+    return " ".join(value.replace("|", " ").split())
+
+
+__all__ = [
+    "AccountingExporter",
+    "CSV_COLUMNS",
+    "ExportReport",
+    "FEC_COLUMNS",
+    "csv_lines",
+    "fec_lines",
+]
@@ -1,14 +1,37 @@
 """Business logic for managing clients."""
 from __future__ import annotations
 
+import csv
+import json
 import uuid
-from datetime import date
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
+from models.changes import changed_fields
 from models.client import Client
+from models.client_billing import ClientBillingSummary
 from repositories.clients_repository import ClientsRepository
+from repositories.pagination import Page
 
 ALLOWED_SEX = {"Homme", "Femme", "Autre"}
+OPTIONAL_FIELDS = ["objective", "injuries", "email", "phone"]
+
+
+@dataclass
+class ImportReport:
+    """Outcome of :meth:`ClientsService.bulk_import`."""
+
+    imported: int = 0
+    rejected: List[Tuple[int, str]] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class InvalidRow:
+    """Placeholder yielded by :func:`read_client_rows` for an unreadable line."""
+
+    error: str
 
 
 class ClientsService:
@@ -23,22 +46,51 @@ class ClientsService:
         self._validate(data)
         if self.repo.get_by_identity(data["first_name"], data["last_name"], data["birthdate"]):
             raise ValueError("A client with this name and birthdate already exists")
-        client = Client(
-            id=str(uuid.uuid4()),
-            first_name=data["first_name"],
-            last_name=data["last_name"],
-            sex=data["sex"],
-            birthdate=data["birthdate"],
-            height_cm=data["height_cm"],
-            weight_kg=data["weight_kg"],
-            objective=data.get("objective"),
-            injuries=data.get("injuries"),
-            email=data.get("email"),
-            phone=data.get("phone"),
-        )
+        client = self._new_client(data)
         self.repo.add(client)
         return client
 
+    def bulk_import(
+        self, rows: Iterable[Mapping[str, object] | InvalidRow]
+    ) -> ImportReport:
+        """Import clients exported from another tool in one transaction.
+
+        ``rows`` are streamed: each one is coerced, validated and checked
+        against the existing identities (loaded once) and the rows already
+        accepted in this import.  Invalid rows and duplicates are reported
+        by their 1-based position instead of aborting the import.
+        """
+
+        report = ImportReport()
+        seen = self.repo.identity_keys()
+
+        def accepted() -> Iterator[Client]:
+            for line, row in enumerate(rows, start=1):
+                if isinstance(row, InvalidRow):
+                    report.rejected.append((line, row.error))
+                    continue
+                try:
+                    data = self._coerce(row)
+                    self._validate(data)
+                except (AttributeError, TypeError, ValueError) as exc:
+                    report.rejected.append((line, str(exc)))
+                    continue
+                key = (
+                    data["first_name"],
+                    data["last_name"],
+                    data["birthdate"].isoformat(),
+                )
+                if key in seen:
+                    report.rejected.append(
+                        (line, "A client with this name and birthdate already exists")
+                    )
+                    continue
+                seen.add(key)
+                yield self._new_client(data)
+
+        report.imported = self.repo.add_many(accepted())
+        return report
+
     def get(self, client_id: str) -> Optional[Client]:
         return self.repo.get(client_id)
 
@@ -72,12 +124,37 @@ class ClientsService:
             phone=merged.get("phone"),
             created_at=existing.created_at,
         )
-        self.repo.update(updated)
+        changed = changed_fields(existing, updated)
+        if changed:
+            self.repo.update(updated, fields=changed)
         return updated
 
     def list_all(self) -> List[Client]:
         return self.repo.list_all()
 
+    def search(
+        self, query: str = "", limit: int = 50, cursor: Optional[str] = None
+    ) -> Page[Client]:
+        """Search clients by name, email or phone prefix, one page at a time."""
+        return self.repo.search(query, limit, cursor)
+
+    def billing_summary(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        *,
+        sort: str = "unpaid",
+        outstanding_only: bool = False,
+    ) -> Page[ClientBillingSummary]:
+        """List clients with invoice count, billed and unpaid totals."""
+        return self.repo.list_with_billing_summary(
+            limit, cursor, sort=sort, outstanding_only=outstanding_only
+        )
+
+    def count(self, query: str = "") -> int:
+        """Return the number of clients matching ``query``."""
+        return self.repo.count(query)
+
     def delete(self, client_id: str) -> None:
         client = self.repo.get(client_id)
         if not client:
@@ -96,10 +173,45 @@ class ClientsService:
             phone=None,
             created_at=client.created_at,
         )
-        self.repo.update(anonymized)
+        self.repo.update(anonymized, fields=changed_fields(client, anonymized))
         self.repo.delete(client_id)
 
     # ------------------------------------------------------------------
+    @staticmethod
+    def _new_client(data: Mapping[str, object]) -> Client:
+        return Client(
+            id=str(uuid.uuid4()),
+            first_name=data["first_name"],
+            last_name=data["last_name"],
+            sex=data["sex"],
+            birthdate=data["birthdate"],
+            height_cm=data["height_cm"],
+            weight_kg=data["weight_kg"],
+            objective=data.get("objective"),
+            injuries=data.get("injuries"),
+            email=data.get("email"),
+            phone=data.get("phone"),
+        )
+
+    @staticmethod
+    def _coerce(row: Mapping[str, object]) -> Dict[str, object]:
+        """Convert a raw CSV/JSON row to the types expected by ``_validate``."""
+        data: Dict[str, object] = {}
+        for key, value in row.items():
+            if isinstance(value, str):
+                value = value.strip() or None
+            data[key] = value
+        birthdate = data.get("birthdate")
+        if isinstance(birthdate, str):
+            data["birthdate"] = _parse_date(birthdate)
+        for key in ("height_cm", "weight_kg"):
+            value = data.get(key)
+            if isinstance(value, str):
+                data[key] = float(value.replace(",", "."))
+        for key in OPTIONAL_FIELDS:
+            data.setdefault(key, None)
+        return data
+
     def _validate(self, data: Dict[str, object]) -> None:
         for field in ["first_name", "last_name", "sex", "birthdate", "height_cm", "weight_kg"]:
             value = data.get(field)
@@ -118,4 +230,32 @@ class ClientsService:
             raise ValueError("weight_kg must be positive")
 
 
-__all__ = ["ClientsService"]
+def _parse_date(value: str) -> date:
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid birthdate: {value}")
+
+
+def read_client_rows(path: Path | str) -> Iterator[Dict[str, object] | InvalidRow]:
+    """Stream rows from a ``.csv`` (header line) or ``.jsonl`` export.
+
+    A JSONL line that cannot be decoded yields an :class:`InvalidRow`,
+    which :meth:`ClientsService.bulk_import` reports as rejected.
+    """
+    path = Path(path)
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        if path.suffix.lower() == ".jsonl":
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as exc:
+                        yield InvalidRow(f"Invalid JSON: {exc}")
+        else:
+            yield from csv.DictReader(f)
+
+
+__all__ = ["ClientsService", "ImportReport", "InvalidRow", "read_client_rows"]
@@ -0,0 +1,215 @@
+"""Scheduled SQLite housekeeping: statistics, WAL checkpoints and vacuuming.
+
+The :class:`MaintenanceScheduler` is driven by :meth:`~MaintenanceScheduler.tick`,
+which must be called periodically from the thread owning the connection (the
+Tk main loop through :meth:`~MaintenanceScheduler.attach`).  Write activity is
+detected through ``Connection.total_changes`` so repositories do not need to
+report anything.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Optional
+
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+@dataclass
+class MaintenanceRun:
+    """A single executed maintenance task."""
+
+    task: str
+    started_at: int
+    duration_ms: float
+    detail: str = ""
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection) -> bool:
+    """Switch the database to ``auto_vacuum=INCREMENTAL``.
+
+    Changing the mode of an existing database only takes effect after a full
+    ``VACUUM``, which is done once here.  Returns ``True`` if the database had
+    to be converted.
+    """
+
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if mode == AUTO_VACUUM_INCREMENTAL:
+        return False
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+class MaintenanceScheduler:
+    """Run SQLite maintenance tasks when the database needs them.
+
+    Parameters
+    ----------
+    conn:
+        Connection to maintain.  It is only used from :meth:`tick`.
+    analyze_after_changes:
+        Number of modified rows after which statistics are refreshed with
+        ``ANALYZE``.
+    idle_seconds:
+        Delay without writes after which the WAL is checkpointed and free
+        pages are reclaimed.
+    vacuum_step_pages:
+        Maximum number of free pages released per ``incremental_vacuum`` step.
+    optimize_interval:
+        Minimum delay in seconds between two ``PRAGMA optimize`` runs.
+    clock:
+        Monotonic time source, overridable for tests.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        *,
+        analyze_after_changes: int = 500,
+        idle_seconds: float = 30.0,
+        vacuum_step_pages: int = 256,
+        optimize_interval: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.conn = conn
+        self.analyze_after_changes = analyze_after_changes
+        self.idle_seconds = idle_seconds
+        self.vacuum_step_pages = vacuum_step_pages
+        self.optimize_interval = optimize_interval
+        self._clock = clock
+        self.history: Deque[MaintenanceRun] = deque(maxlen=100)
+
+        now = clock()
+        self._seen_changes = conn.total_changes
+        self._changes_since_analyze = 0
+        self._changes_since_checkpoint = 0
+        self._last_activity = now
+        self._last_optimize = now
+        self._has_runs_table: Optional[bool] = None
+
+    # ------------------------------------------------------------------
+    def tick(self) -> List[MaintenanceRun]:
+        """Run the tasks that are due and return what was executed."""
+        now = self._clock()
+        self._observe_changes(now)
+        if self.conn.in_transaction:
+            return []
+
+        runs: List[MaintenanceRun] = []
+        if self._changes_since_analyze >= self.analyze_after_changes:
+            runs.append(self._run("analyze", self._analyze))
+            self._changes_since_analyze = 0
+        if now - self._last_optimize >= self.optimize_interval:
+            runs.append(self._run("optimize", self._optimize))
+            self._last_optimize = now
+        idle = now - self._last_activity >= self.idle_seconds
+        if idle and self._free_pages() > 0:
+            runs.append(self._run("incremental_vacuum", self._incremental_vacuum))
+        self._record(runs)
+        if idle and self._changes_since_checkpoint > 0:
+            # Checkpoint last so the runs recorded above are folded in as well.
+            checkpoint = self._run("wal_checkpoint", self._checkpoint)
+            self._record([checkpoint])
+            runs.append(checkpoint)
+            self._changes_since_checkpoint = 0
+        self._seen_changes = self.conn.total_changes
+        return runs
+
+    def run_all(self) -> List[MaintenanceRun]:
+        """Run every task immediately, regardless of thresholds."""
+        self._observe_changes(self._clock())
+        self._changes_since_analyze = self.analyze_after_changes
+        self._changes_since_checkpoint = max(self._changes_since_checkpoint, 1)
+        self._last_activity = self._clock() - self.idle_seconds
+        self._last_optimize = self._clock() - self.optimize_interval
+        return self.tick()
+
+    def on_close(self) -> None:
+        """Let SQLite refresh statistics it considers stale before closing."""
+        if not self.conn.in_transaction:
+            self._optimize()
+
+    def attach(self, widget, interval_ms: int = 10_000) -> None:
+        """Schedule :meth:`tick` on a Tk ``widget`` every ``interval_ms``."""
+
+        def _loop() -> None:
+            self.tick()
+            widget.after(interval_ms, _loop)
+
+        widget.after(interval_ms, _loop)
+
+    # ------------------------------------------------------------------
+    def _observe_changes(self, now: float) -> None:
+        total = self.conn.total_changes
+        delta = total - self._seen_changes
+        if delta > 0:
+            self._changes_since_analyze += delta
+            self._changes_since_checkpoint += delta
+            self._last_activity = now
+        self._seen_changes = total
+
+    def _run(self, task: str, action: Callable[[], str]) -> MaintenanceRun:
+        started_at = int(time.time())
+        start = time.perf_counter()
+        detail = action()
+        duration_ms = (time.perf_counter() - start) * 1000
+        run = MaintenanceRun(task, started_at, duration_ms, detail)
+        self.history.append(run)
+        return run
+
+    def _analyze(self) -> str:
+        # Bound the sampling so ANALYZE stays fast on large tables.
+        self.conn.execute("PRAGMA analysis_limit=1000")
+        self.conn.execute("ANALYZE")
+        return ""
+
+    def _optimize(self) -> str:
+        self.conn.execute("PRAGMA optimize").fetchall()
+        return ""
+
+    def _free_pages(self) -> int:
+        return self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def _incremental_vacuum(self) -> str:
+        before = self._free_pages()
+        # ``execute`` only steps the pragma once (one page); ``executescript``
+        # runs it to completion.
+        self.conn.executescript(
+            f"PRAGMA incremental_vacuum({int(self.vacuum_step_pages)});"
+        )
+        return f"freed={before - self._free_pages()}"
+
+    def _checkpoint(self) -> str:
+        busy, log, done = self.conn.execute(
+            "PRAGMA wal_checkpoint(TRUNCATE)"
+        ).fetchone()
+        return f"busy={busy} log={log} checkpointed={done}"
+
+    def _record(self, runs: List[MaintenanceRun]) -> None:
+        if not runs:
+            return
+        if self._has_runs_table is None:
+            row = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='maintenance_runs'"
+            ).fetchone()
+            self._has_runs_table = row is not None
+        if not self._has_runs_table:
+            return
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO maintenance_runs (task, started_at, duration_ms, detail)
+                VALUES (?,?,?,?)
+                """,
+                [(r.task, r.started_at, r.duration_ms, r.detail) for r in runs],
+            )
+
+
+__all__ = ["MaintenanceRun", "MaintenanceScheduler", "enable_incremental_vacuum"]
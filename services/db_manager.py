@@ -3,26 +3,97 @@ from __future__ import annotations
 
 import sqlite3
 from pathlib import Path
-from typing import Iterator
+from typing import Dict, Iterator, Optional
+
+from repositories.sql_functions import register_sql_functions
+from services.db_maintenance import MaintenanceScheduler, enable_incremental_vacuum
+from services.query_tracer import QueryTracer, TracedConnection
+from services.write_queue import WriteQueue
+
+DEFAULT_DB_PATH = Path("db/app.db")
+MIGRATIONS_PATH = Path("db/migrations")
+
+
+def apply_migrations(
+    conn: sqlite3.Connection, migrations_path: Path = MIGRATIONS_PATH
+) -> int:
+    """Apply pending SQL migrations to ``conn`` and return the schema version.
+
+    The helper SQL functions of :mod:`repositories.sql_functions` are
+    registered first so migrations can use them to backfill columns.
+    """
+    register_sql_functions(conn)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    row = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    current_version = row[0] if row[0] is not None else 0
+
+    for path in _migration_files(migrations_path):
+        version = int(path.stem.split("_", 1)[0])
+        if version > current_version:
+            script = path.read_text(encoding="utf-8")
+            try:
+                conn.execute("BEGIN")
+                conn.executescript(script)
+                conn.execute(
+                    "INSERT INTO schema_migrations (version) VALUES (?)",
+                    (version,),
+                )
+                conn.commit()
+                current_version = version
+            except sqlite3.Error as exc:
+                conn.rollback()
+                raise exc
+    return current_version
+
+
+def _migration_files(migrations_path: Path) -> Iterator[Path]:
+    """Yield migration files ordered by their version prefix."""
+    return iter(sorted(migrations_path.glob("*.sql")))
 
 
 class DBManager:
-    """Singleton service managing SQLite connection and migrations."""
+    """Service managing a SQLite connection and migrations.
+
+    The application database is shared through :meth:`get_instance`;
+    per-tenant databases are opened by
+    :class:`~services.tenant_registry.TenantRegistry`.
+    """
 
     _instance: DBManager | None = None
 
-    def __init__(self) -> None:
-        self.db_path = Path("db/app.db")
-        self.migrations_path = Path("db/migrations")
+    def __init__(
+        self,
+        db_path: Path | str = DEFAULT_DB_PATH,
+        *,
+        trace: bool = False,
+        slow_query_ms: float = 50.0,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.migrations_path = MIGRATIONS_PATH
+        self.tracer: Optional[QueryTracer] = (
+            QueryTracer(slow_ms=slow_query_ms) if trace else None
+        )
         self.conn = self._connect()
         self._apply_migrations()
         self._verify_integrity()
+        self.maintenance = MaintenanceScheduler(self.conn)
+        self._writer: Optional[WriteQueue] = None
 
     @classmethod
-    def get_instance(cls) -> "DBManager":
-        """Return the single :class:`DBManager` instance."""
+    def get_instance(cls, **options) -> "DBManager":
+        """Return the single :class:`DBManager` instance.
+
+        ``options`` are forwarded to the constructor on first call only.
+        """
         if cls._instance is None:
-            cls._instance = cls()
+            cls._instance = cls(**options)
         return cls._instance
 
     def _connect(self) -> sqlite3.Connection:
@@ -50,44 +121,16 @@ class DBManager:
         if need_init and self.db_path.exists():
             self.db_path.unlink()
 
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=TracedConnection)
+        conn.tracer = self.tracer
+        enable_incremental_vacuum(conn)
         conn.execute("PRAGMA journal_mode=WAL;")
         conn.execute("PRAGMA foreign_keys=ON;")
         return conn
 
     def _apply_migrations(self) -> None:
         """Apply pending SQL migrations from ``db/migrations`` directory."""
-        self.conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS schema_migrations (
-                version INTEGER PRIMARY KEY,
-                applied_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-            """
-        )
-        row = self.conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
-        current_version = row[0] if row[0] is not None else 0
-
-        for path in self._migration_files():
-            version = int(path.stem.split("_", 1)[0])
-            if version > current_version:
-                script = path.read_text()
-                try:
-                    self.conn.execute("BEGIN")
-                    self.conn.executescript(script)
-                    self.conn.execute(
-                        "INSERT INTO schema_migrations (version) VALUES (?)",
-                        (version,),
-                    )
-                    self.conn.commit()
-                    current_version = version
-                except sqlite3.Error as exc:
-                    self.conn.rollback()
-                    raise exc
-
-    def _migration_files(self) -> Iterator[Path]:
-        """Yield migration files ordered by their version prefix."""
-        return iter(sorted(self.migrations_path.glob("*.sql")))
+        apply_migrations(self.conn, self.migrations_path)
 
     def _verify_integrity(self) -> None:
         """Run SQLite integrity check to ensure database is valid."""
@@ -99,5 +142,26 @@ class DBManager:
         """Return the active SQLite connection."""
         return self.conn
 
-
-__all__ = ["DBManager"]
+    def writer(self) -> WriteQueue:
+        """Return the group-commit write queue of this database."""
+        if self._writer is None:
+            self._writer = WriteQueue(self.db_path, tracer=self.tracer)
+        return self._writer
+
+    def db_stats(self) -> Dict[str, Dict[str, float]]:
+        """Return per-statement-shape timings (empty when tracing is off)."""
+        if self.tracer is None:
+            return {}
+        return self.tracer.snapshot()
+
+    def close(self) -> None:
+        """Run final maintenance and close the connection."""
+        if self._writer is not None:
+            self._writer.stop()
+        self.maintenance.on_close()
+        if self.tracer is not None:
+            self.tracer.flush(self.conn)
+        self.conn.close()
+
+
+__all__ = ["DBManager", "apply_migrations"]
@@ -6,6 +6,7 @@ import unicodedata
 import uuid
 from typing import Dict, List, Optional
 
+from models.changes import changed_fields
 from models.exercise import Exercise
 from repositories.exercises_repository import ExercisesRepository
 from config.enums import (
@@ -79,7 +80,9 @@ class ExercisesService:
             created_at=existing.created_at,
             updated_at=existing.updated_at,
         )
-        self.repo.update(updated)
+        changed = changed_fields(existing, updated)
+        if changed:
+            self.repo.update(updated, fields=changed)
         return updated
 
     def list_all(self, **filters: Optional[str]) -> List[Exercise]:
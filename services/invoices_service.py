@@ -1,17 +1,71 @@
 """Business logic for managing invoices."""
 from __future__ import annotations
 
+import csv
+import io
+import os
 import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field, replace
 from datetime import date
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
+from models.changes import changed_fields
+from models.client import Client
 from models.invoice import Invoice
 from repositories.invoices_repository import InvoicesRepository
+from repositories.pagination import Page
+from services.accounting_export import (
+    CSV_COLUMNS,
+    AccountingExporter,
+    ExportReport,
+    Target,
+    csv_lines,
+)
+from services.job_queue import JobContext
+from services.pdf_batch import (
+    CacheStats,
+    PdfJob,
+    PdfResult,
+    default_workers,
+    fingerprint,
+    iter_render,
+    render_pool,
+)
 from services.pdf_exporter import PDFExporter
 from repositories.clients_repository import ClientsRepository
 
 ALLOWED_STATUS = {"Payée", "Non payée"}
 ALLOWED_TEMPLATES = {"classic", "modern", "minimalist"}
+STATEMENT_FILTERS = {"client_id", "status", "issued_between"}
+BUNDLE_INDEX = "index.csv"
+BUNDLE_FLUSH_EVERY = 500
+
+
+@dataclass
+class BundleReport:
+    """Summary of a PDF bundle export."""
+
+    invoices: int = 0
+    rendered: int = 0
+    cached: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    path: Optional[str] = None
 
 
 class InvoicesService:
@@ -26,30 +80,22 @@ class InvoicesService:
         self.repo = repo
         self.clients_repo = clients_repo
         self.pdf_exporter = pdf_exporter or PDFExporter()
+        self.output_dir = "exports/invoices"
+        self.pdf_cache = CacheStats()
 
     # ------------------------------------------------------------------
     def create(self, data: Dict[str, object]) -> Invoice:
         """Create a new invoice with automatic numbering."""
         self._validate(data, creating=True)
-        issued_on: date = data.get("issued_on") or date.today()
-        year = issued_on.year
-        last_number = self.repo.get_last_number(year)
-        seq = 1
-        if last_number:
-            seq = int(last_number.split("-")[1]) + 1
-        number = f"{year}-{seq:03d}"
-        invoice = Invoice(
-            id=str(uuid.uuid4()),
-            client_id=data.get("client_id"),
-            number=number,
-            label=data.get("label"),
-            amount_cents=int(data["amount_cents"]),
-            status="Non payée",
-            issued_on=issued_on,
-            template=data.get("template", "classic"),
-        )
-        self.repo.add(invoice)
-        return invoice
+        return self.repo.add_numbered(self._new_invoice(data))
+
+    def create_many(self, rows: Iterable[Dict[str, object]]) -> List[Invoice]:
+        """Validate and create several invoices numbered in one transaction."""
+        invoices = []
+        for data in rows:
+            self._validate(data, creating=True)
+            invoices.append(self._new_invoice(data))
+        return self.repo.add_many(invoices)
 
     def get(self, invoice_id: str) -> Optional[Invoice]:
         return self.repo.get(invoice_id)
@@ -57,6 +103,38 @@ class InvoicesService:
     def list_all(self) -> List[Invoice]:
         return self.repo.list_all()
 
+    def query(
+        self,
+        *,
+        status: Optional[str] = None,
+        client_id: Optional[str] = None,
+        issued_between: Optional[Tuple[date, date]] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Page[Invoice]:
+        """List invoices by status, client and issue period, one page at a time."""
+        if status is not None and status not in ALLOWED_STATUS:
+            raise ValueError("Invalid status")
+        return self.repo.query(
+            status=status,
+            client_id=client_id,
+            issued_between=issued_between,
+            limit=limit,
+            cursor=cursor,
+        )
+
+    def count(
+        self,
+        *,
+        status: Optional[str] = None,
+        client_id: Optional[str] = None,
+        issued_between: Optional[Tuple[date, date]] = None,
+    ) -> int:
+        """Return the number of invoices matching the :meth:`query` filters."""
+        return self.repo.count(
+            status=status, client_id=client_id, issued_between=issued_between
+        )
+
     def update(self, invoice_id: str, data: Dict[str, object]) -> Invoice:
         existing = self.repo.get(invoice_id)
         if not existing:
@@ -82,38 +160,337 @@ class InvoicesService:
             paid_on=paid_on,
             pdf_path=merged.get("pdf_path", existing.pdf_path),
             template=merged.get("template", existing.template),
+            pdf_hash=existing.pdf_hash,
         )
-        self.repo.update(updated)
+        changed = changed_fields(existing, updated)
+        if changed:
+            self.repo.update(updated, fields=changed)
         return updated
 
     def delete(self, invoice_id: str) -> None:
         self.repo.delete(invoice_id)
 
-    def generate_pdf(self, invoice_id: str, branding: Dict[str, str]) -> str:
+    def generate_pdf(
+        self, invoice_id: str, branding: Dict[str, str], force: bool = False
+    ) -> str:
+        """Render an invoice unless its current PDF is up to date.
+
+        The stored ``pdf_hash`` is compared with the fingerprint of the
+        render inputs; ``force`` renders regardless.
+        """
         invoice = self.repo.get(invoice_id)
         if not invoice:
             raise ValueError("Invoice not found")
-        client_name = "client"
+        client = None
         if invoice.client_id and self.clients_repo:
             client = self.clients_repo.get(invoice.client_id)
-            if client:
-                client_name = f"{client.first_name}_{client.last_name}"
+        job = self._pdf_job(invoice, client, branding)
+        digest = fingerprint(job)
+        if not force and self._is_current(invoice, digest):
+            self.pdf_cache.hits += 1
+            return invoice.pdf_path
+        self.pdf_cache.misses += 1
+        path = self.pdf_exporter.generate(
+            job.template_name, job.data, job.output_path, branding
+        )
+        if (path, digest) != (invoice.pdf_path, invoice.pdf_hash):
+            invoice.pdf_path, invoice.pdf_hash = path, digest
+            self.repo.update(invoice, fields=["pdf_path", "pdf_hash"])
+        return path
+
+    def render_pdf(self, invoice_id: str, branding: Dict[str, str]) -> memoryview:
+        """Render an invoice in memory, e.g. for a preview or an attachment.
+
+        Nothing is written to disk and the stored ``pdf_path`` is left
+        untouched.
+        """
+        invoice = self.repo.get(invoice_id)
+        if not invoice:
+            raise ValueError("Invoice not found")
+        client = None
+        if invoice.client_id and self.clients_repo:
+            client = self.clients_repo.get(invoice.client_id)
+        job = self._pdf_job(invoice, client, branding)
+        return self.pdf_exporter.render_bytes(job.template_name, job.data, branding)
+
+    def generate_pdfs(
+        self,
+        invoice_ids: Iterable[str],
+        branding: Dict[str, str],
+        workers: Optional[int] = None,
+        progress: Optional[Callable[[int, int, PdfResult], None]] = None,
+        force: bool = False,
+        pool: Optional[ProcessPoolExecutor] = None,
+    ) -> List[PdfResult]:
+        """Render several invoices on a pool of worker processes.
+
+        Invoices and clients are loaded in bulk and every new ``pdf_path``
+        is stored in one transaction at the end.  ``progress`` receives the
+        number of finished invoices, the total and the result of each
+        invoice as it completes, including the size of its PDF; a failing
+        invoice is reported through its result's ``error`` without stopping
+        the batch.  Invoices whose PDF is up to date are reported as
+        ``cached`` unless ``force`` is set.
+        Renders run on ``pool`` when given, e.g. to share one
+        :func:`~services.pdf_batch.render_pool` between batches.
+        """
+        ids = list(dict.fromkeys(invoice_ids))
+        invoices = self.repo.get_many(ids)
+        clients: Dict[str, Client] = {}
+        if self.clients_repo:
+            clients = self.clients_repo.get_many(
+                {i.client_id for i in invoices.values() if i.client_id}
+            )
+        results: List[PdfResult] = []
+
+        def report(result: PdfResult) -> None:
+            results.append(result)
+            if progress is not None:
+                progress(len(results), len(ids), result)
+
+        jobs: List[PdfJob] = []
+        digests: Dict[str, str] = {}
+        for invoice_id in ids:
+            invoice = invoices.get(invoice_id)
+            if invoice is None:
+                report(PdfResult(invoice_id, error="Invoice not found"))
+                continue
+            job = self._pdf_job(invoice, clients.get(invoice.client_id), branding)
+            digest = fingerprint(job)
+            if not force and self._is_current(invoice, digest):
+                self.pdf_cache.hits += 1
+                size = Path(invoice.pdf_path).stat().st_size
+                report(PdfResult(invoice_id, path=invoice.pdf_path, cached=True, size=size))
+                continue
+            self.pdf_cache.misses += 1
+            digests[invoice_id] = digest
+            jobs.append(job)
+        for result in iter_render(jobs, workers, pool=pool):
+            report(result)
+        self.repo.set_pdf_paths(
+            {
+                r.key: (r.path, digests[r.key])
+                for r in results
+                if r.ok and not r.cached
+            }
+        )
+        return results
+
+    # ------------------------------------------------------------------
+    def render_statement(
+        self,
+        filters: Dict[str, object],
+        branding: Dict[str, str],
+        output_path: Optional[str] = None,
+    ) -> str:
+        """Render every matching invoice into one statement PDF.
+
+        ``filters`` accepts ``client_id``, ``status`` and
+        ``issued_between`` (a pair of dates).  Invoices are streamed from
+        the database and rendered one page each through their own
+        template, followed by a summary of counts and totals per status;
+        memory does not grow with the number of invoices.
+        """
+        unknown = set(filters) - STATEMENT_FILTERS
+        if unknown:
+            raise ValueError(f"Unknown statement filter: {', '.join(sorted(unknown))}")
+        invoices = self.repo.iter_matching(**filters)
+        if output_path is None:
+            period = filters.get("issued_between") or ("all",)
+            parts = [filters.get("client_id") or "all", *map(str, period)]
+            output_path = f"{self.output_dir}/statement_{'_'.join(parts)}.pdf"
+
+        def pages() -> Iterator[Tuple[str, Dict]]:
+            client_of = self._client_lookup()
+            totals: Dict[str, List[int]] = {}
+            for invoice in invoices:
+                client = client_of(invoice)
+                total = totals.setdefault(invoice.status, [0, 0])
+                total[0] += 1
+                total[1] += invoice.amount_cents
+                job = self._pdf_job(invoice, client, branding)
+                yield job.template_name, job.data
+            yield "statements.summary", _statement_summary(filters, totals)
+
+        return self.pdf_exporter.generate_many(
+            pages(), output_path, branding, document_title="Relevé de factures"
+        )
+
+    def export_pdf_bundle(
+        self,
+        issued_between: Tuple[date, date],
+        target: Union[str, Path, BinaryIO],
+        branding: Dict[str, str],
+        workers: Optional[int] = None,
+    ) -> BundleReport:
+        """Write the PDFs of a period into a ZIP archive with an index CSV.
+
+        Missing or outdated PDFs are rendered on worker processes and
+        every PDF is copied from its file into the archive in issue order,
+        so memory does not grow with the number of invoices.  The index is
+        written last, from a streamed query; invoices whose render failed
+        have an empty file column.  ``target`` is a path, written
+        atomically, or a writable binary stream.
+        """
+        report = BundleReport()
+
+        def write(zf: zipfile.ZipFile) -> None:
+            self._bundle_pdfs(zf, issued_between, branding, workers, report)
+            with zf.open(BUNDLE_INDEX, "w") as raw, io.TextIOWrapper(
+                raw, encoding="utf-8", newline=""
+            ) as text:
+                writer = csv.writer(text, delimiter=";", lineterminator="\r\n")
+                writer.writerow([*CSV_COLUMNS, "Fichier"])
+                rows = self.repo.iter_export_rows(issued_between=issued_between)
+                for line in csv_lines(rows):
+                    failed = line[0] in report.errors
+                    writer.writerow([*line, "" if failed else f"{line[0]}.pdf"])
+
+        if isinstance(target, (str, Path)):
+            path = Path(target)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            try:
+                with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as zf:
+                    write(zf)
+                os.replace(tmp_path, path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+            report.path = str(path.resolve())
+        else:
+            with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zf:
+                write(zf)
+        return report
+
+    def _bundle_pdfs(
+        self,
+        zf: zipfile.ZipFile,
+        issued_between: Tuple[date, date],
+        branding: Dict[str, str],
+        workers: Optional[int],
+        report: BundleReport,
+    ) -> None:
+        client_of = self._client_lookup()
+        # Invoices in issue order, with the digest of those being rendered;
+        # cached invoices only wait here behind a pending render.
+        entries: Deque[Tuple[Invoice, Optional[str]]] = deque()
+        outputs: Dict[str, Tuple[str, Optional[str]]] = {}
+
+        def jobs() -> Iterator[PdfJob]:
+            for invoice in self.repo.iter_matching(issued_between=issued_between):
+                job = self._pdf_job(invoice, client_of(invoice), branding)
+                digest = fingerprint(job)
+                if self._is_current(invoice, digest):
+                    self.pdf_cache.hits += 1
+                    if entries:
+                        entries.append((invoice, None))
+                    else:
+                        add(invoice, invoice.pdf_path)
+                        report.cached += 1
+                    continue
+                self.pdf_cache.misses += 1
+                entries.append((invoice, digest))
+                yield job
+
+        def add(invoice: Invoice, path: str) -> None:
+            # PDFs are compressed already; store them as they are.
+            zf.write(path, f"{invoice.number}.pdf", compress_type=zipfile.ZIP_STORED)
+            report.invoices += 1
+
+        for result in iter_render(jobs(), workers, ordered=True):
+            while entries[0][1] is None:
+                invoice, _ = entries.popleft()
+                add(invoice, invoice.pdf_path)
+                report.cached += 1
+            invoice, digest = entries.popleft()
+            if not result.ok:
+                report.errors[invoice.number] = result.error
+                continue
+            add(invoice, result.path)
+            report.rendered += 1
+            outputs[invoice.id] = (result.path, digest)
+            if len(outputs) >= BUNDLE_FLUSH_EVERY:
+                self.repo.set_pdf_paths(outputs)
+                outputs.clear()
+        for invoice, _ in entries:
+            add(invoice, invoice.pdf_path)
+            report.cached += 1
+        self.repo.set_pdf_paths(outputs)
+
+    def _client_lookup(self) -> Callable[[Invoice], Optional[Client]]:
+        """Return a function fetching an invoice's client, each client once."""
+        clients: Dict[str, Optional[Client]] = {}
+
+        def client_of(invoice: Invoice) -> Optional[Client]:
+            if not invoice.client_id or not self.clients_repo:
+                return None
+            if invoice.client_id not in clients:
+                clients[invoice.client_id] = self.clients_repo.get(invoice.client_id)
+            return clients[invoice.client_id]
+
+        return client_of
+
+    def export_accounting(
+        self,
+        target: Target,
+        fmt: str = "csv",
+        *,
+        issued_between: Optional[Tuple[date, date]] = None,
+        status: Optional[str] = None,
+    ) -> ExportReport:
+        """Stream the invoices of a period to a CSV or FEC file or stream."""
+        if status is not None and status not in ALLOWED_STATUS:
+            raise ValueError("Invalid status")
+        return AccountingExporter(self.repo).export(
+            fmt, target, issued_between=issued_between, status=status
+        )
+
+    def _pdf_job(
+        self, invoice: Invoice, client: Optional[Client], branding: Dict[str, str]
+    ) -> PdfJob:
+        client_name = "client"
+        if client:
+            client_name = f"{client.first_name}_{client.last_name}"
         output_name = f"invoice_{invoice.number}_{client_name}.pdf"
-        output_path = f"exports/invoices/{output_name}"
         data = {
             "document_title": f"Facture {invoice.number}",
-            "invoice": invoice,
+            # Output fields are not render inputs; keep them out of the hash.
+            "invoice": replace(invoice, pdf_path=None, pdf_hash=None),
             "client_name": client_name.replace("_", " "),
             "mentions": "TVA non applicable, art. 293B du CGI",
         }
-        path = self.pdf_exporter.generate(
-            f"invoices.{invoice.template}", data, output_path, branding
+        return PdfJob(
+            key=invoice.id,
+            template_name=f"invoices.{invoice.template}",
+            data=data,
+            output_path=f"{self.output_dir}/{output_name}",
+            branding=branding,
+            font_path=self.pdf_exporter.font_path,
+            profile=self.pdf_exporter.profile.name,
+        )
+
+    @staticmethod
+    def _is_current(invoice: Invoice, digest: str) -> bool:
+        return (
+            invoice.pdf_hash == digest
+            and bool(invoice.pdf_path)
+            and Path(invoice.pdf_path).exists()
+        )
+
+    @staticmethod
+    def _new_invoice(data: Dict[str, object]) -> Invoice:
+        """Build an unsaved invoice; its number is allocated on insert."""
+        return Invoice(
+            id=str(uuid.uuid4()),
+            client_id=data.get("client_id"),
+            number="",
+            label=data.get("label"),
+            amount_cents=int(data["amount_cents"]),
+            status="Non payée",
+            issued_on=data.get("issued_on") or date.today(),
+            template=data.get("template", "classic"),
         )
-        invoice.pdf_path = path
-        self.repo.update(invoice)
-        return path
 
-    # ------------------------------------------------------------------
     def _validate(
         self,
         data: Dict[str, object],
@@ -136,4 +513,49 @@ class InvoicesService:
             raise ValueError("Invalid template")
 
 
-__all__ = ["InvoicesService"]
+PDF_JOB_KIND = "invoice_pdfs"
+PDF_JOB_CHUNK = 50
+
+
+def run_pdf_job(ctx: JobContext) -> None:
+    """Job handler rendering the PDFs of ``params["invoice_ids"]``.
+
+    Other parameters are ``branding`` and, optionally, ``workers``,
+    ``output_dir``, ``font_path`` and ``profile``.  Invoices are rendered
+    in chunks of :data:`PDF_JOB_CHUNK`, all on one worker pool, with a
+    checkpoint after each chunk; the cursor is the number of invoices
+    done.
+    """
+    params = ctx.params
+    service = InvoicesService(
+        InvoicesRepository(ctx.conn),
+        ClientsRepository(ctx.conn),
+        PDFExporter(params.get("font_path"), profile=params.get("profile", "standard")),
+    )
+    if params.get("output_dir"):
+        service.output_dir = params["output_dir"]
+    ids = params["invoice_ids"]
+    workers = params.get("workers") or default_workers()
+    with ExitStack() as stack:
+        pool = stack.enter_context(render_pool(workers)) if workers > 1 else None
+        for start in range(ctx.cursor or 0, len(ids), PDF_JOB_CHUNK):
+            chunk = ids[start : start + PDF_JOB_CHUNK]
+            service.generate_pdfs(chunk, params["branding"], workers=workers, pool=pool)
+            ctx.checkpoint(start + len(chunk), done=start + len(chunk), total=len(ids))
+
+
+def _statement_summary(filters: Dict[str, object], totals: Dict[str, List[int]]) -> Dict:
+    period = filters.get("issued_between")
+    table = [["Statut", "Factures", "Montant"]]
+    for status, (count, cents) in sorted(totals.items()):
+        table.append([status, count, f"{cents / 100:.2f} €"])
+    count = sum(t[0] for t in totals.values())
+    cents = sum(t[1] for t in totals.values())
+    table.append(["Total", count, f"{cents / 100:.2f} €"])
+    return {
+        "period": f"Du {period[0].isoformat()} au {period[1].isoformat()}" if period else "",
+        "table": table,
+    }
+
+
+__all__ = ["BundleReport", "InvoicesService", "PDF_JOB_KIND", "run_pdf_job"]
@@ -0,0 +1,329 @@
+"""Persistent background jobs executed off the Tk thread.
+
+Jobs are rows of the ``jobs`` table run by a pool of worker threads, each
+job on its own connection.  The handler registered for a job kind
+receives a :class:`JobContext`; it works in steps and calls
+:meth:`JobContext.checkpoint` after each one, which stores the resume
+cursor and the progress, publishes the progress and stops the job once it
+is cancelled.  After a crash, :meth:`JobQueue.resume` re-queues the
+interrupted jobs and their handlers restart from ``ctx.cursor`` instead
+of from zero.
+
+Progress callbacks run on worker threads.  Tk is not thread safe, so
+:class:`AfterBridge` queues them and runs them on the main loop with
+``after``.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import closing
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from models.job import (
+    JOB_CANCELLED,
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_PENDING,
+    Job,
+    JobProgress,
+)
+from repositories.jobs_repository import JobsRepository
+
+ProgressCallback = Callable[[JobProgress], None]
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised by :meth:`JobContext.checkpoint` when the job was cancelled."""
+
+
+class JobContext:
+    """What a running handler sees of its job.
+
+    Parameters
+    ----------
+    job:
+        The job being run; ``job.cursor`` is its last checkpoint.
+    conn:
+        Connection owned by the job's worker thread.
+    cancelled:
+        Event set when the job is cancelled.
+    notify:
+        Receives the progress of every checkpoint.
+    """
+
+    def __init__(
+        self,
+        job: Job,
+        conn: sqlite3.Connection,
+        cancelled: threading.Event,
+        notify: ProgressCallback,
+    ) -> None:
+        self.job = job
+        self.conn = conn
+        self._cancelled = cancelled
+        self._notify = notify
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return self.job.params
+
+    @property
+    def cursor(self) -> Any:
+        """Return the last checkpointed cursor, ``None`` on a first run."""
+        return self.job.cursor
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def checkpoint(self, cursor: Any, done: int, total: Optional[int] = None) -> None:
+        """Persist ``cursor`` and the progress, then stop if cancelled.
+
+        ``cursor`` must be JSON serializable and describe everything done
+        so far: a resumed run starts from it.  The final checkpoint, with
+        ``done == total``, never stops the job: its work is complete.
+        """
+        self.job.cursor, self.job.done, self.job.total = cursor, done, total
+        JobsRepository(self.conn).checkpoint(self.job.id, cursor, done, total)
+        self._notify(_progress(self.job))
+        if self.cancelled and (total is None or done < total):
+            raise JobCancelled(self.job.id)
+
+
+class JobQueue:
+    """Run persisted jobs on worker threads.
+
+    Parameters
+    ----------
+    db_path:
+        Database holding the ``jobs`` table.
+    workers:
+        Number of jobs running at the same time.
+    notify:
+        Called with a :class:`JobProgress` on every state change and
+        checkpoint, from the worker threads.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str,
+        *,
+        workers: int = 2,
+        notify: Optional[ProgressCallback] = None,
+    ) -> None:
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+        self.db_path = Path(db_path)
+        self.workers = workers
+        self.notify = notify
+        self._handlers: Dict[str, Callable[[JobContext], None]] = {}
+        self._futures: Dict[str, Future] = {}
+        self._events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+
+    # ------------------------------------------------------------------
+    def register(self, kind: str, handler: Callable[[JobContext], None]) -> None:
+        """Run jobs of ``kind`` with ``handler``."""
+        self._handlers[kind] = handler
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Persist a new job and queue it; return its id."""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(id=str(uuid.uuid4()), kind=kind, params=params or {})
+        with self._connection() as conn:
+            JobsRepository(conn).add(job)
+        self._publish(job)
+        self._schedule(job.id)
+        return job.id
+
+    def resume(self) -> List[str]:
+        """Queue the pending and interrupted jobs; call once at startup.
+
+        Jobs left ``running`` by a crash are restarted from their last
+        checkpoint.  Returns the ids of the queued jobs.
+        """
+        with self._connection() as conn:
+            repo = JobsRepository(conn)
+            repo.requeue_interrupted()
+            jobs = repo.list_by_status(JOB_PENDING)
+        queued = []
+        for job in jobs:
+            if job.id not in self._futures:
+                self._publish(job)
+                self._schedule(job.id)
+                queued.append(job.id)
+        return queued
+
+    def cancel(self, job_id: str) -> None:
+        """Cancel a job: at once if it has not started, else at its next checkpoint."""
+        with self._lock:
+            event = self._events.get(job_id)
+        if event is not None:
+            event.set()
+        with self._connection() as conn:
+            repo = JobsRepository(conn)
+            if repo.cancel_pending(job_id):
+                self._publish(repo.get(job_id))
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Job]:
+        """Block until a job queued by this instance ends and return it."""
+        future = self._futures.get(job_id)
+        if future is not None:
+            try:
+                future.result(timeout)
+            except CancelledError:
+                pass  # dropped by shutdown before it started; still pending
+        with self._connection() as conn:
+            return JobsRepository(conn).get(job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Cancel every job and stop the workers.
+
+        Running jobs stop at their next checkpoint and stay ``running`` in
+        the table, so the next :meth:`resume` continues them.
+        """
+        with self._lock:
+            self._stopping = True
+            for event in self._events.values():
+                event.set()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    # ------------------------------------------------------------------
+    def _schedule(self, job_id: str) -> None:
+        with self._lock:
+            self._events[job_id] = threading.Event()
+            future = self._futures[job_id] = self._pool.submit(self._run, job_id)
+        # Outside the lock: the callback runs at once if the job already ended.
+        future.add_done_callback(lambda f: self._forget(job_id, f))
+
+    def _forget(self, job_id: str, future: Future) -> None:
+        with self._lock:
+            if self._futures.get(job_id) is future:
+                del self._futures[job_id]
+            if future.cancelled():
+                self._events.pop(job_id, None)
+
+    def _run(self, job_id: str) -> None:
+        conn = self._connect()
+        try:
+            repo = JobsRepository(conn)
+            if not repo.start(job_id):
+                return
+            job = repo.get(job_id)
+            self._publish(job)
+            status, error = JOB_DONE, None
+            try:
+                handler = self._handlers.get(job.kind)
+                if handler is None:
+                    raise ValueError(f"Unknown job kind: {job.kind}")
+                handler(JobContext(job, conn, self._events[job_id], self._emit))
+            except JobCancelled:
+                if self._stopping:
+                    # Interrupted by shutdown: leave it running to resume it.
+                    return
+                status = JOB_CANCELLED
+            except Exception as exc:
+                logger.exception("Job %s (%s) failed", job_id, job.kind)
+                status, error = JOB_FAILED, str(exc) or type(exc).__name__
+            repo.finish(job_id, status, error)
+            self._publish(replace(job, status=status, error=error))
+        finally:
+            conn.close()
+            with self._lock:
+                self._events.pop(job_id, None)
+
+    def _publish(self, job: Optional[Job]) -> None:
+        if job is not None:
+            self._emit(_progress(job))
+
+    def _emit(self, progress: JobProgress) -> None:
+        if self.notify is not None:
+            self.notify(progress)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.execute("PRAGMA foreign_keys=ON;")
+        return conn
+
+    def _connection(self) -> closing:
+        return closing(self._connect())
+
+
+def _progress(job: Job) -> JobProgress:
+    return JobProgress(job.id, job.kind, job.status, job.done, job.total, job.error)
+
+
+class AfterBridge:
+    """Run callbacks posted from any thread on the Tk main loop.
+
+    Worker threads call :meth:`post` (or a function returned by
+    :meth:`wrap`); the callbacks are queued and run by :meth:`drain`,
+    which :meth:`attach` schedules on a Tk widget with ``after``.
+    """
+
+    def __init__(self) -> None:
+        self._queue: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+
+    def post(self, callback: Callable[..., None], *args: Any) -> None:
+        """Queue ``callback(*args)`` for the main loop; callable from any thread."""
+        self._queue.put((callback, args))
+
+    def wrap(self, callback: Callable[..., None]) -> Callable[..., None]:
+        """Return a thread-safe function posting its calls to ``callback``."""
+        return lambda *args: self.post(callback, *args)
+
+    def drain(self) -> int:
+        """Run the queued callbacks on the calling thread; return their number."""
+        count = 0
+        while True:
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                return count
+            callback(*args)
+            count += 1
+
+    def attach(self, widget, interval_ms: int = 100) -> None:
+        """Drain the queue on a Tk ``widget`` every ``interval_ms``."""
+
+        def _loop() -> None:
+            self.drain()
+            widget.after(interval_ms, _loop)
+
+        widget.after(interval_ms, _loop)
+
+
+def publish_to_store(store) -> ProgressCallback:
+    """Return a callback recording job progress in ``store`` state ``jobs``.
+
+    It must run on the thread owning the store; wrap it with
+    :meth:`AfterBridge.wrap` when handing it to a :class:`JobQueue`.
+    """
+
+    def publish(progress: JobProgress) -> None:
+        state = store.get_state()
+        store.set_state(replace(state, jobs={**state.jobs, progress.job_id: progress}))
+
+    return publish
+
+
+__all__ = [
+    "AfterBridge",
+    "JobCancelled",
+    "JobContext",
+    "JobQueue",
+    "publish_to_store",
+]
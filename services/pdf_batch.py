@@ -0,0 +1,235 @@
+"""Render batches of PDF documents on a pool of worker processes.
+
+ReportLab rendering is CPU bound and holds the GIL, so threads do not
+help; jobs are plain picklable payloads rendered by :func:`render_job` in
+worker processes, each keeping one :class:`PDFExporter` for its lifetime.
+
+:func:`fingerprint` digests everything a job's output depends on, so
+callers can skip jobs whose previous output is still current.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, is_dataclass
+from datetime import date
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from services import pdf_exporter
+from services.pdf_exporter import DEFAULT_FONT_PATH, PDFExporter
+from services.template_registry import default_registry
+
+
+@dataclass(frozen=True)
+class PdfJob:
+    """Everything needed to render one document, sent to a worker.
+
+    Without ``output_path`` the document is rendered in memory and its
+    bytes are returned in :attr:`PdfResult.content`.  ``profile`` names
+    one of :data:`~services.pdf_exporter.PROFILES`.
+    """
+
+    key: str
+    template_name: str
+    data: Dict
+    output_path: Optional[str]
+    branding: Dict[str, str]
+    font_path: Optional[str] = None
+    profile: str = "standard"
+
+
+@dataclass(frozen=True)
+class PdfResult:
+    """Outcome of a :class:`PdfJob`: the written path or bytes, or an error message.
+
+    ``size`` is the size of the document in bytes.
+    """
+
+    key: str
+    path: Optional[str] = None
+    error: Optional[str] = None
+    cached: bool = False
+    content: Optional[bytes] = None
+    size: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class CacheStats:
+    """Counts of renders skipped because their output was current."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def fingerprint(job: PdfJob) -> str:
+    """Return a digest of every input determining the output of ``job``.
+
+    It covers the template name and data, the branding, the profile, and
+    the contents of the template module, the exporter module, the font and
+    the logo.  The output path is not part of it.
+    """
+    payload = json.dumps(
+        [job.template_name, job.data, job.branding, job.profile],
+        sort_keys=True,
+        default=_jsonable,
+    )
+    digest = hashlib.sha256(payload.encode("utf-8"))
+    spec = importlib.util.find_spec(f"templates.{job.template_name}")
+    for path in (
+        spec.origin if spec else None,
+        pdf_exporter.__file__,
+        job.font_path or DEFAULT_FONT_PATH,
+        job.branding.get("logo_path"),
+    ):
+        digest.update(_file_digest(path).encode("ascii"))
+    return digest.hexdigest()
+
+
+def _jsonable(value: object) -> object:
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Cannot fingerprint {type(value).__name__}")
+
+
+_file_digests: Dict[Tuple[str, int, int], str] = {}
+
+
+def _file_digest(path: Optional[str]) -> str:
+    """Return the SHA-256 of a file, cached on its size and mtime."""
+    if not path:
+        return "-"
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "missing"
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    digest = _file_digests.get(key)
+    if digest is None:
+        digest = _file_digests[key] = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    return digest
+
+
+_exporters: Dict[Tuple[Optional[str], str], PDFExporter] = {}
+
+
+def render_job(job: PdfJob) -> PdfResult:
+    """Render ``job`` and return its result; errors are returned, not raised."""
+    try:
+        key = (job.font_path, job.profile)
+        exporter = _exporters.get(key)
+        if exporter is None:
+            exporter = _exporters[key] = PDFExporter(job.font_path, profile=job.profile)
+        if job.output_path is None:
+            # bytes, not a memoryview: the result may be pickled back from a worker
+            content = exporter.render_bytes(job.template_name, job.data, job.branding)
+            return PdfResult(job.key, content=bytes(content), size=len(content))
+        path = exporter.generate(job.template_name, job.data, job.output_path, job.branding)
+        return PdfResult(job.key, path=path, size=os.path.getsize(path))
+    except Exception as exc:
+        return PdfResult(job.key, error=str(exc) or type(exc).__name__)
+
+
+def default_workers() -> int:
+    """Return the number of worker processes used when none is given."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def render_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Return a pool of ``workers`` processes for :func:`iter_render`.
+
+    Workers preload every template when they start.  Pass the pool to
+    several :func:`iter_render` calls to pay that start-up once.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers or default_workers(), initializer=_init_worker
+    )
+
+
+def iter_render(
+    jobs: Iterable[PdfJob],
+    workers: Optional[int] = None,
+    ordered: bool = False,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> Iterator[PdfResult]:
+    """Render ``jobs`` and yield results as they complete.
+
+    At most twice ``workers`` jobs are in flight, so a long generator of
+    jobs is not materialized.  With ``ordered`` results are yielded in job
+    order instead, for a single sequential consumer.  Jobs run on ``pool``
+    when given, which is left open, else on a pool of their own; with
+    ``workers=1`` and no pool rendering happens in the calling process.
+    """
+    workers = workers or default_workers()
+    if pool is not None:
+        yield from _render_on(pool, iter(jobs), workers, ordered)
+        return
+    if workers == 1:
+        for job in jobs:
+            yield render_job(job)
+        return
+    with render_pool(workers) as own:
+        yield from _render_on(own, iter(jobs), workers, ordered)
+
+
+def _render_on(
+    pool: ProcessPoolExecutor, source: Iterator[PdfJob], workers: int, ordered: bool
+) -> Iterator[PdfResult]:
+    if ordered:
+        queue: Deque[Future] = deque()
+        while True:
+            for job in _take(source, 2 * workers - len(queue)):
+                queue.append(pool.submit(render_job, job))
+            if not queue:
+                return
+            yield queue.popleft().result()
+    pending: Set[Future] = set()
+    while True:
+        for job in _take(source, 2 * workers - len(pending)):
+            pending.add(pool.submit(render_job, job))
+        if not pending:
+            return
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+
+def _init_worker() -> None:
+    """Import and validate every template before the first job arrives."""
+    default_registry.preload()
+
+
+def _take(source: Iterator[PdfJob], count: int) -> Iterator[PdfJob]:
+    for _ in range(count):
+        job = next(source, None)
+        if job is None:
+            return
+        yield job
+
+
+__all__ = [
+    "CacheStats",
+    "PdfJob",
+    "PdfResult",
+    "default_workers",
+    "fingerprint",
+    "iter_render",
+    "render_job",
+    "render_pool",
+]
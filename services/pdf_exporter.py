@@ -1,24 +1,78 @@
 """Generic PDF export service using ReportLab.
 
 This module exposes the :class:`PDFExporter` which loads template
-functions dynamically and produces branded PDF documents.  Templates are
-simple Python callables located under the :mod:`templates` package with
-signature ``render(canvas, data, branding)``.
+functions through a :class:`~services.template_registry.TemplateRegistry`
+and produces branded PDF documents.  Templates are simple Python
+callables located under the :mod:`templates` package with signature
+``render(canvas, data, branding)``.
+
+Output settings come from a :class:`PdfProfile`.  The ``"compact"``
+profile downsamples the logo to the resolution it is printed at and
+writes binary streams instead of ASCII85-encoded ones; fonts are always
+embedded as subsets and pages always compressed.
 """
 
 from __future__ import annotations
 
+import io
+import math
+import os
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
-from importlib import import_module
 from pathlib import Path
-from typing import Callable, Dict, Iterable, List, Optional
-
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from reportlab import rl_config
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape, portrait
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 
+from services.template_registry import TemplateRegistry, default_registry, register_font
+
+
+DEFAULT_FONT_PATH = str(Path("assets/fonts/Roboto-Regular.ttf"))
+LOGO_BOX = (60, 30)  # points
+
+
+@dataclass(frozen=True)
+class PdfProfile:
+    """Output settings of the exported documents.
+
+    Parameters
+    ----------
+    name:
+        Name of the profile in :data:`PROFILES`.
+    logo_dpi:
+        Resolution the logo is downsampled to for its box; ``None``
+        embeds the file as is.
+    ascii85:
+        Wrap binary streams in ASCII85, ReportLab's default.  It keeps
+        the file 7-bit clean at the cost of a quarter more bytes.
+    """
+
+    name: str
+    logo_dpi: Optional[int] = None
+    ascii85: bool = True
+
+
+PROFILES: Dict[str, PdfProfile] = {
+    "standard": PdfProfile("standard"),
+    "compact": PdfProfile("compact", logo_dpi=150, ascii85=False),
+}
+
 
 class PDFExportError(Exception):
     """Raised when the PDF generation process fails."""
@@ -52,46 +106,75 @@ class Branding:
 
 
 class BrandedCanvas(canvas.Canvas):
-    """Canvas subclass that draws header and footer on each page."""
+    """Canvas subclass that draws header and footer on each page.
+
+    The static part of the header and footer (logo or name, title and
+    footer text) is compiled once into a form XObject that every page
+    references, so the logo is embedded once per document.
+    """
+
+    _BRANDING_FORM = "branding"
 
     def __init__(
         self,
-        filename: str,
+        filename: Union[str, BinaryIO],
         branding: Branding,
         document_title: str,
         pagesize: Iterable[float],
         font_name: str,
+        logo_dpi: Optional[int] = None,
         **kwargs,
     ) -> None:
+        kwargs.setdefault("pageCompression", 1)
         super().__init__(filename, pagesize=pagesize, **kwargs)
         self._branding = branding
+        self._logo_dpi = logo_dpi
         self._document_title = document_title
         self._pagesize = pagesize
         self._font_name = font_name
+        self._primary = colors.HexColor(branding.primary_color)
+        self._forms: Set[str] = set()
+        # Recorded only; every page paints it in _draw_header_footer.
+        self._record_form(self._BRANDING_FORM, BrandedCanvas._draw_branding)
 
     # ------------------------------------------------------------------
     # Drawing helpers
     # ------------------------------------------------------------------
-    def _draw_header_footer(self) -> None:
+    def draw_static(self, name: str, draw: Callable[["BrandedCanvas"], None]) -> None:
+        """Draw content that is identical on every page it appears on.
+
+        ``draw`` is called once per document to record the form ``name``;
+        later calls only reference it.
+        """
+        self._record_form(name, draw)
+        self.doForm(name)
+
+    def _record_form(self, name: str, draw: Callable[["BrandedCanvas"], None]) -> None:
+        """Record ``draw`` as the form ``name`` unless it already exists."""
+        if name not in self._forms:
+            self.beginForm(name)
+            draw(self)
+            self.endForm()
+            self._forms.add(name)
+
+    def _draw_branding(self) -> None:
         width, height = self._pagesize
         margin = 40
 
-        primary = colors.HexColor(self._branding.primary_color)
-        accent = colors.HexColor(self._branding.accent_color)
-
         # Header background line
-        self.setStrokeColor(accent)
-        self.setFillColor(primary)
+        self.setStrokeColor(colors.HexColor(self._branding.accent_color))
+        self.setFillColor(self._primary)
 
         # Logo or coach name on the left
-        if self._branding.logo_path and Path(self._branding.logo_path).exists():
+        logo = _logo_reader(self._branding.logo_path, self._logo_dpi)
+        if logo is not None:
             try:
                 self.drawImage(
-                    self._branding.logo_path,
+                    logo,
                     margin,
-                    height - margin - 30,
-                    width=60,
-                    height=30,
+                    height - margin - LOGO_BOX[1],
+                    width=LOGO_BOX[0],
+                    height=LOGO_BOX[1],
                     preserveAspectRatio=True,
                     mask="auto",
                 )
@@ -106,43 +189,131 @@ class BrandedCanvas(canvas.Canvas):
         self.setFont(self._font_name, 16)
         self.drawCentredString(width / 2, height - margin - 20, self._document_title)
 
-        # Footer: page number and software branding
+        # Footer software branding
+        self.setFont(self._font_name, 10)
+        self.drawString(margin, margin / 2, "Fiche personnalisée – Virtus Training")
+
+    def _draw_header_footer(self) -> None:
+        width, _ = self._pagesize
+        margin = 40
+        self.doForm(self._BRANDING_FORM)
+        self.setFillColor(self._primary)
         self.setFont(self._font_name, 10)
-        footer_y = margin / 2
-        self.drawRightString(width - margin, footer_y, f"Page {self.getPageNumber()}")
-        self.drawString(margin, footer_y, "Fiche personnalisée – Virtus Training")
+        self.drawRightString(width - margin, margin / 2, f"Page {self.getPageNumber()}")
 
     # ------------------------------------------------------------------
     # Canvas overrides
     # ------------------------------------------------------------------
     def showPage(self) -> None:  # noqa: D401 - inherit docstring
+        # Canvas.save ends the pending page through here too, so the last
+        # page gets its header and footer exactly once.
         self._draw_header_footer()
         super().showPage()
 
-    def save(self) -> None:  # noqa: D401 - inherit docstring
-        self._draw_header_footer()
-        super().save()
+
+_logos: Dict[Tuple[str, int, int, Optional[int]], Optional[ImageReader]] = {}
+
+
+def _logo_reader(path: Optional[str], dpi: Optional[int] = None) -> Optional[ImageReader]:
+    """Return the decoded logo at ``path``, cached on its size and mtime.
+
+    With ``dpi`` the logo is first downsampled to that resolution for
+    :data:`LOGO_BOX` and re-encoded.
+    """
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (str(path), stat.st_mtime_ns, stat.st_size, dpi)
+    if key not in _logos:
+        try:
+            reader = ImageReader(_downsample(path, dpi) if dpi else path)
+            reader.getRGBData()  # decode now so every document reuses it
+        except Exception:
+            reader = None
+        _logos[key] = reader
+    return _logos[key]
+
+
+def _downsample(path: str, dpi: int) -> io.BytesIO:
+    """Return the image at ``path`` scaled to fit :data:`LOGO_BOX` at ``dpi``.
+
+    Opaque images are re-encoded as JPEG, which ReportLab embeds without
+    decoding; images with transparency stay PNG.
+    """
+    from PIL import Image
+
+    box = [math.ceil(side * dpi / 72) for side in LOGO_BOX]
+    with Image.open(path) as image:
+        image.thumbnail(box, Image.LANCZOS)
+        transparent = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        buffer = io.BytesIO()
+        if transparent:
+            image.convert("RGBA").save(buffer, "PNG", optimize=True)
+        else:
+            image.convert("RGB").save(buffer, "JPEG", quality=85, optimize=True)
+    buffer.seek(0)
+    return buffer
+
+
+# ReportLab reads ASCII85 from its global configuration while a document
+# is built, so renders with different profiles must not overlap.
+_rl_lock = threading.Lock()
+
+
+@contextmanager
+def _profile_settings(profile: PdfProfile) -> Iterator[None]:
+    with _rl_lock:
+        previous = rl_config.useA85
+        rl_config.useA85 = int(profile.ascii85)
+        try:
+            yield
+        finally:
+            rl_config.useA85 = previous
 
 
 class PDFExporter:
-    """Service responsible for generating branded PDF documents."""
+    """Service responsible for generating branded PDF documents.
+
+    Every render holds a process-wide lock while it applies its profile's
+    ReportLab settings, which are global.  Renders on threads of one
+    process, such as :class:`~services.job_queue.JobQueue` workers
+    rendering in-process, therefore run one at a time; use
+    :func:`~services.pdf_batch.iter_render` with several workers to render
+    in parallel.
+    """
 
-    def __init__(self, font_path: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        font_path: Optional[str] = None,
+        registry: Optional[TemplateRegistry] = None,
+        profile: Union[str, PdfProfile] = "standard",
+    ) -> None:
         """Initialise the exporter and register the Roboto font.
 
         Parameters
         ----------
         font_path:
             Optional path to a TrueType font to register.  Defaults to the
-            bundled Roboto font.
+            bundled Roboto font.  Fonts are registered once per process and
+            Helvetica is used when the file is missing.
+        registry:
+            Template registry to load render functions from.  Defaults to
+            the process-wide registry.
+        profile:
+            Output profile or name of one of :data:`PROFILES`.
         """
 
-        font_path = font_path or str(Path("assets/fonts/Roboto-Regular.ttf"))
-        if Path(font_path).exists():
-            pdfmetrics.registerFont(TTFont("Roboto", font_path))
-            self._font_name = "Roboto"
-        else:  # Fallback to a standard font if Roboto is missing
-            self._font_name = "Helvetica"
+        if isinstance(profile, str):
+            if profile not in PROFILES:
+                raise ValueError(f"Unknown PDF profile: {profile}")
+            profile = PROFILES[profile]
+        self.font_path = font_path or DEFAULT_FONT_PATH
+        self._font_name = register_font(self.font_path)
+        self.registry = registry or default_registry
+        self.profile = profile
 
     # ------------------------------------------------------------------
     def generate(
@@ -177,39 +348,143 @@ class PDFExporter:
             If the template cannot be loaded or rendering fails.
         """
 
-        try:
-            render_func = self._load_template(template_name)
+        return self._write_atomic(
+            output_path, lambda target: self._render(template_name, data, target, branding)
+        )
+
+    def generate_many(
+        self,
+        pages: Iterable[Tuple[str, Dict]],
+        output_path: str,
+        branding: Dict[str, str],
+        document_title: str = "Document",
+    ) -> str:
+        """Render several templates as consecutive pages of a single PDF.
+
+        ``pages`` yields ``(template_name, data)`` pairs and is consumed
+        lazily, one page at a time, so a generator keeps memory bounded
+        however long the document.  Fonts, the logo and the branding are
+        embedded once and shared by every page.
+
+        Returns
+        -------
+        str
+            Absolute path to the generated PDF file.
+
+        Raises
+        ------
+        PDFExportError
+            If a template cannot be loaded or rendering fails.
+        """
+
+        def render(target: str) -> None:
             branding_obj = Branding.from_dict(branding)
+            with _profile_settings(self.profile):
+                canvas_obj = self._canvas(target, branding_obj, document_title, portrait(A4))
+                for index, (template_name, data) in enumerate(pages):
+                    if index:
+                        canvas_obj.showPage()
+                    self._load_template(template_name)(canvas_obj, data, branding_obj)
+                canvas_obj.save()
+
+        return self._write_atomic(output_path, render)
+
+    def render_to(
+        self,
+        template_name: str,
+        data: Optional[Dict],
+        stream: BinaryIO,
+        branding: Dict[str, str],
+    ) -> None:
+        """Render a PDF into the writable binary ``stream``.
+
+        Arguments are those of :meth:`generate`; nothing is written to
+        disk unless ``stream`` is a file.
 
+        Raises
+        ------
+        PDFExportError
+            If the template cannot be loaded or rendering fails.
+        """
+
+        try:
+            self._render(template_name, data, stream, branding)
+        except Exception as exc:  # pragma: no cover - rewrap exceptions
+            raise PDFExportError(str(exc)) from exc
+
+    def render_bytes(
+        self,
+        template_name: str,
+        data: Optional[Dict],
+        branding: Dict[str, str],
+    ) -> memoryview:
+        """Render a PDF in memory and return a read-only view of its bytes.
+
+        The view shares the rendering buffer, so no copy is made; use
+        ``bytes(view)`` when an owned copy is needed.
+        """
+
+        buffer = io.BytesIO()
+        self.render_to(template_name, data, buffer, branding)
+        return buffer.getbuffer().toreadonly()
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _write_atomic(output_path: str, render: Callable[[str], None]) -> str:
+        try:
             output_file = Path(output_path)
             output_file.parent.mkdir(parents=True, exist_ok=True)
+            # Render next to the destination and rename, so readers never
+            # see a partially written file.
+            tmp_file = output_file.with_name(f".{output_file.name}.{os.getpid()}.tmp")
+            try:
+                render(str(tmp_file))
+                os.replace(tmp_file, output_file)
+            finally:
+                tmp_file.unlink(missing_ok=True)
+            return str(output_file.resolve())
+        except Exception as exc:  # pragma: no cover - rewrap exceptions
+            raise PDFExportError(str(exc)) from exc
 
-            pagesize = landscape(A4) if self._needs_landscape(data) else portrait(A4)
-            document_title = (data or {}).get("document_title", "Document")
+    def _render(
+        self,
+        template_name: str,
+        data: Optional[Dict],
+        target: Union[str, BinaryIO],
+        branding: Dict[str, str],
+    ) -> None:
+        render_func = self._load_template(template_name)
+        branding_obj = Branding.from_dict(branding)
 
-            canvas_obj = BrandedCanvas(
-                str(output_file),
-                branding=branding_obj,
-                document_title=document_title,
-                pagesize=pagesize,
-                font_name=self._font_name,
-            )
+        pagesize = landscape(A4) if self._needs_landscape(data) else portrait(A4)
+        document_title = (data or {}).get("document_title", "Document")
 
+        with _profile_settings(self.profile):
+            canvas_obj = self._canvas(target, branding_obj, document_title, pagesize)
             if not data or not any(self._non_empty(v) for v in data.values()):
                 width, height = pagesize
                 canvas_obj.setFont(self._font_name, 14)
-                canvas_obj.drawCentredString(
-                    width / 2, height / 2, "Aucune donnée à afficher"
-                )
+                canvas_obj.drawCentredString(width / 2, height / 2, "Aucune donnée à afficher")
             else:
                 render_func(canvas_obj, data, branding_obj)
-
             canvas_obj.save()
-            return str(output_file.resolve())
-        except Exception as exc:  # pragma: no cover - rewrap exceptions
-            raise PDFExportError(str(exc)) from exc
 
-    # ------------------------------------------------------------------
+    def _canvas(
+        self,
+        target: Union[str, BinaryIO],
+        branding: Branding,
+        document_title: str,
+        pagesize: Tuple[float, float],
+    ) -> BrandedCanvas:
+        return BrandedCanvas(
+            target,
+            branding=branding,
+            document_title=document_title,
+            pagesize=pagesize,
+            font_name=self._font_name,
+            logo_dpi=self.profile.logo_dpi,
+        )
+
     @staticmethod
     def _non_empty(value: object) -> bool:
         if value is None:
@@ -218,13 +493,10 @@ class PDFExporter:
             return bool(value)
         return True
 
-    @staticmethod
-    def _load_template(template_name: str) -> Callable[[canvas.Canvas, Dict, Branding], None]:
-        module = import_module(f"templates.{template_name}")
-        render_func = getattr(module, "render", None)
-        if not callable(render_func):
-            raise PDFExportError(f"Template '{template_name}' lacks a render function")
-        return render_func
+    def _load_template(
+        self, template_name: str
+    ) -> Callable[[canvas.Canvas, Dict, Branding], None]:
+        return self.registry.get(template_name)
 
     @staticmethod
     def _needs_landscape(data: Optional[Dict]) -> bool:
@@ -244,4 +516,4 @@ class PDFExporter:
         return False
 
 
-__all__ = ["PDFExporter", "PDFExportError"]
+__all__ = ["PDFExporter", "PDFExportError", "PdfProfile", "PROFILES"]
@@ -0,0 +1,215 @@
+"""Statement timing and slow-query logging for SQLite connections.
+
+Connections created with ``factory=TracedConnection`` report every
+``execute``/``executemany`` call to their :class:`QueryTracer`.  Statements
+are aggregated per *shape* (whitespace collapsed, literals and ``IN``
+placeholder lists folded) so that dynamic SQL such as ``IN (?,?,?)``
+filters lands in a single bucket.  Statements slower than the threshold get their
+``EXPLAIN QUERY PLAN`` captured and are written to ``app_logs`` in batches.
+
+Only the time spent in ``execute`` is measured, which covers planning and
+stepping to the first row; fetching the remaining rows is not included.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w?])\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_EXPLAINABLE = {"SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH"}
+
+
+def normalize_sql(sql: str) -> str:
+    """Return the shape of ``sql`` used to aggregate statistics."""
+    shape = _STRING.sub("'?'", sql)
+    shape = _NUMBER.sub("N", shape)
+    shape = _IN_LIST.sub("IN (?,...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+@dataclass
+class _ShapeStats:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    slow: int = 0
+    samples: Deque[float] = field(default_factory=deque)
+
+
+@dataclass
+class SlowQuery:
+    """Slow statement waiting to be persisted."""
+
+    shape: str
+    duration_ms: float
+    plan: List[str]
+
+    def message(self) -> str:
+        plan = " / ".join(self.plan) if self.plan else "n/a"
+        return f"slow query {self.duration_ms:.1f} ms: {self.shape} | plan: {plan}"
+
+
+class QueryTracer:
+    """Aggregate statement timings and persist slow queries.
+
+    Parameters
+    ----------
+    slow_ms:
+        Statements at or above this duration are considered slow.
+    sample_size:
+        Number of recent durations kept per shape to compute percentiles.
+    batch_size:
+        Number of slow queries buffered before they are written to
+        ``app_logs``.
+    """
+
+    def __init__(
+        self, *, slow_ms: float = 50.0, sample_size: int = 512, batch_size: int = 20
+    ) -> None:
+        self.slow_ms = slow_ms
+        self.sample_size = sample_size
+        self.batch_size = batch_size
+        self._stats: Dict[str, _ShapeStats] = {}
+        self._pending: List[SlowQuery] = []
+        self._lock = threading.Lock()
+        self._has_logs_table: Dict[int, bool] = {}
+
+    # ------------------------------------------------------------------
+    def record(
+        self,
+        conn: sqlite3.Connection,
+        sql: str,
+        params: Any,
+        duration_ms: float,
+    ) -> None:
+        """Account for one executed statement."""
+        shape = normalize_sql(sql)
+        slow = duration_ms >= self.slow_ms
+        with self._lock:
+            stats = self._stats.get(shape)
+            if stats is None:
+                stats = self._stats[shape] = _ShapeStats(
+                    samples=deque(maxlen=self.sample_size)
+                )
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.samples.append(duration_ms)
+            if slow:
+                stats.slow += 1
+        if slow:
+            plan = self._explain(conn, sql, params)
+            with self._lock:
+                self._pending.append(SlowQuery(shape, duration_ms, plan))
+                full = len(self._pending) >= self.batch_size
+            if full:
+                self.flush(conn)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Return per-shape statistics, slowest total time first."""
+        with self._lock:
+            items = [(shape, s, sorted(s.samples)) for shape, s in self._stats.items()]
+        result: Dict[str, Dict[str, float]] = {}
+        for shape, stats, samples in sorted(items, key=lambda i: -i[1].total_ms):
+            result[shape] = {
+                "count": stats.count,
+                "total_ms": stats.total_ms,
+                "p50_ms": _percentile(samples, 0.50),
+                "p99_ms": _percentile(samples, 0.99),
+                "max_ms": stats.max_ms,
+                "slow": stats.slow,
+            }
+        return result
+
+    def reset(self) -> None:
+        """Drop collected statistics (pending slow queries are kept)."""
+        with self._lock:
+            self._stats.clear()
+
+    def flush(self, conn: sqlite3.Connection) -> int:
+        """Write buffered slow queries to ``app_logs``.
+
+        Nothing is written while ``conn`` has an open transaction, so the
+        logs never end up in (or commit) a caller's transaction.  Returns the
+        number of persisted rows.
+        """
+
+        if conn.in_transaction or not self._logs_table_exists(conn):
+            return 0
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        with conn:
+            sqlite3.Connection.executemany(
+                conn,
+                "INSERT INTO app_logs (level, message) VALUES ('WARNING', ?)",
+                [(q.message(),) for q in pending],
+            )
+        return len(pending)
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _explain(conn: sqlite3.Connection, sql: str, params: Any) -> List[str]:
+        words = sql.split(None, 1)
+        if params is None or not words or words[0].upper() not in _EXPLAINABLE:
+            return []
+        try:
+            rows = sqlite3.Connection.execute(
+                conn, f"EXPLAIN QUERY PLAN {sql}", params
+            ).fetchall()
+        except sqlite3.Error:
+            return []
+        return [row[3] for row in rows]
+
+    def _logs_table_exists(self, conn: sqlite3.Connection) -> bool:
+        key = id(conn)
+        if key not in self._has_logs_table:
+            row = sqlite3.Connection.execute(
+                conn,
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='app_logs'",
+            ).fetchone()
+            self._has_logs_table[key] = row is not None
+        return self._has_logs_table[key]
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection reporting statement timings to :attr:`tracer` when set."""
+
+    tracer: Optional[QueryTracer] = None
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:  # type: ignore[override]
+        if self.tracer is None:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        cursor = super().execute(sql, parameters)
+        self.tracer.record(self, sql, parameters, (time.perf_counter() - start) * 1000)
+        return cursor
+
+    def executemany(self, sql: str, seq_of_parameters: Any, /) -> sqlite3.Cursor:  # type: ignore[override]
+        if self.tracer is None:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        cursor = super().executemany(sql, seq_of_parameters)
+        self.tracer.record(self, sql, None, (time.perf_counter() - start) * 1000)
+        return cursor
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, round(q * (len(samples) - 1))))
+    return samples[index]
+
+
+__all__ = ["QueryTracer", "SlowQuery", "TracedConnection", "normalize_sql"]
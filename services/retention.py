@@ -0,0 +1,158 @@
+"""Retention policy purging clients inactive beyond a horizon.
+
+The purge runs on its own connection, usually on a background thread
+started with :meth:`RetentionJob.start`.  Candidates are selected once and
+then removed in chunks, each chunk in its own short transaction: the
+writer lock is released between chunks so the UI keeps writing while tens
+of thousands of historical clients are purged.
+
+Deleted clients are not overwritten first.  The connection enables
+``secure_delete`` so freed pages are zeroed, and the WAL is truncated at
+the end so no copy of the purged rows survives in the journal.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+from repositories.clients_repository import ClientsRepository
+
+DEFAULT_HORIZON_DAYS = 3 * 365
+
+ProgressCallback = Callable[[int, int], None]
+
+
+@dataclass
+class RetentionReport:
+    """Outcome of a retention run."""
+
+    cutoff: date
+    candidates: int = 0
+    purged: int = 0
+    invoices_detached: int = 0
+    chunks: int = 0
+    duration_ms: float = 0.0
+    cancelled: bool = False
+
+
+class RetentionJob:
+    """Purge clients without activity for ``horizon_days``.
+
+    Parameters
+    ----------
+    db_path:
+        Database file to purge.
+    horizon_days:
+        Inactivity period after which a client is purged.
+    chunk_size:
+        Number of clients removed per transaction.
+    today:
+        Callable returning the current date, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str,
+        *,
+        horizon_days: int = DEFAULT_HORIZON_DAYS,
+        chunk_size: int = 500,
+        today: Callable[[], date] = date.today,
+    ) -> None:
+        if horizon_days <= 0:
+            raise ValueError("horizon_days must be positive")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self.db_path = Path(db_path)
+        self.horizon_days = horizon_days
+        self.chunk_size = chunk_size
+        self.today = today
+        self._cancel = threading.Event()
+
+    def cutoff(self) -> date:
+        """Return the date before which activity no longer counts."""
+        return self.today() - timedelta(days=self.horizon_days)
+
+    def cancel(self) -> None:
+        """Stop a running purge after its current chunk."""
+        self._cancel.set()
+
+    def start(self, progress: Optional[ProgressCallback] = None) -> Future:
+        """Run the purge on a daemon thread; the future yields the report.
+
+        ``progress`` is called from that thread; Tk callers should hand the
+        values over to the UI thread with ``after``.
+        """
+        future: Future = Future()
+
+        def worker() -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(self.run(progress))
+            except Exception as exc:
+                future.set_exception(exc)
+
+        threading.Thread(target=worker, name="retention", daemon=True).start()
+        return future
+
+    def run(self, progress: Optional[ProgressCallback] = None) -> RetentionReport:
+        """Purge inactive clients and return a report.
+
+        ``progress`` receives the number of processed candidates and the
+        total after each chunk.
+        """
+        self._cancel.clear()
+        started = time.perf_counter()
+        report = RetentionReport(cutoff=self.cutoff())
+        conn = self._connect()
+        try:
+            repo = ClientsRepository(conn)
+            ids = repo.inactive_ids(report.cutoff)
+            report.candidates = len(ids)
+            for start in range(0, len(ids), self.chunk_size):
+                if self._cancel.is_set():
+                    report.cancelled = True
+                    break
+                chunk = ids[start : start + self.chunk_size]
+                deleted, detached = repo.purge_inactive(chunk, report.cutoff)
+                report.purged += deleted
+                report.invoices_detached += detached
+                report.chunks += 1
+                if progress is not None:
+                    progress(start + len(chunk), len(ids))
+            report.duration_ms = (time.perf_counter() - started) * 1000
+            self._log(conn, report)
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+        return report
+
+    # ------------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.execute("PRAGMA foreign_keys=ON;")
+        conn.execute("PRAGMA secure_delete=ON;")
+        return conn
+
+    @staticmethod
+    def _log(conn: sqlite3.Connection, report: RetentionReport) -> None:
+        message = (
+            f"Retention purge before {report.cutoff.isoformat()}: "
+            f"{report.purged}/{report.candidates} clients removed, "
+            f"{report.invoices_detached} invoices detached"
+            + (" (cancelled)" if report.cancelled else "")
+        )
+        with conn:
+            conn.execute(
+                "INSERT INTO app_logs (level, message) VALUES ('INFO', ?)", (message,)
+            )
+
+
+__all__ = ["DEFAULT_HORIZON_DAYS", "RetentionJob", "RetentionReport"]
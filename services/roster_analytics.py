@@ -0,0 +1,129 @@
+"""Roster dashboards computed with NumPy over client columns.
+
+Only the columns the metrics need are read, in one query ordered by
+client, and loaded into arrays; no :class:`~models.client.Client` is
+built.  Results are cached until the clients table changes, as tracked
+by the ``table_versions`` counter maintained by triggers.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from repositories.clients_repository import ClientsRepository
+
+AGE_EDGES = [18, 25, 35, 45, 55, 65]
+AGE_LABELS = ["< 18", "18-24", "25-34", "35-44", "45-54", "55-64", "65+"]
+BMI_EDGES = [18.5, 25.0, 30.0]
+BMI_LABELS = ["Insuffisance pondérale", "Normal", "Surpoids", "Obésité"]
+NO_OBJECTIVE = "Non renseigné"
+
+
+@dataclass(frozen=True)
+class RosterStats:
+    """Aggregates displayed on the roster dashboard."""
+
+    total: int
+    age_mean: float
+    age_median: float
+    bmi_mean: float
+    age_bands: Dict[str, int]
+    bmi_bands: Dict[str, int]
+    by_sex: Dict[str, int]
+    by_objective: Dict[str, int]
+
+
+def compute_stats(
+    rows: Sequence[Tuple[str, float, float]],
+    breakdown: Sequence[Tuple[str, str, int]],
+    today: date,
+) -> RosterStats:
+    """Compute :class:`RosterStats` from the roster rows.
+
+    ``rows`` and ``breakdown`` are the results of
+    :meth:`ClientsRepository.roster_rows` and
+    :meth:`ClientsRepository.breakdown_counts`.
+    """
+    count = len(rows)
+    by_sex: Dict[str, int] = {}
+    by_objective: Dict[str, int] = {}
+    for sex, objective, n in breakdown:
+        by_sex[sex] = by_sex.get(sex, 0) + n
+        key = objective or NO_OBJECTIVE
+        by_objective[key] = by_objective.get(key, 0) + n
+    if not count:
+        return RosterStats(
+            total=0,
+            age_mean=0.0,
+            age_median=0.0,
+            bmi_mean=0.0,
+            age_bands=dict.fromkeys(AGE_LABELS, 0),
+            bmi_bands=dict.fromkeys(BMI_LABELS, 0),
+            by_sex={},
+            by_objective={},
+        )
+    ages = _ages([r[0] for r in rows], today)
+    height_m = np.fromiter((r[1] for r in rows), dtype=np.float64, count=count) / 100
+    weight = np.fromiter((r[2] for r in rows), dtype=np.float64, count=count)
+    bmi = weight / (height_m * height_m)
+    return RosterStats(
+        total=count,
+        age_mean=float(ages.mean()),
+        age_median=float(np.median(ages)),
+        bmi_mean=float(bmi.mean()),
+        age_bands=_bands(ages, AGE_EDGES, AGE_LABELS),
+        bmi_bands=_bands(bmi, BMI_EDGES, BMI_LABELS),
+        by_sex=_by_count(by_sex),
+        by_objective=_by_count(by_objective),
+    )
+
+
+def _ages(births: List[str], today: date) -> np.ndarray:
+    """Return ages in whole years from ``YYYY-MM-DD`` dates."""
+    dates = np.array(births, dtype=np.str_)
+    if dates.dtype.itemsize != 10 * 4 or (np.char.str_len(dates) != 10).any():
+        raise ValueError("Birthdates must be ISO dates")
+    raw = np.frombuffer(dates.astype("S10").tobytes(), dtype=np.uint8)
+    digits = raw.reshape(len(births), 10)[:, _DATE_DIGITS].astype(np.int64) - ord("0")
+    # YYYYMMDD integers: the difference divided by 10000 is the exact age.
+    born = digits @ _DATE_WEIGHTS
+    return (today.year * 10000 + today.month * 100 + today.day - born) // 10000
+
+
+_DATE_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9]
+_DATE_WEIGHTS = 10 ** np.arange(7, -1, -1, dtype=np.int64)
+
+
+def _bands(values: np.ndarray, edges: List[float], labels: List[str]) -> Dict[str, int]:
+    counts = np.bincount(np.digitize(values, edges), minlength=len(labels))
+    return dict(zip(labels, counts.tolist()))
+
+
+def _by_count(counts: Dict[str, int]) -> Dict[str, int]:
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+
+class RosterAnalytics:
+    """Cache roster statistics until the clients table changes."""
+
+    def __init__(self, repo: ClientsRepository) -> None:
+        self.repo = repo
+        self._cache: Optional[Tuple[Tuple[int, date], RosterStats]] = None
+
+    def stats(self, today: Optional[date] = None) -> RosterStats:
+        """Return the roster statistics as of ``today``."""
+        today = today or date.today()
+        key = (self.repo.version(), today)
+        if self._cache is None or self._cache[0] != key:
+            stats = compute_stats(
+                self.repo.roster_rows(), self.repo.breakdown_counts(), today
+            )
+            self._cache = (key, stats)
+        return self._cache[1]
+
+
+__all__ = ["RosterAnalytics", "RosterStats", "compute_stats"]
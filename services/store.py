@@ -2,7 +2,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field, replace
-from typing import Callable, Generic, List, TypeVar
+from typing import Callable, Dict, Generic, List, TypeVar
+
+from models.job import JobProgress
 
 T = TypeVar("T")
 
@@ -33,6 +35,7 @@ class AppState:
 
     route: str = "home"
     exercises: ExercisesState = field(default_factory=ExercisesState)
+    jobs: Dict[str, JobProgress] = field(default_factory=dict)
 
 
 class Store(Generic[T]):
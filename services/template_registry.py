@@ -0,0 +1,151 @@
+"""Process-wide registry of PDF fonts and template render functions.
+
+Parsing a TrueType font and importing a template module are fixed costs
+that do not depend on the document, so they are paid once per process:
+:func:`register_font` registers each font file once and
+:class:`TemplateRegistry` keeps the ``render`` callables of the
+:mod:`templates` package, validated when they are loaded.
+
+In development, a registry created with ``auto_reload=True`` (the default
+registry when ``VIRTUS_DEV=1``) reloads a template whose source file
+changed since it was loaded.
+"""
+
+from __future__ import annotations
+
+import importlib
+import inspect
+import os
+import pkgutil
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Dict, List, Optional
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+RenderFunc = Callable[..., None]
+FALLBACK_FONT = "Helvetica"
+
+
+class TemplateError(Exception):
+    """Raised when a template cannot be found or has an invalid ``render``."""
+
+
+_fonts: Dict[str, str] = {}
+_fonts_lock = threading.Lock()
+
+
+def register_font(font_path: Optional[str], name: Optional[str] = None) -> str:
+    """Register a TrueType font once per process and return its name.
+
+    The font is named ``name`` or after its file.  A missing file returns
+    the built-in :data:`FALLBACK_FONT`.
+    """
+    if not font_path or not Path(font_path).exists():
+        return FALLBACK_FONT
+    key = str(Path(font_path).resolve())
+    with _fonts_lock:
+        if key not in _fonts:
+            font_name = name or Path(font_path).stem
+            pdfmetrics.registerFont(TTFont(font_name, font_path))
+            _fonts[key] = font_name
+        return _fonts[key]
+
+
+@dataclass
+class _Entry:
+    module: ModuleType
+    render: RenderFunc
+    mtime_ns: int
+
+
+class TemplateRegistry:
+    """Load, validate and cache ``render(canvas, data, branding)`` callables.
+
+    Parameters
+    ----------
+    package:
+        Package containing the template modules.
+    auto_reload:
+        Reload a template whose source changed since it was loaded.
+    """
+
+    def __init__(self, package: str = "templates", *, auto_reload: bool = False) -> None:
+        self.package = package
+        self.auto_reload = auto_reload
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> RenderFunc:
+        """Return the render function of template ``name`` (e.g. ``"invoices.classic"``)."""
+        entry = self._entries.get(name)
+        if entry is None or (self.auto_reload and _mtime_ns(entry.module) != entry.mtime_ns):
+            with self._lock:
+                entry = self._load(name, reload=entry is not None)
+        return entry.render
+
+    def preload(self) -> List[str]:
+        """Load every template module of the package and return their names."""
+        root = importlib.import_module(self.package)
+        names = [
+            info.name[len(self.package) + 1 :]
+            for info in pkgutil.walk_packages(root.__path__, f"{self.package}.")
+            if not info.ispkg
+        ]
+        for name in names:
+            self.get(name)
+        return sorted(names)
+
+    def names(self) -> List[str]:
+        """Return the names of the loaded templates."""
+        return sorted(self._entries)
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Forget one template, or all of them, so the next use reloads it."""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    # ------------------------------------------------------------------
+    def _load(self, name: str, reload: bool) -> _Entry:
+        try:
+            module = importlib.import_module(f"{self.package}.{name}")
+            if reload:
+                module = importlib.reload(module)
+        except ImportError as exc:
+            raise TemplateError(f"Template '{name}' not found") from exc
+        render = getattr(module, "render", None)
+        if not callable(render):
+            raise TemplateError(f"Template '{name}' lacks a render function")
+        try:
+            inspect.signature(render).bind(None, None, None)
+        except TypeError as exc:
+            raise TemplateError(
+                f"Template '{name}' render must accept (canvas, data, branding)"
+            ) from exc
+        entry = _Entry(module, render, _mtime_ns(module))
+        self._entries[name] = entry
+        return entry
+
+
+def _mtime_ns(module: ModuleType) -> int:
+    try:
+        return os.stat(module.__file__).st_mtime_ns
+    except (OSError, TypeError):
+        return 0
+
+
+default_registry = TemplateRegistry(auto_reload=os.environ.get("VIRTUS_DEV") == "1")
+
+
+__all__ = [
+    "TemplateError",
+    "TemplateRegistry",
+    "default_registry",
+    "register_font",
+]
@@ -0,0 +1,145 @@
+"""Registry of per-tenant SQLite databases.
+
+Each coach or studio gets its own database file under ``base_dir``.  Files
+are opened (and migrated) on first use and kept in a bounded LRU cache;
+the least recently used tenant is closed when the cache is full.  Tenants
+in use through :meth:`TenantRegistry.session` are pinned and never
+evicted.
+
+Like :class:`~services.db_manager.DBManager`, the registry must be used
+from the thread that opened the connections.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from services.db_manager import DBManager
+
+TENANT_ID = re.compile(r"[A-Za-z0-9][A-Za-z0-9_-]{0,63}")
+
+
+class TenantRegistry:
+    """Open tenant databases on demand with an LRU bound.
+
+    Parameters
+    ----------
+    base_dir:
+        Directory holding one ``<tenant_id>.db`` file per tenant.
+    max_open:
+        Maximum number of unpinned databases kept open.
+    db_options:
+        Extra keyword arguments forwarded to :class:`DBManager`.
+    """
+
+    def __init__(
+        self,
+        base_dir: Path | str = Path("db/tenants"),
+        *,
+        max_open: int = 8,
+        **db_options,
+    ) -> None:
+        if max_open < 1:
+            raise ValueError("max_open must be at least 1")
+        self.base_dir = Path(base_dir)
+        self.max_open = max_open
+        self._db_options = db_options
+        self._open: "OrderedDict[str, DBManager]" = OrderedDict()
+        self._pins: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    def get(self, tenant_id: str) -> DBManager:
+        """Return the manager of ``tenant_id``, opening it if needed."""
+        path = self.path_for(tenant_id)
+        with self._lock:
+            manager = self._open.get(tenant_id)
+            if manager is not None:
+                self._open.move_to_end(tenant_id)
+                return manager
+            manager = DBManager(path, **self._db_options)
+            self._open[tenant_id] = manager
+            self._evict()
+            return manager
+
+    def connection(self, tenant_id: str) -> sqlite3.Connection:
+        """Return the connection of ``tenant_id``.
+
+        The connection may be closed by a later eviction; hold it through
+        :meth:`session` when it outlives the current call.
+        """
+
+        return self.get(tenant_id).get_connection()
+
+    @contextmanager
+    def session(self, tenant_id: str) -> Iterator[sqlite3.Connection]:
+        """Pin ``tenant_id`` while the block runs and yield its connection."""
+        with self._lock:
+            conn = self.connection(tenant_id)
+            self._pins[tenant_id] = self._pins.get(tenant_id, 0) + 1
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                self._pins[tenant_id] -= 1
+                if not self._pins[tenant_id]:
+                    del self._pins[tenant_id]
+                self._evict()
+
+    def close(self, tenant_id: str) -> None:
+        """Close ``tenant_id`` if it is open and not pinned."""
+        with self._lock:
+            if tenant_id in self._pins:
+                raise ValueError(f"Tenant '{tenant_id}' is in use")
+            manager = self._open.pop(tenant_id, None)
+        if manager is not None:
+            manager.close()
+
+    def close_all(self) -> None:
+        """Close every open tenant database."""
+        with self._lock:
+            managers = list(self._open.values())
+            self._open.clear()
+            self._pins.clear()
+        for manager in managers:
+            manager.close()
+
+    def open_tenants(self) -> List[str]:
+        """Return open tenants, least recently used first."""
+        with self._lock:
+            return list(self._open)
+
+    def tick_maintenance(self) -> None:
+        """Run due maintenance tasks on every open tenant."""
+        with self._lock:
+            managers = list(self._open.values())
+        for manager in managers:
+            manager.maintenance.tick()
+
+    def path_for(self, tenant_id: str) -> Path:
+        """Return the database file of ``tenant_id``."""
+        if not TENANT_ID.fullmatch(tenant_id or ""):
+            raise ValueError(f"Invalid tenant id: {tenant_id!r}")
+        return self.base_dir / f"{tenant_id}.db"
+
+    # ------------------------------------------------------------------
+    def _evict(self) -> None:
+        victims = []
+        with self._lock:
+            for tenant_id in list(self._open):
+                if len(self._open) - len(victims) <= self.max_open:
+                    break
+                if tenant_id not in self._pins:
+                    victims.append(tenant_id)
+            managers = [self._open.pop(t) for t in victims]
+        for manager in managers:
+            manager.close()
+
+
+__all__ = ["TenantRegistry"]
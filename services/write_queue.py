@@ -0,0 +1,201 @@
+"""Single-writer queue committing database writes in groups.
+
+Write operations are callables receiving a connection, typically a
+repository call such as ``lambda conn: ClientsRepository(conn).add(client)``.
+A dedicated thread takes everything pending within a short time window and
+runs it inside one transaction, so a burst of writes pays for a single WAL
+commit instead of one per operation.  Each operation runs in its own
+savepoint: a failing operation is rolled back and reported through its
+future without affecting the rest of the batch.
+
+Futures are completed only after the batch is committed, so a caller
+waiting on ``future.result()`` reads its own writes from any connection.
+"""
+
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.query_tracer import QueryTracer, TracedConnection
+
+
+class _BatchConnection(TracedConnection):
+    """Connection on which ``with conn:`` blocks and commits join the batch.
+
+    Repositories wrap their writes in ``with self.conn:``; on the writer
+    connection these blocks must neither commit nor roll back, the writer
+    owns the transaction.
+    """
+
+    def __enter__(self) -> "_BatchConnection":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def commit(self) -> None:
+        pass
+
+
+@dataclass
+class _Operation:
+    fn: Callable[..., Any]
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any]
+    future: Future = field(default_factory=Future)
+
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Serialize writes on one thread and commit them in batches.
+
+    Parameters
+    ----------
+    db_path:
+        Database file written by the queue.
+    window_ms:
+        How long the writer waits for more operations after the first one
+        of a batch.
+    max_batch:
+        Maximum number of operations committed together.
+    tracer:
+        Optional :class:`QueryTracer` attached to the writer connection.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str,
+        *,
+        window_ms: float = 5.0,
+        max_batch: int = 1000,
+        tracer: Optional[QueryTracer] = None,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self.tracer = tracer
+        self.batches = 0
+        self.operations = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        """Start the writer thread if it is not running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="db-writer", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Commit pending operations and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Queue ``fn(conn, *args, **kwargs)`` and return its future."""
+        self.start()
+        op = _Operation(fn, args, kwargs)
+        self._queue.put(op)
+        return op.future
+
+    def execute(self, sql: str, params: Any = ()) -> Future:
+        """Queue a single statement; the future yields its ``rowcount``."""
+        return self.submit(lambda conn: conn.execute(sql, params).rowcount)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every operation submitted so far is committed."""
+        self.submit(lambda conn: None).result(timeout)
+
+    # ------------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            self.db_path, isolation_level=None, factory=_BatchConnection
+        )
+        conn.tracer = self.tracer
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA foreign_keys=ON;")
+        return conn
+
+    def _run(self) -> None:
+        conn = self._connect()
+        try:
+            stopping = False
+            while not stopping:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+                batch, stopping = self._collect(first)
+                self._commit(conn, batch)
+        finally:
+            conn.close()
+
+    def _collect(self, first: _Operation) -> Tuple[List[_Operation], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.window_ms / 1000
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[_Operation]) -> None:
+        outcomes: List[Tuple[_Operation, Any, Optional[BaseException]]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for op in batch:
+                if not op.future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT write_op")
+                try:
+                    value = op.fn(conn, *op.args, **op.kwargs)
+                except Exception as exc:
+                    conn.execute("ROLLBACK TO write_op")
+                    conn.execute("RELEASE write_op")
+                    outcomes.append((op, None, exc))
+                else:
+                    conn.execute("RELEASE write_op")
+                    outcomes.append((op, value, None))
+            conn.execute("COMMIT")
+        except sqlite3.Error as exc:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for op in batch:
+                if not op.future.done():
+                    op.future.set_exception(exc)
+            return
+        self.batches += 1
+        self.operations += len(outcomes)
+        for op, value, error in outcomes:
+            if error is not None:
+                op.future.set_exception(error)
+            else:
+                op.future.set_result(value)
+
+
+__all__ = ["WriteQueue"]
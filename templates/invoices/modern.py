@@ -12,8 +12,12 @@ def render(c: canvas_module.Canvas, data: dict, branding: Branding) -> None:
     invoice = data["invoice"]
     width, height = c._pagesize
     accent = colors.HexColor(branding.accent_color)
-    c.setFillColor(accent)
-    c.rect(0, height - 60, width, 60, fill=1, stroke=0)
+
+    def band(form: canvas_module.Canvas) -> None:
+        form.setFillColor(accent)
+        form.rect(0, height - 60, width, 60, fill=1, stroke=0)
+
+    c.draw_static("invoices.modern.band", band)
     c.setFillColor(colors.white)
     c.setFont(c._fontname, 14)
     c.drawString(40, height - 40, f"Facture {invoice.number}")
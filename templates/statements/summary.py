@@ -0,0 +1,29 @@
+"""Summary page closing a multi-invoice statement."""
+from __future__ import annotations
+
+from reportlab.lib import colors
+from reportlab.pdfgen import canvas as canvas_module
+
+from services.pdf_exporter import Branding
+
+
+def render(c: canvas_module.Canvas, data: dict, branding: Branding) -> None:
+    """Render the statement totals as a table, one row per status."""
+    width, height = c._pagesize
+    x_margin, y = 40, height - 80
+    c.setFont(c._fontname, 14)
+    c.drawString(x_margin, y, "Récapitulatif")
+    y -= 20
+    c.setFont(c._fontname, 11)
+    c.drawString(x_margin, y, data.get("period", ""))
+    y -= 30
+    columns = (x_margin, width / 2, width - x_margin)
+    header, *rows = data.get("table", [["Statut", "Factures", "Montant"]])
+    for index, row in enumerate([header, *rows]):
+        if index in (1, len(rows)):
+            c.setStrokeColor(colors.HexColor(branding.accent_color))
+            c.line(x_margin, y + 14, width - x_margin, y + 14)
+        c.drawString(columns[0], y, str(row[0]))
+        c.drawRightString(columns[1], y, str(row[1]))
+        c.drawRightString(columns[2], y, str(row[2]))
+        y -= 18
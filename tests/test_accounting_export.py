@@ -0,0 +1,91 @@
+import gzip
+import io
+import sqlite3
+import sys
+import uuid
+from datetime import date
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.client import Client
+from repositories.clients_repository import ClientsRepository
+from repositories.invoices_repository import InvoicesRepository
+from services.accounting_export import CSV_COLUMNS, FEC_COLUMNS, AccountingExporter
+from services.db_manager import apply_migrations
+from services.invoices_service import InvoicesService
+
+
+def setup_service() -> InvoicesService:
+    conn = sqlite3.connect(":memory:")
+    apply_migrations(conn)
+    clients = ClientsRepository(conn)
+    client = Client(
+        id=str(uuid.uuid4()),
+        first_name="Jeanne",
+        last_name="Martin",
+        sex="Femme",
+        birthdate=date(1990, 1, 1),
+        height_cm=165.0,
+        weight_kg=60.0,
+    )
+    clients.add(client)
+    service = InvoicesService(
+        InvoicesRepository(conn), clients, MagicMock(font_path=None)
+    )
+    service.create_many(
+        [
+            {"amount_cents": 12345, "client_id": client.id, "issued_on": date(2023, 12, 30)},
+            {
+                "amount_cents": 5000,
+                "client_id": client.id,
+                "issued_on": date(2024, 2, 1),
+                "label": "Coaching | février",
+            },
+            {"amount_cents": 700, "issued_on": date(2024, 3, 15)},
+        ]
+    )
+    return service
+
+
+def test_csv_export_filters_period():
+    service = setup_service()
+    out = io.StringIO()
+    report = service.export_accounting(
+        out, "csv", issued_between=(date(2024, 1, 1), date(2024, 12, 31))
+    )
+    lines = out.getvalue().splitlines()
+    assert lines[0] == ";".join(CSV_COLUMNS)
+    assert lines[1] == "2024-001;2024-02-01;Jeanne Martin;Coaching | février;50,00;Non payée;"
+    assert lines[2] == "2024-002;2024-03-15;;;7,00;Non payée;"
+    assert (report.invoices, report.lines, report.path) == (2, 2, None)
+
+
+def test_fec_export_balances_each_invoice(tmp_path):
+    service = setup_service()
+    exporter = AccountingExporter(service.repo, chunk_size=2)
+    report = exporter.export("fec", tmp_path / "FEC.txt.gz")
+    assert (report.invoices, report.lines) == (3, 6)
+    with gzip.open(report.path, "rt", encoding="utf-8") as f:
+        rows = [line.rstrip("\r\n").split("|") for line in f]
+    assert rows[0] == FEC_COLUMNS
+    assert all(len(row) == len(FEC_COLUMNS) for row in rows)
+    debit, credit = rows[3], rows[4]
+    assert debit[:4] == ["VE", "Ventes", "2024-001", "20240201"]
+    assert debit[4] == "411000" and debit[7] == "Jeanne Martin"
+    assert debit[10] == "Coaching février"
+    assert (debit[11], debit[12]) == ("50,00", "0,00")
+    assert credit[4] == "706000" and (credit[11], credit[12]) == ("0,00", "50,00")
+    assert rows[1][11] == "123,45"
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_export_rejects_unknown_format():
+    service = setup_service()
+    with pytest.raises(ValueError):
+        service.export_accounting(io.StringIO(), "xlsx")
+    with pytest.raises(ValueError):
+        service.export_accounting(io.StringIO(), status="Annulée")
@@ -0,0 +1,37 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from tools.bench_pdf import TEMPLATES, compare, main
+
+FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+
+def test_benchmark_reports_every_scenario(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    args = ["--count", "2", "--workers", "2", "--font", FONT, "--baseline", str(baseline)]
+    assert main([*args, "--save-baseline"]) == 0
+    report = json.loads(baseline.read_text())
+    results = report["results"]
+    assert "peak_rss_kb" in report["meta"]
+    assert not any("peak_rss_kb" in metrics for metrics in results.values())
+    assert len(results) == len(TEMPLATES) * 4
+    metrics = results["modern/logo/pool"]
+    assert metrics["docs_per_s"] > 0 and metrics["ms_per_doc"] > 0
+    assert metrics["bytes_per_doc"] > results["modern/no-logo/pool"]["bytes_per_doc"]
+    assert main([*args, "--threshold", "1000"]) == 0
+
+
+def test_compare_flags_regressions_over_threshold():
+    baseline = {"classic/logo/serial": {"ms_per_doc": 10.0, "bytes_per_doc": 1000}}
+    within = {"classic/logo/serial": {"ms_per_doc": 11.9, "bytes_per_doc": 1000}}
+    assert compare(within, baseline) == []
+    regressions = compare(
+        {"classic/logo/serial": {"ms_per_doc": 12.5, "bytes_per_doc": 1300}}, baseline
+    )
+    assert [r.split(":")[0] for r in regressions] == [
+        "classic/logo/serial ms_per_doc",
+        "classic/logo/serial bytes_per_doc",
+    ]
@@ -0,0 +1,86 @@
+import sqlite3
+import sys
+import uuid
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.client import Client
+from repositories.clients_repository import ClientsRepository
+from services.db_manager import apply_migrations
+
+
+def make_client(last: str) -> Client:
+    return Client(
+        id=str(uuid.uuid4()),
+        first_name="Alex",
+        last_name=last,
+        sex="Autre",
+        birthdate=date(1990, 1, 1),
+        height_cm=170.0,
+        weight_kg=70.0,
+    )
+
+
+def setup_repo():
+    conn = sqlite3.connect(":memory:")
+    apply_migrations(conn)
+    repo = ClientsRepository(conn)
+    clients = {name: make_client(name) for name in ("Dupont", "Martin", "Bernard", "Petit")}
+    repo.add_many(clients.values())
+    invoices = [
+        ("Dupont", 1000, "Payée", "2024-01-10"),
+        ("Dupont", 2500, "Non payée", "2024-03-01"),
+        ("Martin", 4000, "Non payée", "2024-02-01"),
+        ("Bernard", 700, "Payée", "2024-05-01"),
+        (None, 900, "Non payée", "2024-05-02"),
+    ]
+    with conn:
+        for n, (name, amount, status, issued_on) in enumerate(invoices):
+            conn.execute(
+                "INSERT INTO invoices (id, client_id, number, amount_cents, status,"
+                " issued_on, template) VALUES (?, ?, ?, ?, ?, ?, 'classic')",
+                (
+                    str(uuid.uuid4()),
+                    clients[name].id if name else None,
+                    f"2024-{n:03d}",
+                    amount,
+                    status,
+                    issued_on,
+                ),
+            )
+    return repo
+
+
+def test_summary_sorted_by_unpaid_with_keyset_pages():
+    repo = setup_repo()
+    page = repo.list_with_billing_summary(limit=2)
+    assert [(s.last_name, s.unpaid_cents) for s in page.items] == [
+        ("Martin", 4000),
+        ("Dupont", 2500),
+    ]
+    dupont = page.items[1]
+    assert (dupont.invoice_count, dupont.total_billed_cents) == (2, 3500)
+    assert dupont.last_invoice_on == date(2024, 3, 1)
+    rest = repo.list_with_billing_summary(limit=2, cursor=page.next_cursor)
+    assert {s.last_name for s in rest.items} == {"Bernard", "Petit"}
+    assert rest.next_cursor is None
+    petit = next(s for s in rest.items if s.last_name == "Petit")
+    assert (petit.invoice_count, petit.total_billed_cents, petit.last_invoice_on) == (0, 0, None)
+
+
+def test_summary_by_name_and_outstanding_only():
+    repo = setup_repo()
+    page = repo.list_with_billing_summary(limit=3, sort="name")
+    assert [s.last_name for s in page.items] == ["Bernard", "Dupont", "Martin"]
+    rest = repo.list_with_billing_summary(limit=3, cursor=page.next_cursor, sort="name")
+    assert [s.last_name for s in rest.items] == ["Petit"]
+    owing = repo.list_with_billing_summary(outstanding_only=True)
+    assert [s.last_name for s in owing.items] == ["Martin", "Dupont"]
+    with pytest.raises(ValueError):
+        repo.list_with_billing_summary(cursor=page.next_cursor)
+    with pytest.raises(ValueError):
+        repo.list_with_billing_summary(sort="amount")
@@ -4,17 +4,25 @@ from datetime import date
 import sys
 from pathlib import Path
 
+import pytest
+
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from models.client import Client
 from repositories.clients_repository import ClientsRepository
+from repositories.sql_functions import register_sql_functions
 
 
 def setup_db() -> sqlite3.Connection:
     conn = sqlite3.connect(":memory:")
     conn.execute("PRAGMA foreign_keys=ON;")
-    with open("db/migrations/0003_create_clients_table.sql", "r", encoding="utf-8") as f:
-        conn.executescript(f.read())
+    register_sql_functions(conn)
+    for mig in [
+        "db/migrations/0003_create_clients_table.sql",
+        "db/migrations/0007_add_clients_search_columns.sql",
+    ]:
+        with open(mig, "r", encoding="utf-8") as f:
+            conn.executescript(f.read())
     return conn
 
 
@@ -85,3 +93,49 @@ def test_crud_and_on_delete_set_null():
         pass
     else:
         assert False, "unique constraint failed"
+
+
+def test_add_many_and_identity_keys():
+    conn = setup_db()
+    repo = ClientsRepository(conn)
+    clients = (
+        Client(
+            id=str(uuid.uuid4()),
+            first_name=f"Client{i}",
+            last_name="Doe",
+            sex="Autre",
+            birthdate=date(1990, 1, 1),
+            height_cm=170.0,
+            weight_kg=70.0,
+        )
+        for i in range(30000)
+    )
+    assert repo.add_many(clients) == 30000
+    assert ("Client42", "Doe", "1990-01-01") in repo.identity_keys()
+    assert repo.search("client42").items[0].first_name == "Client42"
+
+
+def test_update_writes_only_given_fields():
+    conn = setup_db()
+    repo = ClientsRepository(conn)
+    client = Client(
+        id=str(uuid.uuid4()),
+        first_name="Élodie",
+        last_name="Martin",
+        sex="Femme",
+        birthdate=date(1990, 1, 1),
+        height_cm=165.0,
+        weight_kg=60.0,
+    )
+    repo.add(client)
+    conn.execute("UPDATE clients SET weight_kg = 62.5 WHERE id = ?", (client.id,))
+    client.first_name = "Eloise"
+    repo.update(client, fields=["first_name"])
+    row = conn.execute(
+        "SELECT first_name, search_first, weight_kg FROM clients WHERE id = ?",
+        (client.id,),
+    ).fetchone()
+    assert row == ("Eloise", "eloise", 62.5)
+    repo.update(client, fields=[])
+    with pytest.raises(ValueError):
+        repo.update(client, fields=["created_at"])
@@ -0,0 +1,114 @@
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.client import Client
+from repositories.clients_repository import ClientsRepository
+from repositories.sql_functions import register_sql_functions
+
+
+def setup_db() -> ClientsRepository:
+    conn = sqlite3.connect(":memory:")
+    register_sql_functions(conn)
+    for mig in [
+        "db/migrations/0003_create_clients_table.sql",
+        "db/migrations/0007_add_clients_search_columns.sql",
+    ]:
+        with open(mig, "r", encoding="utf-8") as f:
+            conn.executescript(f.read())
+    return ClientsRepository(conn)
+
+
+def make_client(first: str, last: str, email=None, phone=None, day: int = 1) -> Client:
+    return Client(
+        id=str(uuid.uuid4()),
+        first_name=first,
+        last_name=last,
+        sex="Autre",
+        birthdate=date(1990, 1, day),
+        height_cm=170.0,
+        weight_kg=70.0,
+        email=email,
+        phone=phone,
+    )
+
+
+def test_accent_insensitive_prefix_search():
+    repo = setup_db()
+    repo.add(make_client("Hélène", "Dupré", "helene@example.com", "06 12 34 56 78"))
+    repo.add(make_client("Hervé", "Martin", "herve@club.fr", "07.00.00.00.01"))
+    repo.add(make_client("Zoé", "Durand"))
+    assert [c.first_name for c in repo.search("helen").items] == ["Hélène"]
+    assert [c.last_name for c in repo.search("DU").items] == ["Dupré", "Durand"]
+    assert [c.first_name for c in repo.search("he du").items] == ["Hélène"]
+    assert [c.first_name for c in repo.search("herve@c").items] == ["Hervé"]
+    assert [c.first_name for c in repo.search("06 12 34").items] == ["Hélène"]
+    assert repo.search("zzz").items == []
+    assert repo.count("h") == 2
+    assert repo.count() == 3
+
+
+def test_non_latin_names_are_searchable():
+    repo = setup_db()
+    repo.add(make_client("Иван", "Петров"))
+    repo.add(make_client("Anne", "Petit"))
+    assert [c.first_name for c in repo.search("иван").items] == ["Иван"]
+    assert [c.first_name for c in repo.search("ПЕТ").items] == ["Иван"]
+    assert repo.search("\u0301").items == []  # nothing left once normalized
+    assert repo.count("\u0301") == 0
+
+
+def test_update_refreshes_search_columns():
+    repo = setup_db()
+    client = make_client("Anne", "Petit")
+    repo.add(client)
+    client.last_name = "Grand"
+    repo.update(client)
+    assert repo.search("petit").items == []
+    assert repo.search("grand").items[0].id == client.id
+
+
+def test_keyset_pagination():
+    repo = setup_db()
+    for i in range(25):
+        repo.add(make_client(f"Client{i:02d}", "Nom", day=(i % 28) + 1))
+    seen = []
+    cursor = None
+    while True:
+        page = repo.search("nom", limit=10, cursor=cursor)
+        seen.extend(c.first_name for c in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == sorted(seen) and len(seen) == 25
+    with pytest.raises(ValueError):
+        repo.search(cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        repo.search("nom", limit=0)
+
+
+def test_search_performance():
+    repo = setup_db()
+    rows = [
+        (str(uuid.uuid4()), f"Prenom{i}", f"Nom{i}", "Autre", "1990-01-01", 170.0,
+         70.0, None, None, None, None, 0, f"prenom{i}", f"nom{i}", "", f"06{i:08d}")
+        for i in range(20000)
+    ]
+    with repo.conn:
+        repo.conn.executemany(
+            "INSERT INTO clients VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", rows
+        )
+    repo.conn.execute("ANALYZE")
+    start = time.perf_counter()
+    page = repo.search("nom1999", limit=20)
+    repo.count("nom1999")
+    elapsed = (time.perf_counter() - start) * 1000
+    assert page.items[0].last_name == "Nom1999"
+    assert elapsed < 20
@@ -8,7 +8,7 @@ import pytest
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from models.client import Client
-from services.clients_service import ClientsService
+from services.clients_service import ClientsService, read_client_rows
 
 
 def valid_data():
@@ -133,3 +133,64 @@ def test_delete_missing_client():
     service = ClientsService(repo)
     with pytest.raises(ValueError):
         service.delete("missing")
+
+
+def test_bulk_import_dedupes_and_reports_rejects():
+    repo = MagicMock()
+    repo.identity_keys.return_value = {("John", "Doe", "1990-01-01")}
+    inserted = []
+
+    def add_many(clients):
+        inserted.extend(clients)
+        return len(inserted)
+
+    repo.add_many.side_effect = add_many
+    service = ClientsService(repo)
+    rows = [
+        {"first_name": "Jane", "last_name": "Doe", "sex": "Femme",
+         "birthdate": "1995-05-20", "height_cm": "170", "weight_kg": "60,5", "email": ""},
+        {"first_name": "John", "last_name": "Doe", "sex": "Homme",
+         "birthdate": "01/01/1990", "height_cm": "180", "weight_kg": "80"},
+        {"first_name": "Jane", "last_name": "Doe", "sex": "Femme",
+         "birthdate": "20/05/1995", "height_cm": "170", "weight_kg": "60"},
+        {"first_name": "Bad", "last_name": "Row", "sex": "X",
+         "birthdate": "1995-05-20", "height_cm": "170", "weight_kg": "60"},
+        {"first_name": "Bad", "last_name": "Date", "sex": "Femme",
+         "birthdate": "yesterday", "height_cm": "170", "weight_kg": "60"},
+    ]
+    report = service.bulk_import(iter(rows))
+    assert report.imported == 1
+    assert [line for line, _ in report.rejected] == [2, 3, 4, 5]
+    assert inserted[0].weight_kg == 60.5
+    assert inserted[0].email is None
+    repo.get_by_identity.assert_not_called()
+
+
+def test_bulk_import_reports_malformed_jsonl_lines(tmp_path):
+    repo = MagicMock()
+    repo.identity_keys.return_value = set()
+    repo.add_many.side_effect = lambda clients: len(list(clients))
+    path = tmp_path / "clients.jsonl"
+    path.write_text(
+        '{"first_name": "Jane", "last_name": "Doe", "sex": "Femme", '
+        '"birthdate": "1995-05-20", "height_cm": 170, "weight_kg": 60}\n'
+        '{"first_name": "Broken"\n',
+        encoding="utf-8",
+    )
+    report = ClientsService(repo).bulk_import(read_client_rows(path))
+    assert report.imported == 1
+    assert [line for line, _ in report.rejected] == [2]
+    assert report.rejected[0][1].startswith("Invalid JSON")
+
+
+def test_update_without_changes_skips_write():
+    repo = MagicMock()
+    repo.get_by_identity.return_value = None
+    service = ClientsService(repo)
+    client = service.create(valid_data())
+    repo.get.return_value = client
+    service.update(client.id, {"first_name": "Jane", "phone": "555"})
+    repo.update.assert_not_called()
+    service.update(client.id, {"phone": "556"})
+    repo.update.assert_called_once()
+    assert repo.update.call_args.kwargs["fields"] == ["phone"]
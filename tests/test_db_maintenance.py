@@ -0,0 +1,79 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from services.db_maintenance import MaintenanceScheduler, enable_incremental_vacuum
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def setup_db(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    enable_incremental_vacuum(conn)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    with open("db/migrations/0005_create_maintenance_runs_table.sql", "r", encoding="utf-8") as f:
+        conn.executescript(f.read())
+    conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)")
+    return conn
+
+
+def test_incremental_vacuum_enabled(tmp_path):
+    conn = sqlite3.connect(tmp_path / "legacy.db")
+    conn.execute("CREATE TABLE t (x)")
+    conn.commit()
+    assert enable_incremental_vacuum(conn) is True
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert enable_incremental_vacuum(conn) is False
+
+
+def test_analyze_after_bulk_changes(tmp_path):
+    conn = setup_db(tmp_path / "app.db")
+    clock = FakeClock()
+    scheduler = MaintenanceScheduler(conn, analyze_after_changes=100, clock=clock)
+    with conn:
+        conn.executemany("INSERT INTO notes (body) VALUES (?)", [("x",)] * 50)
+    assert scheduler.tick() == []
+    with conn:
+        conn.executemany("INSERT INTO notes (body) VALUES (?)", [("x",)] * 50)
+    runs = scheduler.tick()
+    assert [r.task for r in runs] == ["analyze"]
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+    assert scheduler.tick() == []
+
+
+def test_idle_vacuum_and_checkpoint_are_recorded(tmp_path):
+    db_path = tmp_path / "app.db"
+    conn = setup_db(db_path)
+    clock = FakeClock()
+    scheduler = MaintenanceScheduler(
+        conn, analyze_after_changes=10**9, idle_seconds=30, clock=clock
+    )
+    with conn:
+        conn.executemany("INSERT INTO notes (body) VALUES (?)", [("x" * 500,)] * 500)
+    with conn:
+        conn.execute("DELETE FROM notes")
+    scheduler.tick()
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] > 0
+    wal = Path(f"{db_path}-wal")
+    size_before = wal.stat().st_size
+
+    clock.now = 31
+    runs = scheduler.tick()
+    assert [r.task for r in runs] == ["incremental_vacuum", "wal_checkpoint"]
+    assert all(r.duration_ms >= 0 for r in runs)
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    assert wal.stat().st_size < size_before
+    recorded = conn.execute("SELECT task FROM maintenance_runs ORDER BY id").fetchall()
+    assert [r[0] for r in recorded] == ["incremental_vacuum", "wal_checkpoint"]
+
+    # Recording the runs does not count as user activity.
+    clock.now = 100
+    assert scheduler.tick() == []
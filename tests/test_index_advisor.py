@@ -0,0 +1,24 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from tools.index_advisor import check, propose_index
+
+
+def test_repository_queries_do_not_regress_into_full_scans():
+    unexpected = check(rows=200)
+    assert unexpected == [], "\n".join(
+        f"{f.workload}: {f.shape} -> {f.scans}" for f in unexpected
+    )
+
+
+def test_propose_index_orders_equality_before_range():
+    conn = sqlite3.connect(":memory:")
+    sql = "SELECT * FROM invoices WHERE issued_on >= ? AND status = ? ORDER BY issued_on"
+    proposal = propose_index(conn, sql, "SCAN invoices")
+    assert proposal == (
+        "CREATE INDEX IF NOT EXISTS idx_invoices_status_issued_on "
+        "ON invoices(status, issued_on);"
+    )
@@ -0,0 +1,98 @@
+import sqlite3
+import sys
+import uuid
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.client import Client
+from models.invoice import Invoice
+from repositories.clients_repository import ClientsRepository
+from repositories.invoices_repository import InvoicesRepository
+from services.db_manager import apply_migrations
+from tools.rebuild_revenue import main as rebuild_main
+
+
+def make_invoice(client_id, amount, status, issued_on) -> Invoice:
+    return Invoice(
+        id=str(uuid.uuid4()),
+        client_id=client_id,
+        number="",
+        label=None,
+        amount_cents=amount,
+        status=status,
+        issued_on=issued_on,
+    )
+
+
+def setup_repo(path: str = ":memory:"):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys=ON")
+    apply_migrations(conn)
+    client = Client(
+        id=str(uuid.uuid4()),
+        first_name="Alex",
+        last_name="Martin",
+        sex="Autre",
+        birthdate=date(1990, 1, 1),
+        height_cm=170.0,
+        weight_kg=70.0,
+    )
+    ClientsRepository(conn).add(client)
+    repo = InvoicesRepository(conn)
+    invoices = repo.add_many(
+        [
+            make_invoice(client.id, 1000, "Payée", date(2024, 1, 10)),
+            make_invoice(client.id, 2500, "Non payée", date(2024, 1, 20)),
+            make_invoice(None, 900, "Payée", date(2024, 2, 2)),
+            make_invoice(client.id, 4000, "Non payée", date(2024, 3, 1)),
+        ]
+    )
+    return conn, repo, client, invoices
+
+
+def months(repo, **kwargs):
+    return [
+        (r.year, r.month, r.invoice_count, r.billed_cents, r.paid_cents)
+        for r in repo.revenue_by_month(**kwargs)
+    ]
+
+
+def test_triggers_keep_summary_in_sync():
+    conn, repo, client, invoices = setup_repo()
+    assert months(repo) == [
+        (2024, 1, 2, 3500, 1000),
+        (2024, 2, 1, 900, 900),
+        (2024, 3, 1, 4000, 0),
+    ]
+    assert months(repo, client_id=client.id, start=(2024, 2), end=(2024, 12)) == [
+        (2024, 3, 1, 4000, 0),
+    ]
+
+    repo.update(replace(invoices[1], status="Payée"), fields=["status"])
+    repo.update(replace(invoices[3], issued_on=date(2024, 1, 5), amount_cents=3000))
+    repo.delete(invoices[2].id)
+    assert months(repo) == [(2024, 1, 3, 6500, 3500)]
+    assert repo.revenue_by_month()[0].unpaid_cents == 3000
+
+    # Detaching invoices from a deleted client moves them under ''.
+    conn.execute("DELETE FROM clients WHERE id = ?", (client.id,))
+    assert months(repo, client_id=client.id) == []
+    assert months(repo, client_id="") == [(2024, 1, 3, 6500, 3500)]
+    assert repo.revenue_drift() == 0
+
+
+def test_rebuild_repairs_drift(tmp_path):
+    db_path = str(tmp_path / "app.db")
+    conn, repo, _, _ = setup_repo(db_path)
+    with conn:
+        conn.execute("UPDATE invoice_revenue_monthly SET amount_cents = 0 WHERE month = 1")
+        conn.execute("DELETE FROM invoice_revenue_monthly WHERE month = 2")
+    assert repo.revenue_drift() == 3
+    conn.close()
+
+    assert rebuild_main(["--check", db_path]) == 1
+    assert rebuild_main([db_path]) == 0
+    assert rebuild_main(["--check", db_path]) == 0
@@ -1,11 +1,24 @@
+import io
+import re
 from datetime import date
 import sys
 from pathlib import Path
+from typing import List
+
+import pytest
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from models.invoice import Invoice
-from services.pdf_exporter import PDFExporter
+from services.pdf_exporter import BrandedCanvas, Branding, PDFExporter
+
+
+def page_contents(pdf: bytes) -> List[bytes]:
+    """Return the content stream of every page of an uncompressed PDF."""
+    streams = dict(
+        re.findall(rb"\n(\d+) 0 obj\n<<[^>]*>>\nstream\r?\n(.*?)endstream", pdf, re.S)
+    )
+    return [streams[n] for n in re.findall(rb"/Contents (\d+) 0 R", pdf)]
 
 
 def test_templates_generate(tmp_path):
@@ -39,3 +52,71 @@ def test_templates_generate(tmp_path):
         path = tmp_path / f"{tpl}.pdf"
         exporter.generate(f"invoices.{tpl}", data, str(path), branding)
         assert path.exists()
+
+
+def test_logo_is_embedded_once(tmp_path):
+    from PIL import Image
+
+    logo = tmp_path / "logo.png"
+    Image.new("RGB", (40, 20), "red").save(logo)
+    branding = Branding.from_dict({"name": "Coach", "logo_path": str(logo)})
+    buffer = io.BytesIO()
+    c = BrandedCanvas(
+        buffer,
+        branding=branding,
+        document_title="Programme",
+        pagesize=(595, 842),
+        font_name="Helvetica",
+        pageCompression=0,
+    )
+    for page in range(3):
+        if page:
+            c.showPage()
+        c.drawString(100, 400, f"Page {page}")
+    c.save()
+    content = buffer.getvalue()
+    assert content.count(b"/Subtype /Image") == 1
+    pages = page_contents(content)
+    assert len(pages) == 3
+    assert [p.count(b"/FormXob.branding Do") for p in pages] == [1, 1, 1]
+
+
+def test_compact_profile_shrinks_invoices(tmp_path):
+    from PIL import Image, ImageDraw
+
+    font = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+    logo = tmp_path / "logo.png"
+    image = Image.new("RGB", (600, 300), "white")
+    draw = ImageDraw.Draw(image)
+    for x in range(0, 600, 20):
+        draw.rectangle([x, 0, x + 10, 300], fill=(37, 99, 235 - x // 4))
+    draw.ellipse([200, 50, 400, 250], fill=(31, 41, 55))
+    image.save(logo)
+    invoice = Invoice(
+        id="1",
+        client_id=None,
+        number="2024-001",
+        label="Coaching individuel",
+        amount_cents=4500,
+        status="Non payée",
+        issued_on=date(2024, 1, 1),
+        template="modern",
+    )
+    data = {
+        "document_title": "Facture 2024-001",
+        "invoice": invoice,
+        "client_name": "John Doe",
+        "mentions": "TVA non applicable, art. 293B du CGI",
+    }
+    branding = {"name": "Coach", "logo_path": str(logo), "primary_color": "#1F2937"}
+    sizes = {}
+    for profile in ("standard", "compact"):
+        exporter = PDFExporter(font, profile=profile)
+        content = bytes(exporter.render_bytes("invoices.modern", data, branding))
+        sizes[profile] = len(content)
+    assert b"ASCII85Decode" not in content
+    assert b"/DCTDecode" in content  # logo re-encoded at the printed resolution
+    assert b"+DejaVuSans" in content  # subset font
+    assert sizes["compact"] < min(sizes["standard"], 30_000)
+    with pytest.raises(ValueError):
+        PDFExporter(font, profile="tiny")
@@ -1,21 +1,28 @@
 import sqlite3
+import threading
 import uuid
-from datetime import date
+from datetime import date, timedelta
 import sys
 from pathlib import Path
 
+import pytest
+
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from models.invoice import Invoice
 from repositories.invoices_repository import InvoicesRepository
 
 
-def setup_db() -> sqlite3.Connection:
-    conn = sqlite3.connect(":memory:")
+def setup_db(path: str = ":memory:") -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
     conn.execute("PRAGMA foreign_keys=ON;")
     for mig in [
         "db/migrations/0003_create_clients_table.sql",
         "db/migrations/0004_create_invoices_table.sql",
+        "db/migrations/0010_create_invoice_sequences.sql",
+        "db/migrations/0011_add_invoices_pdf_hash.sql",
+        "db/migrations/0012_create_invoice_revenue_monthly.sql",
+        "db/migrations/0014_add_invoices_listing_indexes.sql",
     ]:
         with open(mig, "r", encoding="utf-8") as f:
             conn.executescript(f.read())
@@ -68,3 +75,94 @@ def test_crud_and_on_delete_set_null():
     assert repo.get(inv.id).client_id is None
     repo.delete(inv.id)
     assert repo.get(inv.id) is None
+
+
+def make_invoice(issued_on: date, number: str = "") -> Invoice:
+    return Invoice(
+        id=str(uuid.uuid4()),
+        client_id=None,
+        number=number,
+        label=None,
+        amount_cents=100,
+        status="Non payée",
+        issued_on=issued_on,
+    )
+
+
+def test_sequence_numbering_past_999_and_bulk_blocks():
+    conn = setup_db()
+    repo = InvoicesRepository(conn)
+    repo.add(make_invoice(date(2024, 1, 1), "2024-998"))
+    assert repo.get_last_number(2024) == "2024-998"
+    assert repo.add_numbered(make_invoice(date(2024, 2, 1))).number == "2024-999"
+    assert repo.add_numbered(make_invoice(date(2024, 2, 1))).number == "2024-1000"
+    batch = repo.add_many(
+        [make_invoice(date(2024, 3, 1)), make_invoice(date(2025, 1, 1)), make_invoice(date(2024, 3, 2))]
+    )
+    assert [i.number for i in batch] == ["2024-1001", "2025-001", "2024-1002"]
+    assert repo.get_last_number(2024) == "2024-1002"
+    assert repo.get_last_number(2023) is None
+
+
+def test_concurrent_numbering_has_no_duplicates(tmp_path):
+    path = str(tmp_path / "app.db")
+    setup_db(path).close()
+    numbers = []
+
+    def worker():
+        conn = sqlite3.connect(path, timeout=30)
+        repo = InvoicesRepository(conn)
+        for _ in range(25):
+            numbers.append(repo.add_numbered(make_invoice(date(2024, 5, 1))).number)
+        conn.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(numbers) == [f"2024-{n:03d}" for n in range(1, 101)]
+
+
+def test_query_pages_filtered_invoices_newest_first():
+    conn = setup_db()
+    repo = InvoicesRepository(conn)
+    start = date(2024, 1, 1)
+    repo.add_many(
+        Invoice(
+            id=str(uuid.uuid4()),
+            client_id=None,
+            number="",
+            label="Coaching",
+            amount_cents=1000,
+            status="Non payée" if n % 2 else "Payée",
+            issued_on=start + timedelta(days=n),
+        )
+        for n in range(200)
+    )
+    quarter = (date(2024, 1, 1), date(2024, 3, 31))
+    filters = {"status": "Non payée", "issued_between": quarter}
+    seen = []
+    cursor = None
+    while True:
+        page = repo.query(**filters, limit=20, cursor=cursor)
+        seen.extend(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert len(seen) == repo.count(**filters) == 45
+    assert all(i.status == "Non payée" for i in seen)
+    assert all(quarter[0] <= i.issued_on <= quarter[1] for i in seen)
+    assert [i.issued_on for i in seen] == sorted((i.issued_on for i in seen), reverse=True)
+    assert repo.count() == 200
+    with pytest.raises(ValueError):
+        repo.query(limit=0)
+    plan = " ".join(
+        r[3]
+        for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM invoices WHERE status = ? "
+            "AND issued_on BETWEEN ? AND ? ORDER BY issued_on DESC, id DESC LIMIT 20",
+            ("Non payée", "2024-01-01", "2024-03-31"),
+        )
+    )
+    assert "idx_invoices_status_issued" in plan and "TEMP B-TREE" not in plan
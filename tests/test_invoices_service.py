@@ -1,22 +1,24 @@
 from unittest.mock import MagicMock
 from datetime import date
+import sqlite3
 import sys
 from pathlib import Path
-from unittest.mock import MagicMock
-from datetime import date
 
 import pytest
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from models.invoice import Invoice
+from repositories.invoices_repository import InvoicesRepository
+from services.db_manager import apply_migrations
 from services.invoices_service import InvoicesService
+from services.pdf_exporter import PROFILES
 
 
 def test_numbering_and_status():
-    repo = MagicMock()
-    repo.get_last_number.side_effect = [None, "2024-001", None]
-    service = InvoicesService(repo, pdf_exporter=MagicMock())
+    conn = sqlite3.connect(":memory:")
+    apply_migrations(conn)
+    service = InvoicesService(InvoicesRepository(conn), pdf_exporter=MagicMock())
     inv1 = service.create({"amount_cents": 1000, "issued_on": date(2024, 1, 1)})
     inv2 = service.create({"amount_cents": 1000, "issued_on": date(2024, 6, 1)})
     inv3 = service.create({"amount_cents": 1000, "issued_on": date(2025, 1, 1)})
@@ -24,6 +26,11 @@ def test_numbering_and_status():
     assert inv2.number == "2024-002"
     assert inv3.number == "2025-001"
     assert inv1.status == "Non payée"
+    bulk = service.create_many(
+        [{"amount_cents": 500, "issued_on": date(2025, 3, 1)}, {"amount_cents": 700}]
+    )
+    assert bulk[0].number == "2025-002"
+    assert service.get(bulk[0].id).number == "2025-002"
 
 
 def test_status_update_and_lock():
@@ -55,7 +62,7 @@ def test_generate_pdf_updates_path():
     repo = MagicMock()
     client_repo = MagicMock()
     client_repo.get.return_value = MagicMock(first_name="John", last_name="Doe")
-    exporter = MagicMock()
+    exporter = MagicMock(font_path=None, profile=PROFILES["standard"])
     invoice = Invoice(
         id="1",
         client_id="c1",
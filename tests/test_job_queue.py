@@ -0,0 +1,177 @@
+import sqlite3
+import sys
+import threading
+from datetime import date
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.job import Job
+from repositories.invoices_repository import InvoicesRepository
+from repositories.jobs_repository import JobsRepository
+from services.db_manager import apply_migrations
+from services import invoices_service
+from services.invoices_service import PDF_JOB_KIND, InvoicesService, run_pdf_job
+from services.job_queue import AfterBridge, JobQueue, publish_to_store
+from services.pdf_exporter import PDFExporter
+from services.store import AppState, Store
+
+FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+
+def setup_db(path: Path) -> Path:
+    conn = sqlite3.connect(path)
+    apply_migrations(conn)
+    conn.close()
+    return path
+
+
+def counting_handler(processed):
+    def handler(ctx):
+        for i in range(ctx.cursor or 0, 10):
+            processed.append(i)
+            ctx.checkpoint(i + 1, done=i + 1, total=10)
+
+    return handler
+
+
+def test_interrupted_job_resumes_from_checkpoint(tmp_path):
+    db = setup_db(tmp_path / "app.db")
+    conn = sqlite3.connect(db)
+    repo = JobsRepository(conn)
+    repo.add(Job(id="crashed", kind="count"))
+    repo.start("crashed")
+    repo.checkpoint("crashed", 4, 4, 10)
+    conn.close()
+
+    processed = []
+    jobs = JobQueue(db, workers=1)
+    jobs.register("count", counting_handler(processed))
+    assert jobs.resume() == ["crashed"]
+    job = jobs.wait("crashed", timeout=10)
+    jobs.shutdown()
+    assert processed == [4, 5, 6, 7, 8, 9]
+    assert (job.status, job.done, job.total, job.cursor) == ("done", 10, 10, 10)
+
+
+def test_cancel_running_and_pending_jobs(tmp_path):
+    db = setup_db(tmp_path / "app.db")
+    started, release = threading.Event(), threading.Event()
+
+    def slow(ctx):
+        started.set()
+        release.wait(10)
+        ctx.checkpoint(1, done=1)
+        ctx.checkpoint(2, done=2)
+
+    jobs = JobQueue(db, workers=1)
+    jobs.register("slow", slow)
+    running = jobs.submit("slow")
+    pending = jobs.submit("slow")
+    assert started.wait(10)
+    jobs.cancel(pending)
+    jobs.cancel(running)
+    release.set()
+    first, second = jobs.wait(running, timeout=10), jobs.wait(pending, timeout=10)
+    jobs.shutdown()
+    assert (first.status, first.done) == ("cancelled", 1)
+    assert (second.status, second.done) == ("cancelled", 0)
+
+
+def test_cancel_during_last_step_keeps_the_job_done(tmp_path):
+    db = setup_db(tmp_path / "app.db")
+    started, release = threading.Event(), threading.Event()
+
+    def last_step(ctx):
+        started.set()
+        release.wait(10)
+        ctx.checkpoint(1, done=1, total=1)
+
+    jobs = JobQueue(db, workers=1)
+    jobs.register("last", last_step)
+    job_id = jobs.submit("last")
+    assert started.wait(10)
+    jobs.cancel(job_id)
+    release.set()
+    job = jobs.wait(job_id, timeout=10)
+    jobs.shutdown()
+    assert (job.status, job.done) == ("done", 1)
+    assert jobs._futures == {}
+
+
+def test_wait_on_job_dropped_by_shutdown(tmp_path):
+    db = setup_db(tmp_path / "app.db")
+    started, release = threading.Event(), threading.Event()
+
+    def slow(ctx):
+        started.set()
+        release.wait(10)
+
+    jobs = JobQueue(db, workers=1)
+    jobs.register("slow", slow)
+    jobs.submit("slow")
+    queued = jobs.submit("slow")
+    assert started.wait(10)
+    jobs.shutdown(wait=False)
+    release.set()
+    assert jobs.wait(queued, timeout=10).status == "pending"
+
+
+def test_failures_are_recorded_and_progress_reaches_the_store(tmp_path):
+    db = setup_db(tmp_path / "app.db")
+    store = Store(AppState())
+    bridge = AfterBridge()
+    jobs = JobQueue(db, notify=bridge.wrap(publish_to_store(store)))
+    jobs.register("count", counting_handler([]))
+    jobs.register("broken", lambda ctx: 1 / 0)
+    ok, broken = jobs.submit("count"), jobs.submit("broken")
+    assert jobs.wait(broken, timeout=10).error == "division by zero"
+    jobs.wait(ok, timeout=10)
+    jobs.shutdown()
+
+    assert store.get_state().jobs == {}
+    assert bridge.drain() > 2
+    progress = store.get_state().jobs
+    assert (progress[ok].status, progress[ok].fraction) == ("done", 1.0)
+    assert progress[broken].status == "failed" and progress[broken].finished
+
+
+def test_pdf_job_renders_invoices_on_one_pool(tmp_path, monkeypatch):
+    pools = []
+    real_pool = invoices_service.render_pool
+
+    def counting_pool(workers):
+        pools.append(workers)
+        return real_pool(workers)
+
+    monkeypatch.setattr(invoices_service, "render_pool", counting_pool)
+    monkeypatch.setattr(invoices_service, "PDF_JOB_CHUNK", 1)
+    db = setup_db(tmp_path / "app.db")
+    conn = sqlite3.connect(db)
+    service = InvoicesService(InvoicesRepository(conn), pdf_exporter=PDFExporter(FONT))
+    ids = [
+        i.id
+        for i in service.repo.add_many(
+            InvoicesService._new_invoice(
+                {"amount_cents": 100 * n, "issued_on": date(2024, 1, n)}
+            )
+            for n in range(1, 4)
+        )
+    ]
+    jobs = JobQueue(db, workers=1)
+    jobs.register(PDF_JOB_KIND, run_pdf_job)
+    job_id = jobs.submit(
+        PDF_JOB_KIND,
+        {
+            "invoice_ids": ids,
+            "branding": {"name": "Coach"},
+            "workers": 2,
+            "output_dir": str(tmp_path / "pdf"),
+            "font_path": FONT,
+        },
+    )
+    job = jobs.wait(job_id, timeout=30)
+    jobs.shutdown()
+    assert (job.status, job.done, job.total) == ("done", 3, 3)
+    assert pools == [2]
+    assert all(Path(i.pdf_path).exists() for i in service.list_all())
@@ -0,0 +1,183 @@
+import io
+import re
+import sqlite3
+import sys
+import uuid
+import zipfile
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.client import Client
+from repositories.clients_repository import ClientsRepository
+from repositories.invoices_repository import InvoicesRepository
+from services.db_manager import apply_migrations
+from services.invoices_service import InvoicesService
+from services.pdf_batch import render_job
+from services.pdf_exporter import PDFExporter
+
+FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+BRANDING = {
+    "name": "Coach",
+    "logo_path": None,
+    "primary_color": "#000000",
+    "secondary_color": "#000000",
+    "accent_color": "#000000",
+    "contact_email": "",
+    "contact_phone": "",
+}
+
+
+def setup_service(tmp_path: Path) -> InvoicesService:
+    conn = sqlite3.connect(":memory:")
+    apply_migrations(conn)
+    clients = ClientsRepository(conn)
+    client = Client(
+        id=str(uuid.uuid4()),
+        first_name="John",
+        last_name="Doe",
+        sex="Homme",
+        birthdate=date(1990, 1, 1),
+        height_cm=180.0,
+        weight_kg=80.0,
+    )
+    clients.add(client)
+    service = InvoicesService(InvoicesRepository(conn), clients, PDFExporter(FONT))
+    service.output_dir = str(tmp_path)
+    service.create_many(
+        [
+            {
+                "amount_cents": 1000 * n,
+                "client_id": client.id if n % 2 else None,
+                "issued_on": date(2024, 1, n),
+                "template": template,
+            }
+            for n, template in enumerate(["classic", "modern", "minimalist"] * 2, start=1)
+        ]
+    )
+    return service
+
+
+def test_generate_pdfs_on_worker_processes(tmp_path):
+    service = setup_service(tmp_path)
+    ids = [i.id for i in service.list_all()]
+    calls = []
+    results = service.generate_pdfs(
+        ids + ["missing"],
+        BRANDING,
+        workers=2,
+        progress=lambda done, total, result: calls.append((done, total)),
+    )
+    assert calls == [(n, 7) for n in range(1, 8)]
+    errors = {r.key: r.error for r in results if not r.ok}
+    assert errors == {"missing": "Invoice not found"}
+    for invoice in service.list_all():
+        assert invoice.pdf_path and Path(invoice.pdf_path).exists()
+    assert (tmp_path / "invoice_2024-001_John_Doe.pdf").exists()
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_generate_pdfs_reports_render_errors(tmp_path):
+    service = setup_service(tmp_path)
+    invoice = service.list_all()[0]
+    broken = {**BRANDING, "primary_color": "not-a-colour"}
+    results = service.generate_pdfs([invoice.id], broken, workers=1)
+    assert not results[0].ok
+    assert service.get(invoice.id).pdf_path is None
+
+
+def test_unchanged_invoices_are_not_rendered_again(tmp_path):
+    service = setup_service(tmp_path)
+    ids = [i.id for i in service.list_all()]
+    service.generate_pdfs(ids, BRANDING, workers=1)
+    assert (service.pdf_cache.hits, service.pdf_cache.misses) == (0, 6)
+
+    results = service.generate_pdfs(ids, BRANDING, workers=1)
+    assert all(r.cached for r in results)
+    assert service.pdf_cache.hits == 6
+
+    service.update(ids[0], {"label": "Nouveau libellé"})
+    Path(service.get(ids[1]).pdf_path).unlink()
+    results = service.generate_pdfs(ids, BRANDING, workers=1)
+    assert {r.key for r in results if not r.cached} == {ids[0], ids[1]}
+    assert service.generate_pdf(ids[2], BRANDING) == service.get(ids[2]).pdf_path
+    assert service.pdf_cache.misses == 8
+
+    results = service.generate_pdfs(ids, {**BRANDING, "name": "Autre"}, workers=1)
+    assert not any(r.cached for r in results)
+    service.generate_pdf(ids[2], {**BRANDING, "name": "Autre"}, force=True)
+    assert service.pdf_cache.misses == 15
+
+
+def test_render_pdf_in_memory(tmp_path):
+    service = setup_service(tmp_path)
+    invoice = service.list_all()[0]
+    content = service.render_pdf(invoice.id, BRANDING)
+    assert isinstance(content, memoryview)
+    assert bytes(content[:5]) == b"%PDF-"
+    assert not any(tmp_path.iterdir())
+    assert service.repo.get(invoice.id).pdf_path is None
+
+    job = service._pdf_job(invoice, None, BRANDING)
+    result = render_job(replace(job, output_path=None))
+    assert result.ok and result.path is None
+    assert result.content.startswith(b"%PDF-")
+
+
+def test_render_statement_streams_invoices_into_one_document(tmp_path):
+    service = setup_service(tmp_path)
+    client_id = next(i.client_id for i in service.list_all() if i.client_id)
+    path = service.render_statement(
+        {"client_id": client_id, "issued_between": (date(2024, 1, 1), date(2024, 1, 31))},
+        BRANDING,
+    )
+    content = Path(path).read_bytes()
+    assert Path(path).parent == tmp_path
+    assert len(re.findall(rb"/Type /Page\b(?!s)", content)) == 4
+
+    with pytest.raises(ValueError):
+        service.render_statement({"month": 1}, BRANDING)
+
+
+def test_export_pdf_bundle_renders_stale_invoices_in_order(tmp_path):
+    service = setup_service(tmp_path / "pdf")
+    invoices = service.list_all()
+    service.generate_pdf(invoices[1].id, BRANDING)
+
+    bundle = tmp_path / "2024.zip"
+    report = service.export_pdf_bundle(
+        (date(2024, 1, 1), date(2024, 1, 31)), bundle, BRANDING, workers=2
+    )
+    assert (report.invoices, report.rendered, report.cached) == (6, 5, 1)
+    assert not report.errors
+    with zipfile.ZipFile(bundle) as zf:
+        names = zf.namelist()
+        index = zf.read("index.csv").decode("utf-8").splitlines()
+        assert zf.read(names[0]).startswith(b"%PDF-")
+    numbers = sorted(i.number for i in invoices)
+    assert names == [*(f"{n}.pdf" for n in numbers), "index.csv"]
+    assert [line.split(";")[-1] for line in index[1:]] == names[:-1]
+    assert all(i.pdf_hash for i in service.list_all())
+
+    again = service.export_pdf_bundle(
+        (date(2024, 1, 1), date(2024, 1, 31)), io.BytesIO(), BRANDING, workers=1
+    )
+    assert (again.invoices, again.rendered, again.cached) == (6, 0, 6)
+
+
+def test_export_pdf_bundle_index_has_no_file_for_failed_renders(tmp_path):
+    service = setup_service(tmp_path / "pdf")
+    broken = {**BRANDING, "primary_color": "not-a-colour"}
+    buffer = io.BytesIO()
+    report = service.export_pdf_bundle(
+        (date(2024, 1, 1), date(2024, 1, 31)), buffer, broken, workers=1
+    )
+    assert report.invoices == 0 and len(report.errors) == 6
+    with zipfile.ZipFile(buffer) as zf:
+        assert zf.namelist() == ["index.csv"]
+        index = zf.read("index.csv").decode("utf-8").splitlines()
+    assert [line.split(";")[-1] for line in index[1:]] == [""] * 6
@@ -0,0 +1,54 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from services.query_tracer import QueryTracer, TracedConnection, normalize_sql
+
+
+def setup_db(tracer: QueryTracer) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:", factory=TracedConnection)
+    for mig in [
+        "db/migrations/0001_initial_schema.sql",
+        "db/migrations/0002_create_exercises_table.sql",
+    ]:
+        with open(mig, "r", encoding="utf-8") as f:
+            conn.executescript(f.read())
+    conn.tracer = tracer
+    return conn
+
+
+def test_normalize_sql_folds_literals_and_lists():
+    a = normalize_sql("SELECT * FROM t WHERE x IN (?,?,?) AND y = 'a'  LIMIT 10")
+    b = normalize_sql("SELECT *\n FROM t WHERE x IN (?, ?) AND y = 'bb' LIMIT 5")
+    assert a == b == "SELECT * FROM t WHERE x IN (?,...) AND y = '?' LIMIT N"
+
+
+def test_stats_and_slow_queries_logged():
+    tracer = QueryTracer(slow_ms=0.0, batch_size=2)
+    conn = setup_db(tracer)
+    for muscles in (["Biceps"], ["Biceps", "Triceps"], ["Cou"]):
+        placeholders = ",".join("?" * len(muscles))
+        conn.execute(
+            f"SELECT * FROM exercises WHERE primary_muscle IN ({placeholders})",
+            muscles,
+        ).fetchall()
+    stats = tracer.snapshot()
+    shape = "SELECT * FROM exercises WHERE primary_muscle IN (?,...)"
+    assert stats[shape]["count"] == 3
+    assert stats[shape]["p50_ms"] <= stats[shape]["p99_ms"] <= stats[shape]["max_ms"]
+    tracer.flush(conn)
+    messages = [r[0] for r in conn.execute("SELECT message FROM app_logs")]
+    assert len(messages) == 3
+    assert all("SCAN exercises" in m for m in messages)
+
+
+def test_flush_waits_for_open_transaction():
+    tracer = QueryTracer(slow_ms=0.0, batch_size=1)
+    conn = setup_db(tracer)
+    conn.execute("INSERT INTO foods (name, calories, protein, carbs, fats) VALUES ('a', 1, 1, 1, 1)")
+    assert conn.in_transaction
+    conn.rollback()
+    assert conn.execute("SELECT COUNT(*) FROM foods").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM app_logs").fetchone()[0] == 2
@@ -0,0 +1,88 @@
+import sqlite3
+import sys
+import uuid
+from datetime import date
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.client import Client
+from repositories.clients_repository import ClientsRepository
+from services.db_manager import apply_migrations
+from services.retention import RetentionJob
+
+TODAY = date(2031, 6, 1)
+
+
+def make_client(i: int) -> Client:
+    return Client(
+        id=str(uuid.uuid4()),
+        first_name=f"Client{i}",
+        last_name="Doe",
+        sex="Autre",
+        birthdate=date(1990, 1, 1),
+        height_cm=170.0,
+        weight_kg=70.0,
+    )
+
+
+def add_invoice(conn, client_id, number, issued_on, status="Payée"):
+    conn.execute(
+        "INSERT INTO invoices (id, client_id, number, amount_cents, status, issued_on, template)"
+        " VALUES (?, ?, ?, 1000, ?, ?, 'classic')",
+        (str(uuid.uuid4()), client_id, number, status, issued_on),
+    )
+
+
+def setup_db(path: Path):
+    conn = sqlite3.connect(path)
+    apply_migrations(conn)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    repo = ClientsRepository(conn)
+    clients = [make_client(i) for i in range(1200)]
+    repo.add_many(clients)
+    with conn:
+        # Recent session, recent invoice and unpaid invoice keep three clients.
+        conn.execute(
+            "INSERT INTO sessions (client_id, session_date) VALUES (?, '2031-01-10')",
+            (clients[0].id,),
+        )
+        add_invoice(conn, clients[1].id, "2031-001", "2031-02-01")
+        add_invoice(conn, clients[2].id, "2024-001", "2024-02-01", "Non payée")
+        add_invoice(conn, clients[3].id, "2024-002", "2024-03-01")
+    return conn, clients
+
+
+def test_purge_inactive_clients_in_chunks(tmp_path):
+    conn, clients = setup_db(tmp_path / "app.db")
+    calls = []
+    job = RetentionJob(tmp_path / "app.db", chunk_size=500, today=lambda: TODAY)
+    report = job.start(lambda done, total: calls.append((done, total))).result(30)
+
+    assert report.candidates == report.purged == 1197
+    assert report.invoices_detached == 1
+    assert report.chunks == 3
+    assert calls == [(500, 1197), (1000, 1197), (1197, 1197)]
+    kept = {r[0] for r in conn.execute("SELECT id FROM clients")}
+    assert kept == {c.id for c in clients[:3]}
+    detached = conn.execute(
+        "SELECT client_id FROM invoices WHERE number = '2024-002'"
+    ).fetchone()
+    assert detached == (None,)
+    log = conn.execute("SELECT message FROM app_logs").fetchone()[0]
+    assert "1197/1197 clients removed" in log
+
+
+def test_purge_skips_clients_active_since_selection(tmp_path):
+    conn, clients = setup_db(tmp_path / "app.db")
+    repo = ClientsRepository(conn)
+    cutoff = RetentionJob(tmp_path / "app.db", today=lambda: TODAY).cutoff()
+    ids = repo.inactive_ids(cutoff)
+    with conn:
+        conn.execute(
+            "INSERT INTO calendar (client_id, event_date) VALUES (?, '2031-07-01')",
+            (ids[0],),
+        )
+    deleted, _ = repo.purge_inactive(ids[:10], cutoff)
+    assert deleted == 9
+    assert repo.get(ids[0]) is not None
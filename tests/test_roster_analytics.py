@@ -0,0 +1,84 @@
+import sqlite3
+import sys
+import uuid
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.client import Client
+from repositories.clients_repository import ClientsRepository
+from services.db_manager import apply_migrations
+from services.roster_analytics import RosterAnalytics, compute_stats
+
+TODAY = date(2025, 6, 15)
+
+
+def make_client(birthdate, height, weight, sex="Femme", objective=None) -> Client:
+    return Client(
+        id=str(uuid.uuid4()),
+        first_name=str(uuid.uuid4()),
+        last_name="Doe",
+        sex=sex,
+        birthdate=birthdate,
+        height_cm=height,
+        weight_kg=weight,
+        objective=objective,
+    )
+
+
+def setup_repo() -> ClientsRepository:
+    conn = sqlite3.connect(":memory:")
+    apply_migrations(conn)
+    return ClientsRepository(conn)
+
+
+def test_roster_stats():
+    repo = setup_repo()
+    repo.add_many(
+        [
+            make_client(date(2008, 6, 16), 160.0, 45.0, objective="Perte de poids"),
+            make_client(date(2000, 6, 15), 180.0, 75.0, "Homme", "Prise de masse"),
+            make_client(date(1985, 1, 1), 170.0, 80.0, objective="Perte de poids"),
+            make_client(date(1950, 12, 31), 165.0, 90.0, "Autre"),
+        ]
+    )
+    stats = RosterAnalytics(repo).stats(TODAY)
+    assert stats.total == 4
+    assert stats.age_bands["< 18"] == 1
+    assert stats.age_bands["25-34"] == 1
+    assert stats.age_bands["35-44"] == 1
+    assert stats.age_bands["65+"] == 1
+    assert stats.age_median == 32.5
+    assert stats.bmi_bands == {
+        "Insuffisance pondérale": 1,
+        "Normal": 1,
+        "Surpoids": 1,
+        "Obésité": 1,
+    }
+    assert stats.by_sex == {"Femme": 2, "Autre": 1, "Homme": 1}
+    assert list(stats.by_objective.items())[0] == ("Perte de poids", 2)
+    assert stats.by_objective["Non renseigné"] == 1
+
+
+def test_stats_cached_until_clients_change():
+    repo = setup_repo()
+    analytics = RosterAnalytics(repo)
+    empty = analytics.stats(TODAY)
+    assert empty.total == 0
+    assert analytics.stats(TODAY) is empty
+    client = make_client(date(1990, 1, 1), 170.0, 65.0)
+    repo.add(client)
+    assert analytics.stats(TODAY).total == 1
+    repo.delete(client.id)
+    assert analytics.stats(TODAY).total == 0
+
+
+def test_rows_with_malformed_birthdates_are_rejected():
+    rows = [("1990-01-01", 170.0, 65.0), ("1990-1-1", 170.0, 65.0)]
+    with pytest.raises(ValueError):
+        compute_stats(rows, [], TODAY)
+    stats = compute_stats(rows[:1], [("Femme", "", 1)], TODAY)
+    assert stats.total == 1 and stats.age_mean == 35.0
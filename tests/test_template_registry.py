@@ -0,0 +1,70 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from services import template_registry
+from services.template_registry import TemplateError, TemplateRegistry, register_font
+
+FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+
+def make_package(root: Path, name: str, templates: dict) -> None:
+    package = root / name
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    for module, source in templates.items():
+        (package / f"{module}.py").write_text(source)
+
+
+def test_preload_validates_all_templates():
+    registry = TemplateRegistry()
+    assert registry.preload() == [
+        "invoices.classic",
+        "invoices.minimalist",
+        "invoices.modern",
+        "statements.summary",
+    ]
+    assert registry.get("invoices.classic") is registry.get("invoices.classic")
+
+
+def test_invalid_templates_rejected(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    make_package(
+        tmp_path,
+        "bad_templates",
+        {"no_render": "X = 1\n", "wrong_args": "def render(c):\n    pass\n"},
+    )
+    registry = TemplateRegistry("bad_templates")
+    for name in ("no_render", "wrong_args", "missing"):
+        with pytest.raises(TemplateError):
+            registry.get(name)
+
+
+def test_auto_reload_on_source_change(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    make_package(tmp_path, "dev_templates", {"doc": "def render(c, d, b):\n    return 1\n"})
+    registry = TemplateRegistry("dev_templates", auto_reload=True)
+    assert registry.get("doc")(None, None, None) == 1
+    source = tmp_path / "dev_templates" / "doc.py"
+    source.write_text("def render(c, d, b):\n    return 2\n")
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert registry.get("doc")(None, None, None) == 2
+
+
+def test_fonts_registered_once(monkeypatch):
+    calls = []
+    real = template_registry.pdfmetrics.registerFont
+    monkeypatch.setattr(
+        template_registry.pdfmetrics,
+        "registerFont",
+        lambda font: calls.append(font) or real(font),
+    )
+    monkeypatch.setattr(template_registry, "_fonts", {})
+    assert register_font(FONT) == register_font(FONT) == "DejaVuSans"
+    assert len(calls) == 1
+    assert register_font("missing.ttf") == "Helvetica"
@@ -0,0 +1,47 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from services.tenant_registry import TenantRegistry
+
+
+def test_tenants_are_isolated_and_migrated(tmp_path):
+    registry = TenantRegistry(tmp_path, max_open=4)
+    for tenant in ("alice", "bob"):
+        conn = registry.connection(tenant)
+        with conn:
+            conn.execute(
+                "INSERT INTO app_logs (level, message) VALUES ('INFO', ?)", (tenant,)
+            )
+    assert (tmp_path / "alice.db").exists()
+    messages = registry.connection("bob").execute("SELECT message FROM app_logs").fetchall()
+    assert messages == [("bob",)]
+    registry.close_all()
+
+
+def test_lru_eviction_skips_pinned_tenants(tmp_path):
+    registry = TenantRegistry(tmp_path, max_open=2)
+    with registry.session("a") as conn_a:
+        registry.connection("b")
+        registry.connection("c")
+        assert registry.open_tenants() == ["a", "c"]
+        conn_a.execute("SELECT 1")
+    stale = registry.connection("c")
+    registry.connection("b")
+    registry.connection("d")
+    assert registry.open_tenants() == ["b", "d"]
+    with pytest.raises(sqlite3.ProgrammingError):
+        stale.execute("SELECT 1")
+    registry.close_all()
+
+
+def test_invalid_tenant_id(tmp_path):
+    registry = TenantRegistry(tmp_path)
+    with pytest.raises(ValueError):
+        registry.connection("../escape")
+    with pytest.raises(ValueError):
+        registry.connection("alice\n")
@@ -0,0 +1,87 @@
+import sqlite3
+import sys
+import uuid
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.client import Client
+from repositories.clients_repository import ClientsRepository
+from repositories.sql_functions import register_sql_functions
+from services.write_queue import WriteQueue
+
+
+def make_client(i: int) -> Client:
+    return Client(
+        id=str(uuid.uuid4()),
+        first_name=f"Client{i}",
+        last_name="Doe",
+        sex="Femme",
+        birthdate=date(1990, 1, 1),
+        height_cm=170.0,
+        weight_kg=60.0,
+    )
+
+
+def setup_db(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    register_sql_functions(conn)
+    for mig in [
+        "db/migrations/0003_create_clients_table.sql",
+        "db/migrations/0007_add_clients_search_columns.sql",
+    ]:
+        with open(mig, "r", encoding="utf-8") as f:
+            conn.executescript(f.read())
+    return conn
+
+
+def test_burst_is_committed_in_few_batches(tmp_path):
+    db_path = tmp_path / "app.db"
+    reader = setup_db(db_path)
+    writer = WriteQueue(db_path, window_ms=50)
+    futures = [
+        writer.submit(lambda conn, c: ClientsRepository(conn).add(c), make_client(i))
+        for i in range(300)
+    ]
+    for f in futures:
+        f.result(timeout=10)
+    assert reader.execute("SELECT COUNT(*) FROM clients").fetchone()[0] == 300
+    assert writer.operations == 300
+    assert writer.batches < 30
+    writer.stop()
+
+
+def test_failing_operation_does_not_abort_batch(tmp_path):
+    db_path = tmp_path / "app.db"
+    reader = setup_db(db_path)
+    writer = WriteQueue(db_path, window_ms=50)
+    first = make_client(1)
+    duplicate = make_client(1)
+    add = lambda conn, c: ClientsRepository(conn).add(c)
+    ok = writer.submit(add, first)
+    failing = writer.submit(add, duplicate)
+    other = writer.submit(add, make_client(2))
+    ok.result(timeout=10)
+    other.result(timeout=10)
+    with pytest.raises(sqlite3.IntegrityError):
+        failing.result(timeout=10)
+    assert reader.execute("SELECT COUNT(*) FROM clients").fetchone()[0] == 2
+    writer.stop()
+
+
+def test_execute_reads_own_writes(tmp_path):
+    db_path = tmp_path / "app.db"
+    reader = setup_db(db_path)
+    writer = WriteQueue(db_path)
+    client = make_client(1)
+    writer.submit(lambda conn: ClientsRepository(conn).add(client)).result(timeout=10)
+    count = writer.execute(
+        "UPDATE clients SET first_name = 'Zoe' WHERE id = ?", (client.id,)
+    ).result(timeout=10)
+    assert count == 1
+    assert ClientsRepository(reader).get(client.id).first_name == "Zoe"
+    writer.stop()
@@ -0,0 +1,231 @@
+"""Benchmark the invoice PDF templates.
+
+Every template renders ``--count`` synthetic invoices in memory, without
+and with a logo, serially and on a process pool.  Each scenario reports
+documents per second and milliseconds and bytes per document.  Pool
+scenarios start a new pool, so their timings include starting the worker
+processes.  The peak resident set size of the process and its workers
+over the whole run is reported once, in ``meta``.
+
+Results are printed as JSON and compared with a stored baseline; a
+scenario slower or bigger than the baseline by more than ``--threshold``
+is a regression.
+
+Usage::
+
+    python -m tools.bench_pdf                         # run and compare
+    python -m tools.bench_pdf --save-baseline         # record a new baseline
+    python -m tools.bench_pdf --count 200 --output bench.json
+    python -m tools.bench_pdf --profile compact       # compact output profile
+
+Timings depend on the machine: record the baseline on the machine that
+runs the comparison.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import reportlab
+
+from models.invoice import Invoice
+from services.pdf_batch import PdfJob, default_workers, iter_render, render_job
+from services.pdf_exporter import PROFILES
+
+try:  # not available on Windows
+    import resource
+except ImportError:  # pragma: no cover - platform dependent
+    resource = None
+
+TEMPLATES = ["classic", "modern", "minimalist"]
+DEFAULT_BASELINE = Path("benchmarks/pdf_baseline.json")
+DEFAULT_THRESHOLD = 0.20
+COMPARED_METRICS = ["ms_per_doc", "bytes_per_doc"]
+BRANDING = {
+    "name": "Virtus Training",
+    "primary_color": "#1F2937",
+    "secondary_color": "#6B7280",
+    "accent_color": "#2563EB",
+    "contact_email": "coach@example.com",
+    "contact_phone": "06 00 00 00 00",
+}
+
+
+def make_jobs(
+    template: str,
+    count: int,
+    logo_path: Optional[str],
+    font_path: Optional[str],
+    profile: str = "standard",
+) -> List[PdfJob]:
+    """Return ``count`` in-memory render jobs with synthetic invoices."""
+    branding = dict(BRANDING, logo_path=logo_path)
+    jobs = []
+    for n in range(count):
+        invoice = Invoice(
+            id=f"bench-{n}",
+            client_id=None,
+            number=f"2024-{n + 1:03d}",
+            label=f"Coaching individuel – séance {n + 1}",
+            amount_cents=4500 + 25 * n,
+            status="Non payée",
+            issued_on=date(2024, 1, 1) + timedelta(days=n % 365),
+            template=template,
+        )
+        data = {
+            "document_title": f"Facture {invoice.number}",
+            "invoice": invoice,
+            "client_name": f"Client {n}",
+            "mentions": "TVA non applicable, art. 293B du CGI",
+        }
+        jobs.append(
+            PdfJob(
+                f"{template}-{n}",
+                f"invoices.{template}",
+                data,
+                None,
+                branding,
+                font_path,
+                profile,
+            )
+        )
+    return jobs
+
+
+def make_logo(directory: Path) -> str:
+    """Write a 600x300 synthetic PNG logo and return its path."""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (600, 300), "white")
+    draw = ImageDraw.Draw(image)
+    for i in range(0, 600, 20):
+        draw.rectangle([i, 0, i + 10, 300], fill=(37, 99, 235 - i // 4))
+    draw.ellipse([200, 50, 400, 250], fill=(31, 41, 55))
+    path = directory / "logo.png"
+    image.save(path)
+    return str(path)
+
+
+def run_scenario(jobs: List[PdfJob], workers: int) -> Dict[str, float]:
+    """Render ``jobs`` and return the scenario metrics."""
+    started = time.perf_counter()
+    sizes = []
+    for result in iter_render(jobs, workers):
+        if not result.ok:
+            raise RuntimeError(f"{result.key}: {result.error}")
+        sizes.append(result.size)
+    elapsed = time.perf_counter() - started
+    return {
+        "docs_per_s": round(len(jobs) / elapsed, 2),
+        "ms_per_doc": round(elapsed * 1000 / len(jobs), 3),
+        "bytes_per_doc": round(sum(sizes) / len(sizes)),
+    }
+
+
+def run(
+    count: int,
+    workers: int,
+    font_path: Optional[str] = None,
+    profile: str = "standard",
+) -> Dict[str, Dict[str, float]]:
+    """Run every scenario and return metrics keyed ``template/logo/mode``."""
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        logo = make_logo(Path(tmp))
+        for template in TEMPLATES:
+            for logo_name, logo_path in (("no-logo", None), ("logo", logo)):
+                # Warm up: font registration, template import, logo decoding.
+                render_job(make_jobs(template, 1, logo_path, font_path, profile)[0])
+                jobs = make_jobs(template, count, logo_path, font_path, profile)
+                for mode, mode_workers in (("serial", 1), ("pool", workers)):
+                    key = f"{template}/{logo_name}/{mode}"
+                    results[key] = run_scenario(jobs, mode_workers)
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[str]:
+    """Return a message per metric exceeding its baseline by ``threshold``."""
+    regressions = []
+    for key, metrics in sorted(results.items()):
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = reference.get(metric), metrics.get(metric)
+            if before and after and after > before * (1 + threshold):
+                regressions.append(
+                    f"{key} {metric}: {after} vs {before} (+{after / before - 1:.0%})"
+                )
+    return regressions
+
+
+def _peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1024 if sys.platform == "darwin" else 1  # bytes on macOS
+    return max(own, children) // scale
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=50, help="documents per scenario")
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--font", default=None, help="TrueType font to render with")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="standard")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, help="also write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "count": args.count,
+            "workers": args.workers,
+            "profile": args.profile,
+            "python": platform.python_version(),
+            "reportlab": reportlab.Version,
+            "machine": platform.machine(),
+        },
+        "results": run(args.count, args.workers, args.font, args.profile),
+    }
+    # Process-lifetime peaks only grow: meaningful for the run, not per scenario.
+    report["meta"]["peak_rss_kb"] = _peak_rss_kb()
+    report["meta"]["pool_timings_include_startup"] = True
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(text + "\n", encoding="utf-8")
+        print(f"baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; run with --save-baseline", file=sys.stderr)
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+    regressions = compare(report["results"], baseline, args.threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,499 @@
+"""Check repository queries against ``EXPLAIN QUERY PLAN``.
+
+The advisor builds an in-memory database from ``db/migrations``, seeds it
+with synthetic rows, runs every entry of :data:`WORKLOAD` through the real
+repositories while recording the statements they emit, and explains each
+statement shape.  Plans containing a ``SCAN`` step are reported together
+with a proposed migration creating the missing indexes.
+
+Usage::
+
+    python -m tools.index_advisor           # report and proposed migration
+    python -m tools.index_advisor --check   # exit 1 on unexpected full scans
+
+New repository queries must be added to :data:`WORKLOAD`.  Workloads that
+legitimately read a whole table are listed in :data:`ALLOWED_SCANS`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sqlite3
+import sys
+import uuid
+from dataclasses import dataclass, field, replace
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config.enums import EQUIPMENT_LABELS, PATTERN_LABELS, PRIMARY_MUSCLE_LABELS
+from models.client import Client
+from models.exercise import Exercise
+from models.invoice import Invoice
+from models.job import Job
+from repositories.clients_repository import ClientsRepository
+from repositories.exercises_repository import ExercisesRepository
+from repositories.invoices_repository import InvoicesRepository
+from repositories.jobs_repository import JobsRepository
+from services.db_manager import MIGRATIONS_PATH, apply_migrations
+from services.query_tracer import QueryTracer, TracedConnection, normalize_sql
+
+
+@dataclass
+class Fixture:
+    """Repositories and sample keys handed to workload entries."""
+
+    conn: sqlite3.Connection
+    clients: ClientsRepository
+    exercises: ExercisesRepository
+    invoices: InvoicesRepository
+    jobs: JobsRepository
+    client: Client
+    exercise: Exercise
+    invoice: Invoice
+    job: Job
+
+
+Workload = Callable[[Fixture], Any]
+
+WORKLOAD: List[Tuple[str, Workload]] = [
+    ("clients.get", lambda f: f.clients.get(f.client.id)),
+    (
+        "clients.get_by_identity",
+        lambda f: f.clients.get_by_identity(
+            f.client.first_name, f.client.last_name, f.client.birthdate
+        ),
+    ),
+    ("clients.get_many", lambda f: f.clients.get_many([f.client.id])),
+    ("clients.list_all", lambda f: f.clients.list_all()),
+    ("clients.identity_keys", lambda f: f.clients.identity_keys()),
+    ("clients.update", lambda f: f.clients.update(f.client)),
+    ("clients.update[fields]", lambda f: f.clients.update(f.client, fields=["last_name"])),
+    ("clients.search", lambda f: f.clients.search(limit=20)),
+    ("clients.search[name]", lambda f: f.clients.search("nom1 pre", limit=20)),
+    ("clients.search[phone]", lambda f: f.clients.search("06 000", limit=20)),
+    (
+        "clients.search[cursor]",
+        lambda f: f.clients.search(
+            "nom", limit=20, cursor=f.clients.search("nom", limit=20).next_cursor
+        ),
+    ),
+    ("clients.count[name]", lambda f: f.clients.count("nom1")),
+    ("clients.billing_summary", lambda f: f.clients.list_with_billing_summary(20)),
+    (
+        "clients.billing_summary[cursor]",
+        lambda f: f.clients.list_with_billing_summary(
+            20, f.clients.list_with_billing_summary(20).next_cursor
+        ),
+    ),
+    (
+        "clients.billing_summary[name]",
+        lambda f: f.clients.list_with_billing_summary(20, sort="name"),
+    ),
+    ("clients.roster_rows", lambda f: f.clients.roster_rows()),
+    ("clients.breakdown_counts", lambda f: f.clients.breakdown_counts()),
+    ("clients.version", lambda f: f.clients.version()),
+    ("exercises.get_by_id", lambda f: f.exercises.get_by_id(f.exercise.id)),
+    ("exercises.get_by_name", lambda f: f.exercises.get_by_name(f.exercise.name)),
+    ("exercises.list_all", lambda f: f.exercises.list_all()),
+    ("exercises.list_all[name]", lambda f: f.exercises.list_all(name="Exercice")),
+    (
+        "exercises.list_all[primary_muscle]",
+        lambda f: f.exercises.list_all(primary_muscle="PECTORAUX", equipment="BAR"),
+    ),
+    ("exercises.update", lambda f: f.exercises.update(f.exercise)),
+    (
+        "exercises.update[fields]",
+        lambda f: f.exercises.update(f.exercise, fields=["secondary_muscles"]),
+    ),
+    ("exercises.is_used_in_session", lambda f: f.exercises.is_used_in_session(f.exercise.id)),
+    ("exercises.search", lambda f: f.exercises.search()),
+    ("exercises.search[query]", lambda f: f.exercises.search(query="exercice 1")),
+    (
+        "exercises.search[filters]",
+        lambda f: f.exercises.search(
+            primary_muscles=["PECTORAUX", "DORSAUX"],
+            equipment=["BAR"],
+            patterns=["PH"],
+            difficulty=(2, 4),
+        ),
+    ),
+    ("exercises.soft_delete", lambda f: f.exercises.soft_delete(f.exercise.id)),
+    ("invoices.get", lambda f: f.invoices.get(f.invoice.id)),
+    ("invoices.get_many", lambda f: f.invoices.get_many([f.invoice.id])),
+    ("invoices.list_all", lambda f: f.invoices.list_all()),
+    ("invoices.iter_matching", lambda f: list(f.invoices.iter_matching())),
+    (
+        "invoices.iter_matching[client]",
+        lambda f: list(f.invoices.iter_matching(client_id=f.invoice.client_id)),
+    ),
+    (
+        "invoices.iter_matching[period]",
+        lambda f: list(
+            f.invoices.iter_matching(issued_between=(date(2024, 1, 1), date(2024, 3, 31)))
+        ),
+    ),
+    ("invoices.iter_export_rows", lambda f: list(f.invoices.iter_export_rows())),
+    (
+        "invoices.iter_export_rows[period]",
+        lambda f: list(
+            f.invoices.iter_export_rows(
+                status="Payée", issued_between=(date(2024, 1, 1), date(2024, 12, 31))
+            )
+        ),
+    ),
+    ("invoices.query", lambda f: f.invoices.query(limit=20)),
+    (
+        "invoices.query[unpaid_quarter]",
+        lambda f: f.invoices.query(
+            status="Non payée", issued_between=(date(2024, 1, 1), date(2024, 3, 31)), limit=20
+        ),
+    ),
+    (
+        "invoices.query[client]",
+        lambda f: f.invoices.query(client_id=f.invoice.client_id, limit=20),
+    ),
+    (
+        "invoices.query[client_status]",
+        lambda f: f.invoices.query(
+            client_id=f.invoice.client_id, status="Payée", limit=20
+        ),
+    ),
+    (
+        "invoices.query[cursor]",
+        lambda f: f.invoices.query(
+            status="Payée",
+            limit=20,
+            cursor=f.invoices.query(status="Payée", limit=20).next_cursor,
+        ),
+    ),
+    ("invoices.count", lambda f: f.invoices.count()),
+    (
+        "invoices.count[unpaid_quarter]",
+        lambda f: f.invoices.count(
+            status="Non payée", issued_between=(date(2024, 1, 1), date(2024, 3, 31))
+        ),
+    ),
+    ("invoices.count[client]", lambda f: f.invoices.count(client_id=f.invoice.client_id)),
+    ("invoices.update", lambda f: f.invoices.update(f.invoice)),
+    ("invoices.update[fields]", lambda f: f.invoices.update(f.invoice, fields=["status"])),
+    (
+        "invoices.set_pdf_paths",
+        lambda f: f.invoices.set_pdf_paths({f.invoice.id: ("invoice.pdf", None)}),
+    ),
+    ("invoices.get_last_number", lambda f: f.invoices.get_last_number(2024)),
+    ("invoices.revenue_by_month", lambda f: f.invoices.revenue_by_month()),
+    (
+        "invoices.revenue_by_month[period]",
+        lambda f: f.invoices.revenue_by_month(start=(2024, 1), end=(2024, 6)),
+    ),
+    (
+        "invoices.revenue_by_month[client]",
+        lambda f: f.invoices.revenue_by_month(client_id=f.invoice.client_id),
+    ),
+    ("invoices.rebuild_revenue_summary", lambda f: f.invoices.rebuild_revenue_summary()),
+    ("invoices.revenue_drift", lambda f: f.invoices.revenue_drift()),
+    (
+        "invoices.add_numbered",
+        lambda f: f.invoices.add_numbered(replace(f.invoice, id=str(uuid.uuid4()))),
+    ),
+    (
+        "invoices.add_many",
+        lambda f: f.invoices.add_many([replace(f.invoice, id=str(uuid.uuid4()))]),
+    ),
+    ("invoices.delete", lambda f: f.invoices.delete(f.invoice.id)),
+    ("jobs.get", lambda f: f.jobs.get(f.job.id)),
+    ("jobs.list_by_status", lambda f: f.jobs.list_by_status("pending", "running")),
+    ("jobs.start", lambda f: f.jobs.start(f.job.id)),
+    ("jobs.checkpoint", lambda f: f.jobs.checkpoint(f.job.id, 10, 10, 100)),
+    ("jobs.finish", lambda f: f.jobs.finish(f.job.id, "done")),
+    ("jobs.cancel_pending", lambda f: f.jobs.cancel_pending(f.job.id)),
+    ("jobs.requeue_interrupted", lambda f: f.jobs.requeue_interrupted()),
+    ("clients.inactive_ids", lambda f: f.clients.inactive_ids(date.today())),
+    (
+        "clients.purge_inactive",
+        lambda f: f.clients.purge_inactive([f.client.id], date.today()),
+    ),
+    ("clients.delete", lambda f: f.clients.delete(f.client.id)),
+]
+
+ALLOWED_SCANS: Dict[str, str] = {
+    "clients.list_all": "lists the whole table",
+    "clients.identity_keys": "loads every identity once per import",
+    "clients.inactive_ids": "periodic retention job over every client",
+    "clients.billing_summary": "sorted on an aggregate of every client",
+    "clients.billing_summary[cursor]": "sorted on an aggregate of every client",
+    "clients.billing_summary[name]": "ordered index walk bounded by LIMIT",
+    "clients.roster_rows": "dashboard aggregates over every client",
+    "clients.breakdown_counts": "dashboard aggregates over every client",
+    "clients.search": "no filter, ordered index walk bounded by LIMIT",
+    "exercises.list_all": "lists the whole table",
+    "exercises.list_all[name]": "substring match cannot use an index",
+    "exercises.search": "no filter, lists every active exercise",
+    "exercises.search[query]": "accent-insensitive substring match on name and cues",
+    "invoices.list_all": "lists the whole table",
+    "invoices.iter_matching": "an unfiltered statement reads every invoice",
+    "invoices.iter_export_rows": "an unfiltered accounting export reads every invoice",
+    "invoices.query": "no filter, ordered index walk bounded by LIMIT",
+    "invoices.count": "no filter, counts every invoice from an index",
+    "invoices.revenue_by_month": "all-time totals read the summary, not the invoices",
+    "invoices.rebuild_revenue_summary": "repair tool reading every invoice",
+    "invoices.revenue_drift": "repair check comparing the summary with every invoice",
+}
+
+
+@dataclass
+class Finding:
+    """Plan of one statement shape emitted by a workload entry."""
+
+    workload: str
+    shape: str
+    plan: List[str]
+    scans: List[str] = field(default_factory=list)
+    proposals: List[str] = field(default_factory=list)
+
+    @property
+    def allowed(self) -> bool:
+        return self.workload in ALLOWED_SCANS
+
+
+class _Recorder(QueryTracer):
+    """Tracer keeping the first concrete statement of every shape."""
+
+    def __init__(self) -> None:
+        super().__init__(slow_ms=float("inf"))
+        self.current = ""
+        self.statements: Dict[Tuple[str, str], Tuple[str, Any]] = {}
+
+    def record(self, conn, sql, params, duration_ms) -> None:  # type: ignore[override]
+        if params is not None and self.current:
+            key = (self.current, normalize_sql(sql))
+            self.statements.setdefault(key, (sql, params))
+
+
+# ----------------------------------------------------------------------
+def build_database(
+    rows: int = 500, migrations_path: Path = MIGRATIONS_PATH
+) -> Fixture:
+    """Create an in-memory database seeded with ``rows`` synthetic records."""
+    conn = sqlite3.connect(":memory:", factory=TracedConnection)
+    conn.execute("PRAGMA foreign_keys=ON;")
+    apply_migrations(conn, migrations_path)
+    rnd = random.Random(42)
+    clients_repo = ClientsRepository(conn)
+    exercises_repo = ExercisesRepository(conn)
+    invoices_repo = InvoicesRepository(conn)
+
+    muscles = list(PRIMARY_MUSCLE_LABELS)
+    equipment = list(EQUIPMENT_LABELS)
+    patterns = list(PATTERN_LABELS)
+    clients: List[Client] = []
+    for i in range(rows):
+        client = Client(
+            id=str(uuid.UUID(int=rnd.getrandbits(128))),
+            first_name=f"Prénom{i}",
+            last_name=f"Nom{i % 97}",
+            sex=rnd.choice(["Homme", "Femme", "Autre"]),
+            birthdate=date(1960, 1, 1) + timedelta(days=rnd.randrange(15000)),
+            height_cm=float(rnd.randint(150, 200)),
+            weight_kg=float(rnd.randint(45, 120)),
+            email=f"client{i}@example.com",
+            phone=f"06 {i:08d}",
+        )
+        clients_repo.add(client)
+        clients.append(client)
+    exercises: List[Exercise] = []
+    for i in range(rows):
+        exercise = Exercise(
+            id=str(uuid.UUID(int=rnd.getrandbits(128))),
+            name=f"Exercice {i}",
+            slug=f"exercice-{i}",
+            primary_muscle=rnd.choice(muscles),
+            secondary_muscles=[rnd.choice(muscles)],
+            equipment=rnd.choice(equipment),
+            pattern=rnd.choice(patterns),
+            difficulty=rnd.randint(1, 5),
+            cues="Gainage",
+        )
+        exercises_repo.create(exercise)
+        exercises.append(exercise)
+    invoices: List[Invoice] = []
+    for i in range(rows * 4):
+        issued = date(2020, 1, 1) + timedelta(days=rnd.randrange(2000))
+        invoice = Invoice(
+            id=str(uuid.UUID(int=rnd.getrandbits(128))),
+            client_id=rnd.choice(clients).id,
+            number=f"{issued.year}-{i:05d}",
+            label="Coaching",
+            amount_cents=rnd.randint(1000, 50000),
+            status=rnd.choice(["Payée", "Non payée"]),
+            issued_on=issued,
+            template="classic",
+        )
+        invoices_repo.add(invoice)
+        invoices.append(invoice)
+    jobs_repo = JobsRepository(conn)
+    jobs: List[Job] = []
+    for i in range(rows):
+        job = Job(
+            id=str(uuid.UUID(int=rnd.getrandbits(128))),
+            kind="invoice_pdfs",
+            status=rnd.choice(["pending", "running", "done", "done", "failed"]),
+        )
+        jobs_repo.add(job)
+        jobs.append(job)
+    conn.execute("ANALYZE")
+    return Fixture(
+        conn=conn,
+        clients=clients_repo,
+        exercises=exercises_repo,
+        invoices=invoices_repo,
+        jobs=jobs_repo,
+        client=clients[0],
+        exercise=exercises[0],
+        invoice=invoices[0],
+        job=jobs[0],
+    )
+
+
+def capture(fixture: Fixture) -> Dict[Tuple[str, str], Tuple[str, Any]]:
+    """Run :data:`WORKLOAD` and return the statements emitted per entry."""
+    recorder = _Recorder()
+    fixture.conn.tracer = recorder
+    try:
+        for name, run in WORKLOAD:
+            recorder.current = name
+            run(fixture)
+    finally:
+        fixture.conn.tracer = None
+    return recorder.statements
+
+
+def analyze(rows: int = 500) -> List[Finding]:
+    """Explain every captured statement and flag full scans."""
+    fixture = build_database(rows)
+    findings: List[Finding] = []
+    for (workload, shape), (sql, params) in capture(fixture).items():
+        try:
+            plan = [
+                r[3]
+                for r in fixture.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            ]
+        except sqlite3.Error:
+            continue
+        finding = Finding(workload, shape, plan, [p for p in plan if _is_scan(p)])
+        for scan in finding.scans:
+            proposal = propose_index(fixture.conn, sql, scan)
+            if proposal:
+                finding.proposals.append(proposal)
+        findings.append(finding)
+    return findings
+
+
+def check(rows: int = 500) -> List[Finding]:
+    """Return full scans that are not listed in :data:`ALLOWED_SCANS`."""
+    return [f for f in analyze(rows) if f.scans and not f.allowed]
+
+
+# ----------------------------------------------------------------------
+_SCAN = re.compile(r"^SCAN (\w+)")
+_TARGET = re.compile(r"\b(?:FROM|UPDATE|INTO)\s+(\w+)", re.IGNORECASE)
+_PREDICATE = re.compile(
+    r"(?<![\w(])(\w+)\s*(=|IN\s*\(|BETWEEN|>=|<=|>|<)", re.IGNORECASE
+)
+
+
+def _is_scan(detail: str) -> bool:
+    return bool(_SCAN.match(detail)) and "VIRTUAL TABLE" not in detail and (
+        "CONSTANT ROW" not in detail
+    )
+
+
+def propose_index(conn: sqlite3.Connection, sql: str, scan: str) -> Optional[str]:
+    """Suggest an index removing the ``scan`` step from the plan of ``sql``.
+
+    A scan of another table than the statement target comes from a foreign
+    key action, so the referencing columns are indexed.  Otherwise the index
+    is derived from the WHERE clause: equality and ``IN`` columns first,
+    range columns last.  Columns wrapped in functions or matched with
+    ``LIKE`` cannot use an index and are ignored.
+    """
+
+    match = _SCAN.match(scan)
+    target = _TARGET.search(sql)
+    if not match or not target:
+        return None
+    table = match.group(1)
+    if table != target.group(1):
+        columns = [
+            fk[3]
+            for fk in conn.execute(f"PRAGMA foreign_key_list({table})")
+            if fk[2] == target.group(1)
+        ]
+    else:
+        columns = _where_columns(sql)
+    if not columns:
+        return None
+    return (
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(columns)} "
+        f"ON {table}({', '.join(columns)});"
+    )
+
+
+def _where_columns(sql: str) -> List[str]:
+    where = re.split(r"\bWHERE\b", sql, maxsplit=1, flags=re.IGNORECASE)
+    if len(where) < 2:
+        return []
+    clause = re.split(r"\b(?:ORDER|GROUP|LIMIT)\b", where[1], flags=re.IGNORECASE)[0]
+    equality: List[str] = []
+    ranges: List[str] = []
+    for column, op in _PREDICATE.findall(clause):
+        if column.isdigit() or column.upper() in {"AND", "OR", "NOT"}:
+            continue
+        target = equality if op.strip().upper() in {"=", "IN ("} else ranges
+        if column not in equality and column not in ranges:
+            target.append(column)
+    return equality + ranges
+
+
+def render_migration(findings: List[Finding]) -> str:
+    """Return a migration script creating every proposed index."""
+    statements = sorted(
+        {p for f in findings if not f.allowed for p in f.proposals}
+    )
+    return "\n".join(statements) + ("\n" if statements else "")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--check", action="store_true", help="fail on unexpected scans")
+    args = parser.parse_args(argv)
+
+    findings = analyze(args.rows)
+    unexpected = [f for f in findings if f.scans and not f.allowed]
+    for finding in findings:
+        if not finding.scans:
+            status = "ok"
+        elif finding.allowed:
+            status = f"scan (allowed: {ALLOWED_SCANS[finding.workload]})"
+        else:
+            status = "SCAN"
+        print(f"[{status}] {finding.workload}: {finding.shape}")
+        for step in finding.plan:
+            print(f"    {step}")
+    migration = render_migration(findings)
+    if migration:
+        print("\n-- proposed migration\n" + migration)
+    if args.check and unexpected:
+        print(f"{len(unexpected)} unexpected full scan(s)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""Rebuild the ``invoice_revenue_monthly`` summary from the invoices.
+
+Triggers keep the summary in sync with ``invoices``; this command repairs
+it after manual edits or a restore, or only reports the drift.
+
+Usage::
+
+    python -m tools.rebuild_revenue [db_path]           # rebuild
+    python -m tools.rebuild_revenue --check [db_path]   # exit 1 on drift
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from repositories.invoices_repository import InvoicesRepository
+from services.db_manager import DEFAULT_DB_PATH, apply_migrations
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("db_path", nargs="?", default=str(DEFAULT_DB_PATH))
+    parser.add_argument("--check", action="store_true", help="report drift only")
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db_path)
+    try:
+        apply_migrations(conn)
+        repo = InvoicesRepository(conn)
+        drift = repo.revenue_drift()
+        print(f"{drift} summary row(s) out of sync")
+        if args.check:
+            return 1 if drift else 0
+        rows = repo.rebuild_revenue_summary()
+        print(f"rebuilt {rows} summary row(s)")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())